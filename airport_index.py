@@ -0,0 +1,168 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+AIRPORTS_CSV = "airports.csv"
+EARTH_RADIUS_KM = 6371
+
+
+def unit_vectors(lat, lon):
+    # points on the unit sphere; the chord between two of them gives the
+    # great-circle distance without any trigonometry per pair
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.stack(
+        [np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1
+    )
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+class AirportIndex:
+    """Airports bucketed into a lat/lon grid for nearest and radius queries.
+
+    Single queries only look at the grid cells a search circle can reach;
+    the *_batch methods compare many points against every airport at once.
+    Distances are great-circle kilometres, the same as haversine.
+    """
+
+    def __init__(self, airports, cell_deg=2.0):
+        self.airports = airports.reset_index(drop=True)
+        self.lat = self.airports["lat"].to_numpy(dtype=float)
+        self.lon = self.airports["lon"].to_numpy(dtype=float)
+        self.xyz = unit_vectors(self.lat, self.lon)
+        self.positions = pd.Series(self.airports.index, index=self.airports["faa"])
+
+        self.cell_deg = cell_deg
+        self.n_rows = int(np.ceil(180 / cell_deg))
+        self.n_cols = int(np.ceil(360 / cell_deg))
+        cells = self._cell(self.lat, self.lon)
+        # airport positions sorted by cell, and where each cell's run starts
+        self.order = np.argsort(cells, kind="stable")
+        self.starts = np.searchsorted(
+            cells[self.order], np.arange(self.n_rows * self.n_cols + 1)
+        )
+
+    @classmethod
+    def from_csv(cls, path=AIRPORTS_CSV, **kwargs):
+        return cls(pd.read_csv(path), **kwargs)
+
+    def _row(self, lat):
+        return np.clip(((lat + 90) // self.cell_deg).astype(int), 0, self.n_rows - 1)
+
+    def _col(self, lon):
+        return (((lon + 180) % 360) // self.cell_deg).astype(int) % self.n_cols
+
+    def _cell(self, lat, lon):
+        return self._row(np.asarray(lat)) * self.n_cols + self._col(np.asarray(lon))
+
+    def coords(self, faa):
+        pos = self.positions[faa]
+        return self.lat[pos], self.lon[pos]
+
+    def _candidates(self, lat, lon, radius_km):
+        # every airport in the grid cells a circle of radius_km can touch; the
+        # cells of one grid row are contiguous in self.order, so each row is a
+        # slice (two when the column range wraps past 180 degrees)
+        angle = radius_km / EARTH_RADIUS_KM
+        dlat = np.degrees(angle)
+        first_row = int(self._row(np.array(lat - dlat)))
+        last_row = int(self._row(np.array(lat + dlat)))
+        if angle >= np.pi / 2 - np.radians(abs(lat)) or lat - dlat <= -90 or lat + dlat >= 90:
+            spans = [(0, self.n_cols)]
+        else:
+            dlon = np.degrees(np.arcsin(np.sin(angle) / np.cos(np.radians(lat))))
+            first = int(self._col(np.array(lon - dlon)))
+            count = min(int(np.ceil(2 * dlon / self.cell_deg)) + 1, self.n_cols)
+            if first + count <= self.n_cols:
+                spans = [(first, first + count)]
+            else:
+                spans = [(first, self.n_cols), (0, first + count - self.n_cols)]
+        parts = [
+            self.order[
+                self.starts[row * self.n_cols + start] : self.starts[row * self.n_cols + stop]
+            ]
+            for row in range(first_row, last_row + 1)
+            for start, stop in spans
+        ]
+        return np.concatenate(parts)
+
+    def _distances(self, positions, lat, lon):
+        point = unit_vectors(lat, lon)
+        return chord_to_km(np.linalg.norm(self.xyz[positions] - point, axis=1))
+
+    def radius_positions(self, lat, lon, radius_km):
+        """Row positions and distances (km) of the airports within radius_km,
+        nearest first."""
+        positions = self._candidates(lat, lon, radius_km)
+        distances = self._distances(positions, lat, lon)
+        keep = distances <= radius_km
+        positions, distances = positions[keep], distances[keep]
+        ranked = np.argsort(distances, kind="stable")
+        return positions[ranked], distances[ranked]
+
+    def nearest_positions(self, lat, lon, k=1):
+        """Row positions and distances (km) of the k airports nearest to (lat, lon)."""
+        # widen the search circle until it holds k airports; everything inside
+        # a circle is found exactly, so its k closest are the true nearest
+        radius_km = self.cell_deg * 111.0
+        while True:
+            positions, distances = self.radius_positions(lat, lon, radius_km)
+            if len(positions) >= k or radius_km >= np.pi * EARTH_RADIUS_KM:
+                return positions[:k], distances[:k]
+            radius_km *= 2
+
+    def within(self, lat, lon, radius_km):
+        """Airports within radius_km of (lat, lon), nearest first, with distance_km."""
+        positions, distances = self.radius_positions(lat, lon, radius_km)
+        return self.airports.iloc[positions].assign(distance_km=distances)
+
+    def nearest(self, lat, lon, k=1):
+        """The k airports nearest to (lat, lon), nearest first, with distance_km."""
+        positions, distances = self.nearest_positions(lat, lon, k)
+        return self.airports.iloc[positions].assign(distance_km=distances)
+
+    def distances_from(self, lat, lon):
+        """Great-circle distance in km from (lat, lon) to every airport, in row order."""
+        return chord_to_km(np.linalg.norm(self.xyz - unit_vectors(lat, lon), axis=1))
+
+    def _batch_chords(self, lats, lons, chunk):
+        points = unit_vectors(np.asarray(lats, dtype=float), np.asarray(lons, dtype=float))
+        for start in range(0, len(points), chunk):
+            block = points[start : start + chunk]
+            # |a - b|^2 = 2 - 2 a.b for unit vectors
+            squared = np.maximum(2 - 2 * block @ self.xyz.T, 0)
+            yield start, np.sqrt(squared)
+
+    def nearest_batch(self, lats, lons, k=1, chunk=1024):
+        """Positions and distances (km) of the k nearest airports to each point,
+        as two (n_points, k) arrays, nearest first."""
+        n = len(lats)
+        positions = np.empty((n, k), dtype=int)
+        distances = np.empty((n, k))
+        for start, chords in self._batch_chords(lats, lons, chunk):
+            part = np.argpartition(chords, k - 1, axis=1)[:, :k]
+            part_chords = np.take_along_axis(chords, part, axis=1)
+            ranked = np.argsort(part_chords, axis=1, kind="stable")
+            stop = start + len(chords)
+            positions[start:stop] = np.take_along_axis(part, ranked, axis=1)
+            distances[start:stop] = chord_to_km(
+                np.take_along_axis(part_chords, ranked, axis=1)
+            )
+        return positions, distances
+
+    def within_batch(self, lats, lons, radius_km, chunk=1024):
+        """For each point, the positions of the airports within radius_km."""
+        limit = 2 * np.sin(radius_km / EARTH_RADIUS_KM / 2)
+        result = []
+        for _, chords in self._batch_chords(lats, lons, chunk):
+            result.extend(np.flatnonzero(row <= limit) for row in chords)
+        return result
+
+
+@lru_cache(maxsize=None)
+def load_index(path=AIRPORTS_CSV):
+    # built once per process
+    return AirportIndex.from_csv(path)
@@ -0,0 +1,97 @@
+import numpy as np
+import plotly.graph_objects as go
+
+WORLD_BOUNDS = (-180, -90, 180, 90)
+US_BOUNDS = (-170, 15, -60, 72)
+
+
+class AirportMap:
+    """Airport map drawn at the level of detail a view needs.
+
+    Airports are clustered once into a pyramid of lat/lon grids, each level
+    with cells half the size of the one before. A view picks the finest level
+    whose clusters inside its bounds fit in max_points, falling back to the
+    individual airports when they fit, and only those points go into the
+    WebGL (MapLibre) trace.
+    """
+
+    def __init__(self, airports, levels=11, max_points=2000):
+        self.airports = airports.reset_index(drop=True)
+        self.max_points = max_points
+        singles = self.airports[["lat", "lon", "alt", "name"]].assign(count=1)
+        # coarsest first, the airports themselves last
+        self.pyramid = [self._cluster(level) for level in range(levels)] + [singles]
+
+    def _cluster(self, level):
+        cell_deg = 360 / 2 ** (level + 2)
+        rows = ((self.airports["lat"] + 90) // cell_deg).astype(int)
+        cols = (((self.airports["lon"] + 180) % 360) // cell_deg).astype(int)
+        clusters = (
+            self.airports.groupby([rows.rename("row"), cols.rename("col")])
+            .agg(
+                lat=("lat", "mean"),
+                lon=("lon", "mean"),
+                alt=("alt", "mean"),
+                name=("name", "first"),
+                count=("faa", "size"),
+            )
+            .reset_index(drop=True)
+        )
+        clusters["name"] = clusters["name"].where(
+            clusters["count"] == 1, clusters["count"].astype(str) + " airports"
+        )
+        return clusters
+
+    @staticmethod
+    def _in_bounds(frame, bounds):
+        west, south, east, north = bounds
+        lat_ok = frame["lat"].between(south, north)
+        if west <= east:
+            lon_ok = frame["lon"].between(west, east)
+        else:
+            # the view crosses the antimeridian
+            lon_ok = (frame["lon"] >= west) | (frame["lon"] <= east)
+        return frame[lat_ok & lon_ok]
+
+    def visible(self, bounds=WORLD_BOUNDS):
+        """The points to draw for bounds (west, south, east, north)."""
+        best = self._in_bounds(self.pyramid[0], bounds)
+        for frame in self.pyramid[1:]:
+            points = self._in_bounds(frame, bounds)
+            if len(points) > self.max_points:
+                break
+            best = points
+        return best
+
+    def figure(self, bounds=WORLD_BOUNDS, title=None):
+        points = self.visible(bounds)
+        west, south, east, north = bounds
+        span = max((east - west) % 360 or 360, 2 * (north - south))
+        center_lon = west + ((east - west) % 360 or 360) / 2
+        fig = go.Figure(
+            go.Scattermap(
+                lat=points["lat"],
+                lon=points["lon"],
+                mode="markers",
+                marker=dict(
+                    size=6 + 3 * np.log2(points["count"]),
+                    color=points["alt"],
+                    colorscale="Plasma",
+                    showscale=True,
+                    colorbar=dict(title="alt"),
+                ),
+                text=points["name"],
+                hovertemplate="%{text}<br>alt %{marker.color:.0f}<extra></extra>",
+            )
+        )
+        fig.update_layout(
+            title=title,
+            map=dict(
+                center=dict(
+                    lat=(south + north) / 2, lon=((center_lon + 180) % 360) - 180
+                ),
+                zoom=float(np.clip(np.log2(360 / span), 0, 12)),
+            ),
+            margin=dict(l=0, r=0, t=40 if title else 0, b=0),
+        )
+        return fig
@@ -0,0 +1,134 @@
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from derived_state import get_watermark, max_flight_rowid, needs_refresh, set_watermark
+from query_backend import data_version
+
+DB_PATH = "flights_database.db"
+
+# Every histogram shares these bins, so histograms merge by adding counts.
+# Airtimes past the last edge land in the last bin.
+BIN_WIDTH = 5
+BIN_EDGES = np.arange(0, 720 + BIN_WIDTH, BIN_WIDTH)
+N_BINS = len(BIN_EDGES) - 1
+# stored as little-endian uint16: one airport never has 65k flights in a bin in a day
+BLOB_DTYPE = np.dtype("<u2")
+
+_lock = threading.Lock()
+_current = set()
+
+
+def airtime_bins(air_time):
+    return np.clip(np.asarray(air_time, dtype=float) // BIN_WIDTH, 0, N_BINS - 1).astype(int)
+
+
+def decode(blob):
+    return np.frombuffer(blob, dtype=BLOB_DTYPE).astype(np.int64)
+
+
+def merge_histograms(blobs):
+    # one frombuffer over all blobs, then a column sum
+    blobs = list(blobs)
+    if not blobs:
+        return np.zeros(N_BINS, dtype=np.int64)
+    stacked = np.frombuffer(b"".join(bytes(b) for b in blobs), dtype=BLOB_DTYPE)
+    return stacked.reshape(-1, N_BINS).sum(axis=0, dtype=np.int64)
+
+
+def histogram_frame(counts):
+    # bin start/end and count per non-empty bin, for charting
+    frame = pd.DataFrame(
+        {"start": BIN_EDGES[:-1], "end": BIN_EDGES[1:], "flights": counts}
+    )
+    return frame[frame["flights"] > 0].reset_index(drop=True)
+
+
+def create_histogram_table(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS airtime_histograms (
+            flight_date TEXT NOT NULL,
+            origin TEXT NOT NULL,
+            counts BLOB NOT NULL,
+            PRIMARY KEY (flight_date, origin)
+        )
+        """
+    )
+
+
+def refresh_airtime_histograms(db_path=DB_PATH, rebuild=False):
+    # adds flights past the watermark into the stored histograms
+    conn = sqlite3.connect(db_path, timeout=30.0)
+    with conn:
+        # taken before reading the watermark, so two processes can't both add
+        # the same flights
+        conn.execute("BEGIN IMMEDIATE")
+        create_histogram_table(conn)
+        if rebuild:
+            conn.execute("DELETE FROM airtime_histograms")
+            set_watermark(conn, "airtime_histograms", 0)
+        start = get_watermark(conn, "airtime_histograms")
+        end = max_flight_rowid(conn)
+        if end > start:
+            rows = pd.read_sql_query(
+                """
+                SELECT printf('%04d-%02d-%02d', year, month, day) AS flight_date,
+                       origin, air_time
+                FROM flights
+                WHERE rowid > ? AND rowid <= ? AND air_time IS NOT NULL
+                """,
+                conn,
+                params=(start, end),
+            )
+            rows["bin"] = airtime_bins(rows["air_time"])
+            counts = rows.groupby(["flight_date", "origin", "bin"]).size()
+            updates = []
+            for (flight_date, origin), group in counts.groupby(level=[0, 1]):
+                histogram = np.zeros(N_BINS, dtype=np.int64)
+                histogram[group.index.get_level_values("bin")] = group.to_numpy()
+                old = conn.execute(
+                    "SELECT counts FROM airtime_histograms WHERE flight_date = ? AND origin = ?",
+                    (flight_date, origin),
+                ).fetchone()
+                if old is not None:
+                    histogram += decode(old[0])
+                updates.append(
+                    (flight_date, origin, histogram.astype(BLOB_DTYPE).tobytes())
+                )
+            conn.executemany(
+                "INSERT OR REPLACE INTO airtime_histograms VALUES (?, ?, ?)", updates
+            )
+            set_watermark(conn, "airtime_histograms", end)
+    conn.close()
+    return end - start if end > start else 0
+
+
+def ensure_airtime_histograms(db_path=DB_PATH):
+    """Folds new flights into the stored histograms before they are read, once
+    they have been built; a version check when nothing has changed since the
+    last call."""
+    if (db_path, data_version(db_path)) in _current:
+        return
+    with _lock:
+        if (db_path, data_version(db_path)) in _current:
+            return
+        if needs_refresh(db_path, "airtime_histograms", "airtime_histograms"):
+            refresh_airtime_histograms(db_path)
+        _current.add((db_path, data_version(db_path)))
+
+
+def airtime_histogram(backend, start, end, origins=None):
+    """Merged airtime counts per bin for flight dates start..end (ISO strings),
+    optionally only for the given origins."""
+    rows = backend.query("airtime_histogram_range", (start, end))
+    if origins is not None:
+        rows = rows[rows["origin"].isin(origins)]
+    return merge_histograms(rows["counts"])
+
+
+if __name__ == "__main__":
+    added = refresh_airtime_histograms()
+    print(f"Folded {added} new flight rows into airtime_histograms")
@@ -0,0 +1,150 @@
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+from query_backend import QUERIES, get_backend, missing_table
+
+
+def sample_params(backend):
+    # parameters for the queries that take them: the busiest route and a busy day
+    route = backend.execute(
+        """
+        SELECT f.origin, f.dest, a1.name AS origin_name, a2.name AS dest_name
+        FROM flights f
+        JOIN airports a1 ON f.origin = a1.faa
+        JOIN airports a2 ON f.dest = a2.faa
+        GROUP BY f.origin, f.dest, a1.name, a2.name
+        ORDER BY COUNT(*) DESC
+        LIMIT 1
+        """
+    ).iloc[0]
+    year, month, day = (
+        backend.execute(
+            """
+            SELECT year, month, day
+            FROM flights
+            GROUP BY year, month, day
+            ORDER BY COUNT(*) DESC
+            LIMIT 1
+            """
+        )
+        .iloc[0]
+        .tolist()
+    )
+    return {
+        "route_carrier_stats": (route["origin_name"], route["dest_name"]),
+        "route_carrier_stats_by_faa": (route["origin"], route["dest"]),
+        "top_destinations": (route["origin_name"],),
+        "flights_on_day": (year, month, day),
+        "destinations_on_date": (month, day, route["origin"]),
+        "day_destination_counts": (month, day, route["origin"]),
+        "plane_type_usage": (route["origin"], route["dest"]),
+        "plane_type_usage_in_month": (route["origin"], year, month),
+        "rollup_range": ("week", f"{year}-01-01", f"{year}-06-30"),
+        "airtime_histogram_range": (f"{year}-01-01", f"{year}-06-30"),
+    }
+
+
+def normalise(frame):
+    # DuckDB hands BLOBs back as bytearray, which can't be sorted or compared
+    # with SQLite's bytes
+    frame = frame.apply(
+        lambda column: column.map(
+            lambda value: bytes(value) if isinstance(value, bytearray) else value
+        )
+        if column.dtype == object
+        else column
+    )
+    # row order is only guaranteed where the query sorts, so compare sorted rows
+    frame = frame.sort_values(list(frame.columns), na_position="last")
+    return frame.reset_index(drop=True)
+
+
+def available_queries(backend, params):
+    """The queries that run on backend, and {name: error} for those that fail.
+
+    Queries on derived tables only run once those tables have been built, so a
+    missing table leaves a query out of both; any other error is a failure.
+    """
+    names = []
+    failures = {}
+    for name in QUERIES:
+        try:
+            backend.query(name, params.get(name, ()))
+        except Exception as e:
+            if not missing_table(e):
+                failures[name] = f"{type(e).__name__}: {e}"
+            continue
+        names.append(name)
+    return names, failures
+
+
+def check_parity(reference, candidate, params, names):
+    mismatches = {}
+    for name in names:
+        args = params.get(name, ())
+        expected = normalise(reference.query(name, args))
+        actual = normalise(candidate.query(name, args))
+        try:
+            pd.testing.assert_frame_equal(
+                expected, actual, check_dtype=False, rtol=1e-6
+            )
+        except AssertionError as e:
+            mismatches[name] = str(e)
+    return mismatches
+
+
+def time_query(backend, name, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        backend.query(name, params)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def benchmark(backends, params, names, repeat=5):
+    rows = []
+    for name in names:
+        row = {"query": name}
+        for backend in backends:
+            row[backend.name] = time_query(backend, name, params.get(name, ()), repeat)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    # uncached, so the timings are the engines' own
+    sqlite_backend = get_backend("sqlite", result_cache=False)
+    duckdb_backend = get_backend("duckdb", result_cache=False)
+    params = sample_params(sqlite_backend)
+    names, failures = available_queries(sqlite_backend, params)
+    skipped = [name for name in QUERIES if name not in names and name not in failures]
+    if skipped:
+        print(f"Skipping queries on tables that are not built: {', '.join(skipped)}")
+    for name, message in failures.items():
+        print(f"QUERY FAILED {name} on sqlite: {message}\n")
+
+    mismatches = check_parity(sqlite_backend, duckdb_backend, params, names)
+    for name, message in mismatches.items():
+        print(f"PARITY FAILED {name}:\n{message}\n")
+    print(
+        f"Parity: {len(names) - len(mismatches)}/{len(names) + len(failures)} queries match"
+        + (f", {len(failures)} failed on sqlite" if failures else "")
+    )
+
+    results = benchmark([sqlite_backend, duckdb_backend], params, names)
+    results["speedup"] = results["sqlite"] / results["duckdb"]
+    print(
+        results.to_string(
+            index=False,
+            formatters={
+                "sqlite": "{:.4f}s".format,
+                "duckdb": "{:.4f}s".format,
+                "speedup": "{:.1f}x".format,
+            },
+        )
+    )
+    sys.exit(1 if mismatches or failures else 0)
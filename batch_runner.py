@@ -0,0 +1,153 @@
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from distance_matrix import load_matrices
+from flights_analysis import (
+    compute_inner_products_for_day,
+    configure,
+    get_backend as analysis_backend,
+    get_flight_stats,
+    get_plane_type_usage,
+)
+from flights_enriched import ensure_flights_enriched
+from query_backend import DB_PATH, SQLiteBackend, get_backend
+
+# The per-day and per-route helpers from flights_analysis run for every (origin, month)
+# of the year in a process pool. Each worker opens its own read-only connection,
+# which the flights_analysis helpers it calls use too, and returns partial
+# results for its slice; run_batch merges them.
+
+_backend = None
+
+
+def _init_worker(db_path):
+    global _backend
+    # a connection inherited from the parent process must not be reused
+    get_backend.cache_clear()
+    # SQLite, and not through the shared on-disk result cache, where every
+    # worker would queue for the same write lock
+    configure(backend="sqlite", result_cache=False)
+    _backend = analysis_backend(db_path)
+
+
+def batch_tasks(db_path=DB_PATH):
+    # the biggest slices go first so no worker is left with a long one at the end
+    frame = SQLiteBackend(db_path).execute(
+        """
+        SELECT origin, year, month, COUNT(*) AS n
+        FROM flights
+        GROUP BY origin, year, month
+        ORDER BY n DESC, origin, year, month
+        """
+    )
+    return [
+        (origin, int(year), int(month))
+        for origin, year, month in frame[["origin", "year", "month"]].itertuples(
+            index=False
+        )
+    ]
+
+
+def run_task(task):
+    origin, year, month = task
+    conn = _backend.connection()
+    pairs = _backend.execute(
+        """
+        SELECT DISTINCT day, dest
+        FROM flights
+        WHERE origin = ? AND year = ? AND month = ?
+        ORDER BY day, dest
+        """,
+        (origin, year, month),
+    )
+
+    flight_stats = {
+        (month, int(day), origin): get_flight_stats(
+            month, int(day), origin, db_path=_backend.db_path
+        )
+        for day in pairs["day"].unique()
+    }
+
+    inner_products = {}
+    for day, dest in pairs.itertuples(index=False):
+        key = (origin, dest, year, month, int(day))
+        inner_products[key] = compute_inner_products_for_day(conn, *key)
+
+    usage = _backend.query("plane_type_usage_in_month", (origin, year, month))
+    plane_types = {}
+    for dest, plane_type, count in usage.itertuples(index=False):
+        plane_types.setdefault((origin, dest), Counter())[plane_type] += int(count)
+
+    return flight_stats, inner_products, plane_types
+
+
+def merge(partials):
+    flight_stats, inner_products, plane_types = {}, {}, {}
+    for stats, products, types in partials:
+        flight_stats.update(stats)
+        inner_products.update(products)
+        for route, counts in types.items():
+            plane_types.setdefault(route, Counter()).update(counts)
+    # same shape and order as get_plane_type_usage: most used type first
+    plane_types = {
+        route: dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+        for route, counts in sorted(plane_types.items())
+    }
+    return {
+        "flight_stats": dict(sorted(flight_stats.items())),
+        "inner_products": dict(sorted(inner_products.items())),
+        "plane_type_usage": plane_types,
+    }
+
+
+def run_batch(db_path=DB_PATH, workers=None, tasks=None):
+    tasks = batch_tasks(db_path) if tasks is None else tasks
+    # build the airport matrices and bring flights_enriched up to date here
+    # rather than racing to do it in every worker
+    load_matrices()
+    ensure_flights_enriched(db_path)
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(db_path,)
+    ) as pool:
+        return merge(pool.map(run_task, tasks))
+
+
+def worker_counts(limit=None):
+    limit = limit or os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= limit:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != limit:
+        counts.append(limit)
+    return counts
+
+
+if __name__ == "__main__":
+    # python batch_runner.py [max_workers]; defaults to every core
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    tasks = batch_tasks()
+    print(f"{len(tasks)} (origin, month) slices on {os.cpu_count()} cores")
+
+    timings = {}
+    results = {}
+    for workers in worker_counts(limit):
+        start = time.perf_counter()
+        results[workers] = run_batch(workers=workers, tasks=tasks)
+        timings[workers] = time.perf_counter() - start
+        print(
+            f"{workers:>3} workers: {timings[workers]:.2f}s "
+            f"({timings[1] / timings[workers]:.2f}x)"
+        )
+
+    baseline = results[1]
+    ok = all(result == baseline for result in results.values())
+    # the merged per-route counts must equal the whole-year single-route query
+    for origin, dest in list(baseline["plane_type_usage"])[:20]:
+        ok &= baseline["plane_type_usage"][(origin, dest)] == get_plane_type_usage(
+            origin, dest
+        )
+    print("Merged results match" if ok else "MERGED RESULTS DIFFER")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,112 @@
+import time
+
+import streamlit as st
+import plotly.express as px
+
+from flight_bitmaps import load_flight_bitmaps
+
+PAGE = "crossfilter"
+# dimension -> (chart title, x axis title)
+CHARTS = {
+    "carrier": ("Flights by Carrier", "Carrier"),
+    "origin": ("Flights by Origin", "Origin"),
+    "month": ("Flights by Month", "Month"),
+    "hour": ("Flights by Scheduled Departure Hour", "Hour"),
+    "delay_bucket": ("Flights by Arrival Delay", "Arrival delay"),
+    "dest": ("Top Destinations", "Destination"),
+}
+TOP_DESTINATIONS = 25
+
+
+def chart_key(dim):
+    return f"{PAGE}_{dim}"
+
+
+def selected_values(bitmaps, dim):
+    # the bars picked in dim's chart on the last run; plotly reports their
+    # category labels as text
+    event = st.session_state.get(chart_key(dim))
+    if not event:
+        return []
+    by_label = {str(value): value for value in bitmaps.values(dim)}
+    points = event["selection"]["points"]
+    return [by_label[str(point["x"])] for point in points if str(point["x"]) in by_label]
+
+
+def clear_selections():
+    for dim in CHARTS:
+        st.session_state.pop(chart_key(dim), None)
+
+
+def build_bar(frame, dim, picked):
+    title, x_title = CHARTS[dim]
+    frame = frame.assign(label=frame[dim].astype(str))
+    # picked bars keep the full colour, the rest fade while anything is picked
+    colors = [
+        "#1f77b4" if not picked or value in picked else "#c6dbef" for value in frame[dim]
+    ]
+    fig = px.bar(
+        frame,
+        x="label",
+        y="flights",
+        title=title,
+        labels={"label": x_title, "flights": "Flights"},
+        hover_data={"mean_arr_delay": ":.1f"},
+    )
+    fig.update_traces(marker_color=colors)
+    fig.update_layout(xaxis_type="category", clickmode="event+select", dragmode="select")
+    return fig
+
+
+def render(backend):
+    st.markdown(
+        """
+    <h1 style='text-align: center; color:rgb(19, 19, 31);'> Cross-filter</h1>
+    <hr>
+    """,
+        unsafe_allow_html=True,
+    )
+    st.write(
+        "Click or box-select bars in any chart to filter all the others. Values picked "
+        "in one chart are combined with OR, and different charts with AND."
+    )
+
+    bitmaps = load_flight_bitmaps(backend)
+    selections = {dim: selected_values(bitmaps, dim) for dim in CHARTS}
+
+    start = time.perf_counter()
+    aggregates = bitmaps.crossfilter(selections)
+    summary = bitmaps.summary(selections)
+    elapsed = time.perf_counter() - start
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Flights Selected", f"{summary['flights']:,}")
+    col2.metric("Avg Departure Delay (min)", f"{summary['mean_dep_delay']:.2f}")
+    col3.metric("Avg Arrival Delay (min)", f"{summary['mean_arr_delay']:.2f}")
+    col4.metric("Filtered in", f"{elapsed * 1000:.1f} ms")
+
+    picked = {dim: values for dim, values in selections.items() if values}
+    if picked:
+        st.caption(
+            "Filtering on "
+            + "; ".join(
+                f"{CHARTS[dim][1]}: {', '.join(map(str, values))}" for dim, values in picked.items()
+            )
+        )
+    st.button("Clear selection", on_click=clear_selections, disabled=not picked)
+
+    aggregates["dest"] = (
+        aggregates["dest"]
+        .sort_values(["flights", "dest"], ascending=[False, True])
+        .head(TOP_DESTINATIONS)
+    )
+    for row in (("carrier", "origin"), ("month", "hour"), ("delay_bucket", "dest")):
+        for column, dim in zip(st.columns(2), row):
+            with column:
+                st.plotly_chart(
+                    build_bar(aggregates[dim], dim, selections[dim]),
+                    key=chart_key(dim),
+                    on_select="rerun",
+                    selection_mode=("points", "box"),
+                    use_container_width=True,
+                )
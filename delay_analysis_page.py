@@ -0,0 +1,210 @@
+import time
+
+import streamlit as st
+import pandas as pd
+import altair as alt
+
+import figure_cache
+from derived_state import refresh_if_writable
+from flight_sample import ensure_flight_sample
+from panel_executor import frame_panel, render_panels
+from query_backend import STREAM_CHUNKSIZE
+
+PAGE = "delay"
+
+# All four charts are drawn from the small "delay_cells" frame of per-cell sums,
+# so the server ships a few hundred aggregated points instead of every joined row.
+PRECIP_BUCKETS = ["0", "0-0.05", "0.05-0.1", "0.1-0.25", "0.25-0.5", ">0.5"]
+CELL_KEYS = ["hour", "wind_bin", "temp_bin", "precip_bucket"]
+# seconds between redraws while the rows stream in
+REDRAW_EVERY = 0.3
+
+
+def get_delay_cells(backend, sample=False):
+    # sample=True reads the same cells from the stratified flight sample
+    return backend.query("sample_delay_cells" if sample else "delay_cells")
+
+
+def summarise_delay(cells, by):
+    # mean and 95% confidence interval of arr_delay from the summed cells
+    grouped = cells.groupby(by)[["n", "delay_sum", "delay_sumsq"]].sum().reset_index()
+    n = grouped["n"]
+    grouped["mean_delay"] = grouped["delay_sum"] / n
+    variance = (grouped["delay_sumsq"] - n * grouped["mean_delay"] ** 2) / (n - 1)
+    margin = 1.96 * (variance.clip(lower=0) / n) ** 0.5
+    grouped["ci_low"] = grouped["mean_delay"] - margin.fillna(0)
+    grouped["ci_high"] = grouped["mean_delay"] + margin.fillna(0)
+    return grouped[[by, "n", "mean_delay", "ci_low", "ci_high"]]
+
+
+def fold_cells(cells, rows):
+    # adds a chunk of delay_rows into the running per-cell sums
+    chunk = (
+        rows.assign(delay_sq=rows["arr_delay"] ** 2)
+        .groupby(CELL_KEYS)
+        .agg(
+            n=("arr_delay", "size"),
+            delay_sum=("arr_delay", "sum"),
+            delay_sumsq=("delay_sq", "sum"),
+        )
+    )
+    return chunk if cells is None else cells.add(chunk, fill_value=0)
+
+
+def stream_delay_cells(backend, chunksize=STREAM_CHUNKSIZE, redraw_every=REDRAW_EVERY):
+    """Yields (cells, rows_read, done) while delay_rows streams in chunks.
+
+    Only the current chunk and the running sums are held, so memory does not
+    grow with the number of flights. Partial cells are yielded at most every
+    redraw_every seconds; the last yield has every row and done=True.
+    """
+    cells = None
+    rows_read = 0
+    last_yield = time.monotonic()
+    for rows in backend.stream("delay_rows", chunksize=chunksize):
+        cells = fold_cells(cells, rows)
+        rows_read += len(rows)
+        # the first chunk is always drawn, so a chart shows up straight away
+        if rows_read == len(rows) or time.monotonic() - last_yield >= redraw_every:
+            yield cells_frame(cells), rows_read, False
+            last_yield = time.monotonic()
+    yield cells_frame(cells), rows_read, True
+
+
+def cells_frame(cells):
+    # the running sums in the same shape as the delay_cells query
+    if cells is None:
+        return pd.DataFrame()
+    frame = cells.reset_index()
+    frame["n"] = frame["n"].astype(int)
+    return frame
+
+
+def delay_band_chart(frame, x, x_title, color, sort=None):
+    x_axis = alt.X(x, title=x_title, sort=sort)
+    tooltip = [
+        alt.Tooltip(x, title=x_title),
+        alt.Tooltip("mean_delay:Q", title="Mean delay (min)", format=".1f"),
+        alt.Tooltip("n:Q", title="Flights"),
+    ]
+    band = (
+        alt.Chart(frame)
+        .mark_area(color=color, opacity=0.2)
+        .encode(x=x_axis, y="ci_low:Q", y2="ci_high:Q")
+    )
+    line = (
+        alt.Chart(frame)
+        .mark_line(color=color, point=True)
+        .encode(
+            x=x_axis,
+            y=alt.Y("mean_delay:Q", title="Arrival Delay (min)"),
+            tooltip=tooltip,
+        )
+    )
+    return (band + line).properties(height=350)
+
+
+SAMPLE_NOTE = (
+    "≈ Estimated from a stratified sample of flights, with 95% bands. "
+    "Refining to the exact answer…"
+)
+
+
+def render(backend):
+    st.markdown(
+        '<h1 style="text-align:center; color:black; font-size:50px; font-weight:bold; font-family:Trebuchet MS; border-bottom: 5px solid #8B008B; padding-bottom:10px;">✈️ Flight Delay Analysis</h1>',
+        unsafe_allow_html=True,
+    )
+    status = st.empty()
+
+    st.markdown("### Average Delay Across Different Hours", unsafe_allow_html=True)
+    hour_slot = st.empty()
+    st.write(
+        "This graph illustrates how the average flight delay varies at different hours of the day."
+    )
+
+    st.markdown("### Wind Speed vs Delay", unsafe_allow_html=True)
+    wind_slot = st.empty()
+    st.write("🌬️ This graph shows how wind speed impacts arrival delays.")
+
+    st.markdown("### Temperature vs Delay", unsafe_allow_html=True)
+    temp_slot = st.empty()
+    st.write("🌡️ This graph visualizes the effect of temperature on flight delays.")
+
+    st.markdown("### Rain vs Delay", unsafe_allow_html=True)
+    precip_slot = st.empty()
+    st.write(
+        "☔ This graph examines the relationship between rainfall and arrival delays."
+    )
+
+    def draw_cells(cells, note=None):
+        if cells.empty:
+            status.warning("No delay data available.")
+            return
+        # sampled cells carry a marker column; the exact ones replace them
+        if "sampled" in cells.columns:
+            note = SAMPLE_NOTE
+        if note:
+            status.caption(note)
+        else:
+            status.empty()
+
+        by_hour = summarise_delay(cells, "hour")
+        hour_slot.altair_chart(
+            delay_band_chart(by_hour, "hour:Q", "Hour of Day", "steelblue"),
+            use_container_width=True,
+        )
+
+        by_wind = summarise_delay(cells, "wind_bin")
+        wind_slot.altair_chart(
+            delay_band_chart(by_wind, "wind_bin:Q", "Wind Speed (mph)", "blue"),
+            use_container_width=True,
+        )
+
+        by_temp = summarise_delay(cells, "temp_bin")
+        temp_slot.altair_chart(
+            delay_band_chart(by_temp, "temp_bin:Q", "Temperature (°F)", "red"),
+            use_container_width=True,
+        )
+
+        by_precip = summarise_delay(cells, "precip_bucket")
+        by_precip["precip"] = by_precip["precip_bucket"].map(
+            dict(enumerate(PRECIP_BUCKETS))
+        )
+        precip_slot.altair_chart(
+            delay_band_chart(
+                by_precip, "precip:O", "Precipitation (inches)", "green", PRECIP_BUCKETS
+            ),
+            use_container_width=True,
+        )
+
+    # in approximate mode the sampled cells are drawn while the exact ones load
+    if st.session_state.get("approximate", False):
+        refresh_if_writable(ensure_flight_sample, backend.db_path)
+        preview = lambda: get_delay_cells(backend, sample=True).assign(sampled=True)
+        render_panels(
+            PAGE,
+            backend,
+            [
+                frame_panel(
+                    "cells", status, lambda: get_delay_cells(backend), draw_cells, preview
+                )
+            ],
+        )
+        return
+
+    # otherwise the charts fill in as the rows stream past, and the finished
+    # cells are cached like any other panel's
+    cache = figure_cache.get_figure_cache()
+    key = figure_cache.cache_key(PAGE, "cells")
+    spec = cache.get(key)
+    if spec is not None:
+        draw_cells(figure_cache.read_frame(spec))
+        return
+    try:
+        for cells, rows_read, done in stream_delay_cells(backend):
+            draw_cells(cells, None if done else f"Streaming… {rows_read:,} flights read")
+    except Exception as e:
+        status.error(f"Failed to load delay analysis data: {e}")
+        return
+    cache.put(key, figure_cache.frame_spec(lambda: cells))
@@ -0,0 +1,267 @@
+import sqlite3
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from derived_state import get_watermark, max_flight_rowid, needs_refresh, set_watermark
+from query_backend import data_version
+
+DB_PATH = "flights_database.db"
+METRICS = ["dep_delay", "arr_delay"]
+
+# Every sketch uses the same bin edges, so merging sketches is adding counts.
+# Delays are whole minutes: up to 30 minutes either side every minute gets its
+# own bin (which keeps the on-time / 1-15 / >15 breakdown exact), beyond that
+# the bins grow geometrically out to 4000 minutes.
+_POSITIVE_EDGES = np.unique(
+    np.concatenate([np.arange(0.5, 30.5, 1.0), np.geomspace(30.5, 4000.5, 120)])
+)
+BIN_EDGES = np.concatenate([-_POSITIVE_EDGES[::-1], _POSITIVE_EDGES])
+N_BINS = len(BIN_EDGES) - 1
+
+
+def bin_index(values):
+    clipped = np.clip(values, BIN_EDGES[0], BIN_EDGES[-1])
+    return np.clip(np.searchsorted(BIN_EDGES, clipped, side="right") - 1, 0, N_BINS - 1)
+
+
+class DelaySketch:
+    """Fixed log-bin histogram of one delay column plus its exact moments."""
+
+    def __init__(self, counts=None, n=0, total=0.0, total_sq=0.0, low=None, high=None):
+        self.counts = np.zeros(N_BINS, dtype=np.int64) if counts is None else counts
+        self.n = n
+        self.total = total
+        self.total_sq = total_sq
+        self.min = low
+        self.max = high
+
+    def __add__(self, other):
+        lows = [v for v in (self.min, other.min) if v is not None]
+        highs = [v for v in (self.max, other.max) if v is not None]
+        return DelaySketch(
+            self.counts + other.counts,
+            self.n + other.n,
+            self.total + other.total,
+            self.total_sq + other.total_sq,
+            min(lows) if lows else None,
+            max(highs) if highs else None,
+        )
+
+    @property
+    def mean(self):
+        return self.total / self.n if self.n else float("nan")
+
+    @property
+    def std(self):
+        # sample standard deviation, like pandas
+        if self.n < 2:
+            return float("nan")
+        variance = (self.total_sq - self.n * self.mean**2) / (self.n - 1)
+        return float(np.sqrt(max(variance, 0.0)))
+
+    def quantile(self, q):
+        # interpolates inside the bin that holds the q-th value; one-minute bins
+        # hold a single whole-minute value, so they answer with their centre
+        q = np.asarray(q, dtype=float)
+        if self.n == 0:
+            return np.full(q.shape, np.nan)
+        cumulative = np.cumsum(self.counts)
+        target = np.clip(q * self.n, 0, self.n)
+        idx = np.minimum(np.searchsorted(cumulative, target, side="left"), N_BINS - 1)
+        idx = np.maximum(idx, np.argmax(self.counts > 0))
+        before = np.where(idx > 0, cumulative[idx - 1], 0)
+        fraction = (target - before) / np.maximum(self.counts[idx], 1)
+        low, high = BIN_EDGES[idx], BIN_EDGES[idx + 1]
+        value = np.where(
+            high - low <= 1, (low + high) / 2, low + fraction * (high - low)
+        )
+        return np.clip(value, self.min, self.max)
+
+    def count_between(self, low, high):
+        # number of values in (low, high]; exact when both are whole minutes within 30
+        centres = (BIN_EDGES[:-1] + BIN_EDGES[1:]) / 2
+        return int(self.counts[(centres > low) & (centres <= high)].sum())
+
+    def box_stats(self, label):
+        # the dict matplotlib's Axes.bxp draws a box from
+        q1, median, q3 = self.quantile([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        return {
+            "label": label,
+            "med": median,
+            "q1": q1,
+            "q3": q3,
+            "whislo": max(self.min, q1 - 1.5 * iqr),
+            "whishi": min(self.max, q3 + 1.5 * iqr),
+            "mean": self.mean,
+            "fliers": [],
+        }
+
+
+# Only flights with both delays are sketched, as the Overview's raw-row delay
+# statistics drop any flight missing either one; so both metrics count the
+# same flights.
+SKETCH_ROWS = """
+    SELECT origin, month, dep_delay, arr_delay
+    FROM flights
+    WHERE rowid > ? AND rowid <= ?
+      AND dep_delay IS NOT NULL AND arr_delay IS NOT NULL
+"""
+
+UPSERT_BINS = """
+    INSERT INTO delay_sketch_bins VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(origin, month, metric, bin) DO UPDATE SET
+        count = count + excluded.count
+"""
+
+UPSERT_SUMMARY = """
+    INSERT INTO delay_sketch_summary VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(origin, month, metric) DO UPDATE SET
+        n = n + excluded.n,
+        total = total + excluded.total,
+        total_sq = total_sq + excluded.total_sq,
+        min_value = MIN(min_value, excluded.min_value),
+        max_value = MAX(max_value, excluded.max_value)
+"""
+
+_lock = threading.Lock()
+_current = set()
+
+
+def create_sketch_tables(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS delay_sketch_bins (
+            origin TEXT, month INTEGER, metric TEXT, bin INTEGER, count INTEGER,
+            PRIMARY KEY (origin, month, metric, bin)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS delay_sketch_summary (
+            origin TEXT, month INTEGER, metric TEXT, n INTEGER,
+            total REAL, total_sq REAL, min_value REAL, max_value REAL,
+            PRIMARY KEY (origin, month, metric)
+        )
+        """
+    )
+
+
+def _fold_in(conn, chunk):
+    # one chunk of new flights added to the sketch per (origin, month, metric)
+    for metric in METRICS:
+        rows = chunk.assign(bin=bin_index(chunk[metric].to_numpy()))
+        counts = rows.groupby(["origin", "month", "bin"]).size()
+        conn.executemany(
+            UPSERT_BINS,
+            [
+                (origin, int(month), metric, int(bin_), int(n))
+                for (origin, month, bin_), n in counts.items()
+            ],
+        )
+        stats = rows.groupby(["origin", "month"])[metric].agg(["count", "sum", "min", "max"])
+        stats["sum_sq"] = (rows[metric] ** 2).groupby([rows["origin"], rows["month"]]).sum()
+        conn.executemany(
+            UPSERT_SUMMARY,
+            [
+                (origin, int(month), metric, int(row["count"]), float(row["sum"]),
+                 float(row["sum_sq"]), float(row["min"]), float(row["max"]))
+                for (origin, month), row in stats.iterrows()
+            ],
+        )
+
+
+def refresh_delay_sketches(db_path=DB_PATH, rebuild=False, chunksize=200_000):
+    # folds every flight added since the last refresh into the sketches;
+    # rebuild=True starts over (after edits or deletes)
+    conn = sqlite3.connect(db_path, timeout=30.0)
+    with conn:
+        # taken before reading the watermark, so two processes can't both add
+        # the same flights
+        conn.execute("BEGIN IMMEDIATE")
+        create_sketch_tables(conn)
+        start = 0 if rebuild else get_watermark(conn, "delay_sketches")
+        if start == 0:
+            # nothing folded in yet, whatever the tables hold (sketches from
+            # before the watermark was kept counted other rows)
+            conn.execute("DELETE FROM delay_sketch_bins")
+            conn.execute("DELETE FROM delay_sketch_summary")
+        end = max_flight_rowid(conn)
+        if end > start:
+            chunks = pd.read_sql_query(
+                SKETCH_ROWS, conn, params=(start, end), chunksize=chunksize
+            )
+            for chunk in chunks:
+                _fold_in(conn, chunk)
+        set_watermark(conn, "delay_sketches", end)
+    conn.close()
+    return end - start if end > start else 0
+
+
+def build_delay_sketches(db_path=DB_PATH, chunksize=200_000):
+    # one pass over flights, one sketch per (origin, month, metric)
+    return refresh_delay_sketches(db_path, rebuild=True, chunksize=chunksize)
+
+
+def ensure_delay_sketches(db_path=DB_PATH):
+    """Folds new flights into the sketches before they are read, once they
+    have been built; a version check when nothing has changed since the last
+    call."""
+    if (db_path, data_version(db_path)) in _current:
+        return
+    with _lock:
+        if (db_path, data_version(db_path)) in _current:
+            return
+        if needs_refresh(db_path, "delay_sketches", "delay_sketch_summary"):
+            refresh_delay_sketches(db_path)
+        _current.add((db_path, data_version(db_path)))
+
+
+class DelaySketchStore:
+    """All stored sketches, merged on demand for any airports and months."""
+
+    def __init__(self, bins, summary):
+        self.bins = bins
+        self.summary = summary
+
+    @classmethod
+    def load(cls, backend):
+        return cls(
+            backend.query("delay_sketch_bins"), backend.query("delay_sketch_summary")
+        )
+
+    def sketch(self, metric, airports=None, months=(1, 12)):
+        def select(frame):
+            mask = (frame["metric"] == metric) & frame["month"].between(*months)
+            if airports is not None:
+                mask &= frame["origin"].isin(airports)
+            return frame[mask]
+
+        bins = select(self.bins)
+        summary = select(self.summary)
+        if summary.empty:
+            return DelaySketch()
+        counts = np.bincount(
+            bins["bin"].to_numpy(), weights=bins["count"].to_numpy(), minlength=N_BINS
+        ).astype(np.int64)
+        return DelaySketch(
+            counts,
+            int(summary["n"].sum()),
+            float(summary["total"].sum()),
+            float(summary["total_sq"].sum()),
+            float(summary["min_value"].min()),
+            float(summary["max_value"].max()),
+        )
+
+    def airports(self):
+        return sorted(self.summary["origin"].unique())
+
+
+if __name__ == "__main__":
+    rebuild = "--rebuild" in sys.argv
+    added = refresh_delay_sketches(rebuild=rebuild)
+    print(f"Folded {added} new flight rows into delay_sketch_bins and delay_sketch_summary")
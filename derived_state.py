@@ -0,0 +1,76 @@
+import sqlite3
+
+# Watermarks for tables that are derived from flights and refreshed
+# incrementally: each records the highest flights rowid already folded in.
+
+
+def ensure_state_table(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS derived_state (
+            name TEXT PRIMARY KEY,
+            last_rowid INTEGER NOT NULL
+        )
+        """
+    )
+
+
+def get_watermark(conn, name):
+    ensure_state_table(conn)
+    row = conn.execute(
+        "SELECT last_rowid FROM derived_state WHERE name = ?", (name,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def set_watermark(conn, name, last_rowid):
+    ensure_state_table(conn)
+    conn.execute(
+        """
+        INSERT INTO derived_state (name, last_rowid) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET last_rowid = excluded.last_rowid
+        """,
+        (name, last_rowid),
+    )
+
+
+def max_flight_rowid(conn):
+    return conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM flights").fetchone()[0]
+
+
+def needs_refresh(db_path, name, table):
+    # True once table has been built and flights has rows past its watermark;
+    # read-only, so checking neither creates derived_state nor waits on a writer
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        built = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (table,),
+        ).fetchone()[0]
+        if not built:
+            return False
+        try:
+            row = conn.execute(
+                "SELECT last_rowid FROM derived_state WHERE name = ?", (name,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        return (row[0] if row else 0) != max_flight_rowid(conn)
+    finally:
+        conn.close()
+
+
+def _read_only(error):
+    # a write refused because the database file or its directory is read-only
+    message = str(error)
+    return "readonly database" in message or "unable to open database" in message
+
+
+def refresh_if_writable(ensure, db_path):
+    # runs one of the ensure_* helpers before its table is read; where the
+    # database can't be written to, the table is read as it stands
+    try:
+        ensure(db_path)
+    except sqlite3.OperationalError as e:
+        if not _read_only(e):
+            raise
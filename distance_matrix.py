@@ -0,0 +1,160 @@
+import json
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from airport_index import AIRPORTS_CSV, EARTH_RADIUS_KM
+
+MATRIX_DIR = "airport_matrices"
+EARTH_RADIUS_MILES = 3959
+
+
+def _great_circle(lat1, lon1, lat2, lon2):
+    # haversine distance (km) and initial bearing (degrees from north), from
+    # every point in the first pair of arrays to every point in the second
+    lat1, lon1 = np.radians(lat1)[:, None], np.radians(lon1)[:, None]
+    lat2, lon2 = np.radians(lat2)[None, :], np.radians(lon2)[None, :]
+    dlon = lon2 - lon1
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    x = np.sin(dlon) * np.cos(lat2)
+    y = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon)
+    bearing = (np.degrees(np.arctan2(x, y)) + 360) % 360
+    return distance, bearing
+
+
+def build_distance_matrices(csv_path=AIRPORTS_CSV, directory=MATRIX_DIR, block=512):
+    """Writes airport x airport distance (km) and bearing (degrees) matrices as
+    float32 .npy files, plus the FAA code -> row/column index map."""
+    airports = pd.read_csv(csv_path)
+    lat = airports["lat"].to_numpy(dtype=float)
+    lon = airports["lon"].to_numpy(dtype=float)
+    n = len(airports)
+
+    # written to a fresh directory beside the old one, then renamed into
+    # place: a process with the old files memory-mapped keeps reading them,
+    # never a file that is being rewritten under it
+    parent = os.path.dirname(os.path.abspath(directory))
+    staging = tempfile.mkdtemp(prefix=f".{os.path.basename(directory)}-", dir=parent)
+    try:
+        distance = np.lib.format.open_memmap(
+            os.path.join(staging, "distance_km.npy"), mode="w+", dtype=np.float32, shape=(n, n)
+        )
+        bearing = np.lib.format.open_memmap(
+            os.path.join(staging, "bearing_deg.npy"), mode="w+", dtype=np.float32, shape=(n, n)
+        )
+        # a block of rows at a time, so memory stays at block x n float64s
+        for start in range(0, n, block):
+            stop = min(start + block, n)
+            distance[start:stop], bearing[start:stop] = _great_circle(
+                lat[start:stop], lon[start:stop], lat, lon
+            )
+        distance.flush()
+        bearing.flush()
+        del distance, bearing
+
+        with open(os.path.join(staging, "faa_index.json"), "w") as f:
+            json.dump({faa: i for i, faa in enumerate(airports["faa"])}, f)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    _publish(staging, directory)
+
+
+def _publish(staging, directory):
+    # as flight_cube does: the old directory is moved aside, since a
+    # directory can't be renamed over a non-empty one (see _open_current)
+    retired = staging + ".old"
+    try:
+        os.replace(directory, retired)
+    except FileNotFoundError:
+        retired = None
+    try:
+        os.replace(staging, directory)
+    except OSError:
+        # another process put its matrices in place first; they are as recent
+        shutil.rmtree(staging, ignore_errors=True)
+    if retired is not None:
+        shutil.rmtree(retired, ignore_errors=True)
+
+
+class AirportMatrices:
+    """Memory-mapped distance and bearing matrices; lookups are array indexing."""
+
+    def __init__(self, directory=MATRIX_DIR):
+        self.distance_km = np.load(os.path.join(directory, "distance_km.npy"), mmap_mode="r")
+        self.bearing_deg = np.load(os.path.join(directory, "bearing_deg.npy"), mmap_mode="r")
+        with open(os.path.join(directory, "faa_index.json")) as f:
+            self.index = json.load(f)
+        self._codes = pd.Index(list(self.index))
+
+    def positions(self, codes):
+        # -1 for codes that are not in the matrices
+        return self._codes.get_indexer(pd.Index(codes))
+
+    def _lookup(self, matrix, origins, dests):
+        rows, cols = self.positions(origins), self.positions(dests)
+        missing = (rows < 0) | (cols < 0)
+        values = matrix[np.where(missing, 0, rows), np.where(missing, 0, cols)].astype(float)
+        values[missing] = np.nan
+        return values
+
+    def distance(self, origin, dest, unit="km"):
+        value = float(self.distance_km[self.index[origin], self.index[dest]])
+        return value * EARTH_RADIUS_MILES / EARTH_RADIUS_KM if unit == "miles" else value
+
+    def bearing(self, origin, dest):
+        return float(self.bearing_deg[self.index[origin], self.index[dest]])
+
+    def distances(self, origins, dests, unit="km"):
+        """Distances for matching arrays of origin and destination codes; NaN
+        where a code is unknown."""
+        values = self._lookup(self.distance_km, origins, dests)
+        return values * EARTH_RADIUS_MILES / EARTH_RADIUS_KM if unit == "miles" else values
+
+    def bearings(self, origins, dests):
+        return self._lookup(self.bearing_deg, origins, dests)
+
+
+def _is_current(csv_path, directory):
+    built = os.path.join(directory, "faa_index.json")
+    return os.path.exists(built) and os.path.getmtime(built) >= os.path.getmtime(csv_path)
+
+
+def _open_current(csv_path, directory):
+    # (re)builds the files first when airports.csv is newer than them; if a
+    # rebuild is swapped in while they are being opened, faa_index.json changes
+    # or goes missing and they are opened again, so all three come from one build
+    index_path = os.path.join(directory, "faa_index.json")
+    while True:
+        if not _is_current(csv_path, directory):
+            build_distance_matrices(csv_path, directory)
+        try:
+            before = os.stat(index_path)
+            matrices = AirportMatrices(directory)
+            after = os.stat(index_path)
+        except FileNotFoundError:
+            continue
+        if (before.st_ino, before.st_mtime_ns) == (after.st_ino, after.st_mtime_ns):
+            return matrices
+
+
+@lru_cache(maxsize=4)
+def _load_matrices(csv_path, directory, csv_mtime_ns):
+    return _open_current(csv_path, directory)
+
+
+def load_matrices(csv_path=AIRPORTS_CSV, directory=MATRIX_DIR):
+    # cached per modification time of airports.csv, so a long-running process
+    # picks up an edited CSV on its next call
+    return _load_matrices(csv_path, directory, os.stat(csv_path).st_mtime_ns)
+
+
+if __name__ == "__main__":
+    build_distance_matrices()
+    matrices = AirportMatrices()
+    print(f"Stored {len(matrices.index)} x {len(matrices.index)} matrices in {MATRIX_DIR}/")
@@ -0,0 +1,112 @@
+import json
+import threading
+from collections import OrderedDict
+from io import StringIO
+
+import pandas as pd
+import streamlit as st
+
+import flights_analysis
+from query_backend import data_version
+
+
+class FigureCache:
+    """LRU cache of serialized figure specs, capped by their total size in bytes."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            spec = self._entries.get(key)
+            if spec is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return spec
+
+    def put(self, key, spec):
+        nbytes = len(spec.encode("utf-8"))
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old.encode("utf-8"))
+            self._entries[key] = spec
+            self.size += nbytes
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.encode("utf-8"))
+
+    def get_or_build(self, key, build):
+        spec = self.get(key)
+        if spec is None:
+            spec = build()
+            self.put(key, spec)
+        return spec
+
+    def __len__(self):
+        return len(self._entries)
+
+
+@st.cache_resource
+def get_figure_cache():
+    # one cache per server process, shared by every session
+    return FigureCache()
+
+
+def cache_key(page, name, params=()):
+    # the database flights_analysis is configured with, which the dashboard's
+    # backend reads, so a write to that file (not the default one) invalidates
+    path = flights_analysis.db_path()
+    return (page, name, tuple(params), path, data_version(path))
+
+
+# serializers, split from the drawing so a spec can be built off the script thread
+def plotly_spec(build_figure):
+    return build_figure().to_json()
+
+
+def show_plotly(spec, **kwargs):
+    import plotly.io as pio
+
+    st.plotly_chart(pio.from_json(spec), **kwargs)
+
+
+def frame_spec(load_frame):
+    return load_frame().to_json(orient="split")
+
+
+def read_frame(spec):
+    return pd.read_json(StringIO(spec), orient="split", convert_dates=False)
+
+
+def plotly_chart(page, name, params, build_figure, **kwargs):
+    # build_figure runs the query and returns a plotly figure; on a hit neither happens
+    spec = get_figure_cache().get_or_build(
+        cache_key(page, name, params), lambda: plotly_spec(build_figure)
+    )
+    show_plotly(spec, **kwargs)
+
+
+def altair_chart(page, name, params, build_chart, **kwargs):
+    # Vega-Lite specs go straight to the frontend, no Altair objects on a hit
+    spec = get_figure_cache().get_or_build(
+        cache_key(page, name, params), lambda: build_chart().to_json()
+    )
+    st.vega_lite_chart(json.loads(spec), **kwargs)
+
+
+def cached_frame(page, name, params, load_frame):
+    # small result frames that sit next to the figures (metrics, tables)
+    spec = get_figure_cache().get_or_build(
+        cache_key(page, name, params), lambda: frame_spec(load_frame)
+    )
+    return read_frame(spec)
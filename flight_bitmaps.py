@@ -0,0 +1,203 @@
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from query_backend import data_version, get_backend
+
+DIMENSIONS = ("carrier", "origin", "dest", "month", "hour", "delay_bucket")
+MEASURES = ("dep_delay", "arr_delay")
+# arrival delay in minutes; a flight with no arr_delay never arrived
+DELAY_BUCKETS = ("On time", "1-15 min", "15-60 min", "60+ min", "Did not arrive")
+DELAY_EDGES = (0, 15, 60)
+
+# One bitmap per value of each flight dimension, with a bit per flight (in
+# rowid order), packed eight flights to a byte. A filter is an OR of a
+# dimension's bitmaps for the values picked and an AND across dimensions, so
+# any combination of clicks is a few bytewise operations over n / 8 bytes;
+# the aggregates then run on the selected rows only.
+
+
+def delay_buckets(arr_delay):
+    arr_delay = np.asarray(arr_delay, dtype=float)
+    buckets = np.searchsorted(DELAY_EDGES, arr_delay, side="left")
+    return np.where(np.isnan(arr_delay), len(DELAY_BUCKETS) - 1, buckets)
+
+
+class FlightBitmaps:
+    """Per-value bitmaps over the flight dimensions, plus the measures."""
+
+    def __init__(self, frame):
+        self.n = len(frame)
+        self.labels = {}
+        self.codes = {}
+        self.bitmaps = {}
+        for dim in DIMENSIONS:
+            if dim == "delay_bucket":
+                # the buckets keep their own order, empty ones included
+                codes = delay_buckets(frame["arr_delay"])
+                labels = pd.Index(DELAY_BUCKETS)
+            else:
+                codes, labels = pd.factorize(frame[dim], sort=True)
+            self.labels[dim] = pd.Index(labels)
+            # shifted by one so a missing value (-1) counts in bin 0
+            self.codes[dim] = (codes + 1).astype(np.int16)
+            rows = codes[None, :] == np.arange(len(labels))[:, None]
+            self.bitmaps[dim] = np.packbits(rows, axis=1)
+        self.measures = {}
+        self._known = {}
+        for measure in MEASURES:
+            values = frame[measure].to_numpy(dtype=np.float64, na_value=np.nan)
+            self.measures[measure] = values
+            # as bincount weights: NaN sums as 0 and isn't counted
+            self._known[measure] = (np.nan_to_num(values), (~np.isnan(values)).astype(np.float64))
+        self._all = np.packbits(np.ones(self.n, dtype=bool))
+
+    @property
+    def nbytes(self):
+        return sum(bitmap.nbytes for bitmap in self.bitmaps.values())
+
+    def values(self, dim):
+        return list(self.labels[dim])
+
+    def bitmap(self, dim, values):
+        # OR of the bitmaps for the given values of one dimension
+        positions = self.labels[dim].get_indexer(pd.Index(list(values)))
+        positions = positions[positions >= 0]
+        if not len(positions):
+            return np.zeros_like(self._all)
+        return np.bitwise_or.reduce(self.bitmaps[dim][positions], axis=0)
+
+    def select(self, filters):
+        """Packed bitmap of the flights matching every dimension in filters
+        ({dim: values}); a dimension with no values picked doesn't filter."""
+        selected = self._all.copy()
+        for dim, values in filters.items():
+            if values:
+                selected &= self.bitmap(dim, values)
+        return selected
+
+    def mask(self, filters):
+        return np.unpackbits(self.select(filters), count=self.n).view(bool)
+
+    def count(self, filters):
+        return int(self.mask(filters).sum())
+
+    def rows(self, filters):
+        # positions of the selected flights; None when nothing filters
+        if not any(filters.values()):
+            return None
+        return np.flatnonzero(self.mask(filters))
+
+    def aggregate(self, dim, filters=None, measure="arr_delay"):
+        """Flights and mean measure per value of dim, over the selected rows."""
+        return self._aggregate(dim, self.rows(filters or {}), measure)
+
+    def _aggregate(self, dim, rows, measure):
+        codes = self.codes[dim]
+        filled, known = self._known[measure]
+        if rows is not None:
+            codes, filled, known = codes[rows], filled[rows], known[rows]
+        size = len(self.labels[dim]) + 1
+        flights = np.bincount(codes, minlength=size)[1:]
+        n = np.bincount(codes, weights=known, minlength=size)[1:]
+        total = np.bincount(codes, weights=filled, minlength=size)[1:]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / n
+        return pd.DataFrame(
+            {dim: self.labels[dim], "flights": flights, f"mean_{measure}": mean}
+        )
+
+    def summary(self, filters=None):
+        mask = self.mask(filters or {})
+        row = {"flights": int(mask.sum())}
+        for measure in MEASURES:
+            row[f"mean_{measure}"] = float(np.nanmean(self.measures[measure][mask])) if mask.any() else np.nan
+        return row
+
+    def crossfilter(self, selections, dims=DIMENSIONS, measure="arr_delay"):
+        """Each dimension's aggregate under every other dimension's selection,
+        so a chart's own clicks highlight its bars rather than removing them."""
+        selections = {dim: values for dim, values in selections.items() if values}
+        # the charts that aren't filtered themselves all share one selection
+        shared = {}
+        results = {}
+        for dim in dims:
+            others = {other: values for other, values in selections.items() if other != dim}
+            key = frozenset(others)
+            if key not in shared:
+                shared[key] = self.rows(others)
+            results[dim] = self._aggregate(dim, shared[key], measure)
+        return results
+
+
+def load_frame(backend):
+    return backend.query("crossfilter_rows")
+
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def load_flight_bitmaps(backend):
+    # built once per backend and data version; a few tenths of a second
+    key = (backend.name, backend.db_path, data_version(backend.db_path))
+    with _lock:
+        bitmaps = _loaded.get(key)
+        if bitmaps is None:
+            bitmaps = FlightBitmaps(load_frame(backend))
+            _loaded.clear()
+            _loaded[key] = bitmaps
+    return bitmaps
+
+
+if __name__ == "__main__":
+    # python flight_bitmaps.py [copies]: tile the flights that many times to
+    # time a bigger table
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    frame = load_frame(get_backend())
+    frame = pd.concat([frame] * copies, ignore_index=True)
+    start = time.perf_counter()
+    bitmaps = FlightBitmaps(frame)
+    print(
+        f"Indexed {bitmaps.n:,} flights in {time.perf_counter() - start:.2f}s: "
+        f"{sum(len(labels) for labels in bitmaps.labels.values())} bitmaps, "
+        f"{bitmaps.nbytes / 1e6:.1f} MB"
+    )
+
+    # random clicks: up to two values in each of up to three dimensions
+    rng = np.random.default_rng(0)
+    frame["delay_bucket"] = np.asarray(DELAY_BUCKETS)[delay_buckets(frame["arr_delay"])]
+    timings = []
+    mismatches = 0
+    for _ in range(200):
+        dims = rng.choice(DIMENSIONS, size=rng.integers(1, 4), replace=False)
+        selections = {
+            dim: list(rng.choice(bitmaps.values(dim), size=min(2, len(bitmaps.values(dim))), replace=False))
+            for dim in dims
+        }
+        start = time.perf_counter()
+        result = bitmaps.crossfilter(selections)
+        timings.append(time.perf_counter() - start)
+
+        # the same counts from pandas for one of the charts
+        dim = rng.choice(DIMENSIONS)
+        keep = np.ones(len(frame), dtype=bool)
+        for other, values in selections.items():
+            if other != dim:
+                keep &= frame[other].isin(values).to_numpy()
+        expected = frame[keep].groupby(dim).size()
+        actual = result[dim].set_index(dim)["flights"]
+        actual = actual[actual > 0]
+        if not expected.sort_index().astype(int).equals(actual.sort_index().astype(int)):
+            mismatches += 1
+
+    timings = np.array(timings) * 1000
+    print(
+        f"Cross-filtering all {len(DIMENSIONS)} charts: median {np.median(timings):.1f} ms, "
+        f"p95 {np.percentile(timings, 95):.1f} ms, max {timings.max():.1f} ms"
+    )
+    print(f"Counts checked against pandas for 200 selections: {mismatches} mismatches")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,401 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from query_backend import data_version, get_backend
+
+CUBE_DIR = "flight_cube"
+DIMENSIONS = ("origin", "dest", "carrier", "month", "hour")
+MONTHS = np.arange(1, 13)
+HOURS = np.arange(24)
+SUMS = (
+    "flights",
+    "dep_delay_n",
+    "dep_delay_sum",
+    "dep_delay_sumsq",
+    "arr_delay_n",
+    "arr_delay_sum",
+    "arr_delay_sumsq",
+)
+# with the earliest and latest departure time, for the Route page
+EXTREMES = {"dep_time_min": np.fmin, "dep_time_max": np.fmax}
+COMBO_DIMS = ("origin", "dest", "carrier")
+
+# Flight counts and delay sums by origin x dest x carrier x month x scheduled
+# hour. Only a few hundred (origin, dest, carrier) combinations are ever
+# flown, so those are one axis listing the combinations that exist, with month
+# and hour dense below it: sums is [combination, month, hour, measure]. An
+# aggregate is a mask over the combinations, an index into the months and
+# hours, and a sum (or min/max) over what is left; totals over month and hour
+# are kept per combination, so the common queries only touch those. The
+# flights table holds a single year, so month needs no year alongside it.
+
+
+class FlightCube:
+    def __init__(self, combos, labels, sums, extremes):
+        # combos[i] = (origin, dest, carrier) codes into labels of combination i
+        self.combos = combos
+        self.labels = {
+            dim: pd.Index(_label_list(values), dtype=object) for dim, values in labels.items()
+        }
+        self.sums = sums
+        self.extremes = extremes
+        self.combo_sums = sums.sum(axis=(1, 2))
+        self.combo_extremes = {
+            name: EXTREMES[name].reduce(array, axis=(1, 2), initial=np.nan)
+            for name, array in extremes.items()
+        }
+        # one integer per combination for any subset of its three codes
+        self._radix = np.array([len(self.labels[dim]) for dim in COMBO_DIMS], dtype=np.int64)
+
+    @classmethod
+    def from_cells(cls, cells):
+        """From one row per (origin, dest, carrier, month, hour) with the
+        measures as columns (the "cube_cells" query)."""
+        codes = {}
+        labels = {}
+        for dim in COMBO_DIMS:
+            # a NULL carrier is a label of its own, so totals still count it
+            codes[dim], labels[dim] = pd.factorize(cells[dim], sort=True, use_na_sentinel=False)
+        stacked = np.stack([codes[dim] for dim in COMBO_DIMS], axis=1)
+        combos, combo_rows = np.unique(stacked, axis=0, return_inverse=True)
+        cell = (
+            combo_rows.ravel(),
+            cells["month"].to_numpy(dtype=int) - 1,
+            cells["hour"].to_numpy(dtype=int),
+        )
+        shape = (len(combos), len(MONTHS), len(HOURS))
+
+        sums = np.zeros(shape + (len(SUMS),))
+        sums[cell] = cells[list(SUMS)].to_numpy(dtype=float)
+        extremes = {}
+        for name in EXTREMES:
+            extremes[name] = np.full(shape, np.nan)
+            extremes[name][cell] = cells[name].to_numpy(dtype=float, na_value=np.nan)
+        labels = {dim: list(labels[dim]) for dim in COMBO_DIMS}
+        return cls(combos.astype(np.int32), labels, sums, extremes)
+
+    def save(self, directory=CUBE_DIR, version=None):
+        # written to a fresh directory beside the old one, then renamed into
+        # place, so no loader ever sees half of one cube and half of another
+        parent = os.path.dirname(os.path.abspath(directory))
+        staging = tempfile.mkdtemp(prefix=f".{os.path.basename(directory)}-", dir=parent)
+        try:
+            np.save(os.path.join(staging, "combos.npy"), self.combos)
+            np.save(os.path.join(staging, "sums.npy"), self.sums)
+            for name, array in self.extremes.items():
+                np.save(os.path.join(staging, f"{name}.npy"), array)
+            with open(os.path.join(staging, "labels.json"), "w") as f:
+                json.dump(
+                    {
+                        # NULL as null, so a reloaded cube has the same labels
+                        "labels": {dim: _label_list(index) for dim, index in self.labels.items()},
+                        "source_version": version,
+                    },
+                    f,
+                )
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        _publish(staging, directory)
+
+    @classmethod
+    def load(cls, directory=CUBE_DIR):
+        with open(os.path.join(directory, "labels.json")) as f:
+            labels = json.load(f)["labels"]
+        return cls(
+            np.load(os.path.join(directory, "combos.npy")),
+            labels,
+            np.load(os.path.join(directory, "sums.npy")),
+            {name: np.load(os.path.join(directory, f"{name}.npy")) for name in EXTREMES},
+        )
+
+    @property
+    def nbytes(self):
+        return self.combos.nbytes + self.sums.nbytes + sum(a.nbytes for a in self.extremes.values())
+
+    def _combo_rows(self, filters):
+        # the combinations matching the origin / dest / carrier filters; a
+        # slice when nothing filters them, so no copy is made
+        if all(filters.get(dim) is None for dim in COMBO_DIMS):
+            return slice(None)
+        mask = np.ones(len(self.combos), dtype=bool)
+        for axis, dim in enumerate(COMBO_DIMS):
+            if filters.get(dim) is not None:
+                codes = self.labels[dim].get_indexer(pd.Index(_as_list(filters[dim])))
+                mask &= np.isin(self.combos[:, axis], codes[codes >= 0])
+        return np.flatnonzero(mask)
+
+    def aggregate(self, by=(), **filters):
+        """Measures summed over everything but the by dimensions, for the
+        cells matching filters (dimension=value or dimension=[values]).
+        Returns one row per by group that has flights, with mean and standard
+        deviation columns for both delays."""
+        by = tuple(by)
+        unknown = (set(by) | set(filters)) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"unknown cube dimensions: {', '.join(sorted(unknown))}")
+        rows = self._combo_rows(filters)
+        months = _positions(MONTHS, filters.get("month"))
+        hours = _positions(HOURS, filters.get("hour"))
+        time_dims = [dim for dim in ("month", "hour") if dim in by]
+
+        if not time_dims and filters.get("month") is None and filters.get("hour") is None:
+            # every month and hour: the per-combination totals
+            sums = self.combo_sums[rows]
+            extremes = {name: array[rows] for name, array in self.combo_extremes.items()}
+        else:
+            sums = _take(self.sums, rows, months, hours)
+            extremes = {
+                name: _take(array, rows, months, hours) for name, array in self.extremes.items()
+            }
+            time_axes = tuple(axis for axis, dim in ((1, "month"), (2, "hour")) if dim not in by)
+            if time_axes:
+                sums = sums.sum(axis=time_axes)
+                extremes = {
+                    name: EXTREMES[name].reduce(array, axis=time_axes, initial=np.nan)
+                    for name, array in extremes.items()
+                }
+
+        # group the combinations by the origin / dest / carrier in by
+        combos = self.combos[rows]
+        key_axes = [axis for axis, dim in enumerate(COMBO_DIMS) if dim in by]
+        key = np.zeros(len(combos), dtype=np.int64)
+        for axis in key_axes:
+            key = key * self._radix[axis] + combos[:, axis]
+        keys, groups = np.unique(key, return_inverse=True)
+        cell_shape = sums.shape[1:-1]
+        sums = _group_sum(sums, groups, len(keys))
+        # groups are runs of combinations once sorted, and usually already are
+        in_order = bool(np.all(groups[1:] >= groups[:-1]))
+        order = slice(None) if in_order else np.argsort(groups, kind="stable")
+        starts = np.flatnonzero(np.diff(groups[order], prepend=-1))
+        extremes = {
+            name: _group_reduce(EXTREMES[name], array[order], starts)
+            for name, array in extremes.items()
+        }
+
+        # one row per group and remaining month / hour
+        cells = int(np.prod(cell_shape))
+        columns = {}
+        for axis in reversed(key_axes):
+            codes = keys % self._radix[axis]
+            keys = keys // self._radix[axis]
+            labels = self.labels[COMBO_DIMS[axis]].to_numpy()
+            columns[COMBO_DIMS[axis]] = np.repeat(labels[codes], cells)
+        grid = np.indices(cell_shape).reshape(len(cell_shape), cells)
+        for position, dim in enumerate(time_dims):
+            values = MONTHS[months] if dim == "month" else HOURS[hours]
+            columns[dim] = np.tile(values[grid[position]], len(starts))
+        sums = sums.reshape(-1, len(SUMS))
+        for i, name in enumerate(SUMS):
+            columns[name] = sums[:, i]
+        for name, array in extremes.items():
+            columns[name] = array.reshape(-1)
+        keep = columns["flights"] > 0
+        columns = {name: values[keep] for name, values in columns.items()}
+        columns["flights"] = columns["flights"].astype(np.int64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for delay in ("dep_delay", "arr_delay"):
+                n, total, sumsq = (columns[f"{delay}_{part}"] for part in ("n", "sum", "sumsq"))
+                columns[f"mean_{delay}"] = np.where(n > 0, total / n, np.nan)
+                variance = np.where(n > 1, (sumsq - total * total / n) / (n - 1), np.nan)
+                columns[f"std_{delay}"] = np.sqrt(np.clip(variance, 0, None))
+        ordered = list(by) + [name for name in columns if name not in by]
+        return pd.DataFrame({name: columns[name] for name in ordered})
+
+    def total(self, measure="flights", **filters):
+        return self.aggregate((), **filters)[measure].sum()
+
+
+def _take(array, rows, months, hours):
+    # array[rows, months, hours] taken axis by axis. The combinations are
+    # sorted by origin, dest and carrier, so one origin or route is a run of
+    # them, as picked months and hours often are; a run is a slice, and
+    # slicing is a view rather than a copy
+    index = [_as_slice(picked) for picked in (rows, months, hours)]
+    if sum(not isinstance(picked, slice) for picked in index) > 1:
+        index = [np.arange(size)[picked] if isinstance(picked, slice) else picked
+                 for picked, size in zip(index, array.shape)]
+        return array[np.ix_(*index)]
+    return array[tuple(index)]
+
+
+def _as_slice(picked):
+    if isinstance(picked, slice) or not len(picked) or picked[-1] - picked[0] != len(picked) - 1:
+        return picked
+    return slice(picked[0], picked[-1] + 1)
+
+
+def _group_sum(values, groups, n_groups):
+    # values [combination, ..., measure] summed into [group, ..., measure], as
+    # a (group x combination) 0/1 matrix times the values
+    flat = values.reshape(len(values), int(np.prod(values.shape[1:])))
+    members = (groups == np.arange(n_groups)[:, None]).astype(flat.dtype)
+    return (members @ flat).reshape((n_groups,) + values.shape[1:])
+
+
+def _group_reduce(ufunc, values, starts):
+    # runs of rows beginning at starts, reduced with ufunc (np.fmin / np.fmax,
+    # for which NaN is the identity)
+    if len(starts) == 1:
+        return ufunc.reduce(values, axis=0, keepdims=True, initial=np.nan)
+    if not len(starts):
+        return values
+    return ufunc.reduceat(values, starts, axis=0)
+
+
+def _label_list(values):
+    return [None if pd.isna(value) else value for value in values]
+
+
+def _publish(staging, directory):
+    # a directory can't be renamed over a non-empty one, so the old cube is
+    # moved aside first; a loader reading in between finds labels.json
+    # missing or changed and doesn't use what it read (see _load_saved)
+    retired = staging + ".old"
+    try:
+        os.replace(directory, retired)
+    except FileNotFoundError:
+        retired = None
+    try:
+        os.replace(staging, directory)
+    except OSError:
+        # another process put its cube in place first; it is as recent
+        shutil.rmtree(staging, ignore_errors=True)
+    if retired is not None:
+        shutil.rmtree(retired, ignore_errors=True)
+
+
+def _as_list(value):
+    return list(value) if isinstance(value, (list, tuple, set, np.ndarray, pd.Index)) else [value]
+
+
+def _positions(axis_values, picked):
+    if picked is None:
+        return np.arange(len(axis_values))
+    return np.flatnonzero(np.isin(axis_values, _as_list(picked)))
+
+
+def build_flight_cube(backend, directory=CUBE_DIR):
+    version = data_version(backend.db_path)
+    cube = FlightCube.from_cells(backend.query("cube_cells"))
+    cube.save(directory, version)
+    return cube
+
+
+def _stored_version(directory):
+    try:
+        with open(os.path.join(directory, "labels.json")) as f:
+            version = json.load(f)["source_version"]
+    except (OSError, ValueError, KeyError):
+        return None
+    return tuple(version) if version is not None else None
+
+
+def _load_saved(directory, version):
+    # the saved cube if it was built from version, else None; labels.json is
+    # read again after the arrays, so a cube replaced mid-read is discarded
+    if _stored_version(directory) != version:
+        return None
+    try:
+        cube = FlightCube.load(directory)
+    except (OSError, ValueError):
+        return None
+    if _stored_version(directory) != version:
+        return None
+    return cube
+
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def load_flight_cube(backend, directory=CUBE_DIR):
+    # (re)built first when the database has changed since the cube was saved
+    version = data_version(backend.db_path)
+    key = (backend.db_path, directory, version)
+    with _lock:
+        cube = _loaded.get(key)
+        if cube is None:
+            cube = _load_saved(directory, version)
+            if cube is None:
+                cube = build_flight_cube(backend, directory)
+            _loaded.clear()
+            _loaded[key] = cube
+    return cube
+
+
+if __name__ == "__main__":
+    backend = get_backend(result_cache=False)
+    start = time.perf_counter()
+    cube = build_flight_cube(backend)
+    print(
+        f"Built {len(cube.combos)} (origin, dest, carrier) x {len(MONTHS)} months x "
+        f"{len(HOURS)} hours in {time.perf_counter() - start:.2f}s, "
+        f"{cube.nbytes / 1e6:.1f} MB in {CUBE_DIR}/"
+    )
+
+    route = backend.query("top_routes").iloc[0]
+    # (label, the cube's answer, the SQL answer), compared on count and means
+    checks = {
+        "flights by origin": (
+            lambda: cube.aggregate(("origin",)),
+            "SELECT origin, COUNT(*) AS flights, AVG(dep_delay) AS mean_dep_delay, "
+            "AVG(arr_delay) AS mean_arr_delay FROM flights GROUP BY origin",
+        ),
+        "flights by carrier": (
+            lambda: cube.aggregate(("carrier",)),
+            "SELECT carrier, COUNT(*) AS flights, AVG(dep_delay) AS mean_dep_delay, "
+            "AVG(arr_delay) AS mean_arr_delay FROM flights GROUP BY carrier",
+        ),
+        "carriers on the busiest route": (
+            lambda: cube.aggregate(("carrier",), origin=route["origin"], dest=route["dest"]),
+            "SELECT carrier, COUNT(*) AS flights, AVG(dep_delay) AS mean_dep_delay, "
+            "AVG(arr_delay) AS mean_arr_delay, MIN(dep_time) AS dep_time_min, "
+            "MAX(dep_time) AS dep_time_max FROM flights "
+            f"WHERE origin = '{route['origin']}' AND dest = '{route['dest']}' GROUP BY carrier",
+        ),
+        "month x hour from JFK": (
+            lambda: cube.aggregate(("month", "hour"), origin="JFK"),
+            "SELECT month, hour, COUNT(*) AS flights, AVG(dep_delay) AS mean_dep_delay, "
+            "AVG(arr_delay) AS mean_arr_delay FROM flights WHERE origin = 'JFK' "
+            "GROUP BY month, hour",
+        ),
+        "destinations in the evening rush": (
+            lambda: cube.aggregate(("dest",), hour=[17, 18, 19], month=[6, 7, 8]),
+            "SELECT dest, COUNT(*) AS flights, AVG(dep_delay) AS mean_dep_delay, "
+            "AVG(arr_delay) AS mean_arr_delay FROM flights "
+            "WHERE hour IN (17, 18, 19) AND month IN (6, 7, 8) GROUP BY dest",
+        ),
+    }
+    mismatches = 0
+    for label, (from_cube, sql) in checks.items():
+        start = time.perf_counter()
+        actual = from_cube()
+        cube_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        expected = backend.execute(sql)
+        sql_seconds = time.perf_counter() - start
+
+        keys = [column for column in expected.columns if column in DIMENSIONS]
+        expected = expected.sort_values(keys, ignore_index=True)
+        actual = actual.sort_values(keys, ignore_index=True)[list(expected.columns)]
+        try:
+            pd.testing.assert_frame_equal(actual, expected, check_dtype=False, rtol=1e-9)
+            same = True
+        except AssertionError:
+            same = False
+        mismatches += not same
+        print(
+            f"{label:<34} cube {cube_seconds * 1000:6.2f} ms, SQL {sql_seconds * 1000:7.1f} ms"
+            + ("" if same else "  RESULTS DIFFER")
+        )
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,150 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+DB_PATH = "flights_database.db"
+
+# Compact in-memory types for flights columns. Codes become categoricals; times
+# (HHMM), delays and the other whole-number columns fit small integers. Columns
+# with NULLs keep the nullable Int types, the rest drop to plain numpy ints.
+CODE_COLUMNS = ["carrier", "tailnum", "origin", "dest", "time_hour"]
+INT_COLUMNS = {
+    "year": "Int16",
+    "month": "Int8",
+    "day": "Int8",
+    "dep_time": "Int16",
+    "sched_dep_time": "Int16",
+    "dep_delay": "Int16",
+    "arr_time": "Int16",
+    "sched_arr_time": "Int16",
+    "arr_delay": "Int16",
+    "flight": "Int16",
+    "air_time": "Int16",
+    "distance": "Int16",
+    "hour": "Int8",
+    "minute": "Int8",
+}
+
+
+def _fits(dtype, low, high, fractional):
+    # whether a column with these bounds converts to dtype without loss; an
+    # all-NULL column has no bounds and fits anything
+    if low is None:
+        return True
+    info = np.iinfo(dtype.lower())
+    return not fractional and info.min <= low and high <= info.max
+
+
+def _int_dtypes(bounds):
+    # column -> dtype, decided once from the bounds over the whole result so
+    # every chunk gets the same one; fractional or out-of-range values keep
+    # their precision as float32
+    return {
+        column: dtype if _fits(dtype, *bounds[column]) else "float32"
+        for column, dtype in INT_COLUMNS.items()
+        if column in bounds
+    }
+
+
+def _query_bounds(conn, sql, params=()):
+    # (min, max, has fractional values) of each INT_COLUMNS column sql returns
+    columns = [
+        column[0] for column in conn.execute(f"SELECT * FROM ({sql}) LIMIT 0", params).description
+    ]
+    present = [column for column in INT_COLUMNS if column in columns]
+    if not present:
+        return {}
+    aggregates = ", ".join(
+        f'MIN("{column}"), MAX("{column}"), MAX("{column}" <> CAST("{column}" AS INTEGER))'
+        for column in present
+    )
+    row = conn.execute(f"SELECT {aggregates} FROM ({sql})", params).fetchone()
+    return {
+        column: (row[3 * i], row[3 * i + 1], bool(row[3 * i + 2]))
+        for i, column in enumerate(present)
+    }
+
+
+def _frame_bounds(frame):
+    bounds = {}
+    for column in INT_COLUMNS:
+        if column not in frame:
+            continue
+        values = frame[column].dropna()
+        if values.empty:
+            bounds[column] = (None, None, False)
+        else:
+            bounds[column] = (values.min(), values.max(), bool((values % 1 != 0).any()))
+    return bounds
+
+
+def _compact_chunk(chunk, dtypes):
+    for column, dtype in dtypes.items():
+        chunk[column] = chunk[column].astype(dtype)
+    for column in CODE_COLUMNS:
+        if column in chunk:
+            chunk[column] = chunk[column].astype("category")
+    return chunk
+
+
+def compact_flights(frame):
+    """Returns frame with the compact flights column types."""
+    return _drop_unused_masks(_compact_chunk(frame.copy(), _int_dtypes(_frame_bounds(frame))))
+
+
+def _drop_unused_masks(frame):
+    for column, dtype in INT_COLUMNS.items():
+        if column in frame and frame[column].dtype == dtype and not frame[column].hasnans:
+            frame[column] = frame[column].astype(dtype.lower())
+    return frame
+
+
+def read_flights(conn, sql="SELECT * FROM flights", params=(), chunksize=100_000):
+    """Like pd.read_sql, but converts each chunk as it arrives so the full
+    frame never exists with object strings and float64 columns."""
+    dtypes = _int_dtypes(_query_bounds(conn, sql, params))
+    parts = [
+        _compact_chunk(chunk, dtypes)
+        for chunk in pd.read_sql_query(sql, conn, params=params, chunksize=chunksize)
+    ]
+    if not parts:
+        return compact_flights(pd.read_sql_query(sql, conn, params=params))
+    codes = [column for column in CODE_COLUMNS if column in parts[0]]
+    # chunks have different category sets, so codes are merged separately
+    frame = pd.concat([part.drop(columns=codes) for part in parts], ignore_index=True)
+    for column in codes:
+        frame[column] = union_categoricals(
+            [part[column] for part in parts], sort_categories=True
+        )
+    return _drop_unused_masks(frame[list(parts[0].columns)])
+
+
+def memory_report(db_path=DB_PATH, sql="SELECT * FROM flights"):
+    # bytes per column: plain pd.read_sql against read_flights
+    conn = sqlite3.connect(db_path)
+    plain = pd.read_sql(sql, conn)
+    typed = read_flights(conn, sql)
+    conn.close()
+    report = pd.DataFrame(
+        {
+            "plain_dtype": plain.dtypes.astype(str),
+            "plain_bytes": plain.memory_usage(deep=True, index=False),
+            "typed_dtype": typed.dtypes.astype(str),
+            "typed_bytes": typed.memory_usage(deep=True, index=False),
+        }
+    )
+    report.loc["total"] = [
+        "",
+        report["plain_bytes"].sum(),
+        "",
+        report["typed_bytes"].sum(),
+    ]
+    report["ratio"] = report["plain_bytes"] / report["typed_bytes"]
+    return report
+
+
+if __name__ == "__main__":
+    report = memory_report()
+    print(report.to_string(formatters={"ratio": "{:.1f}x".format}))
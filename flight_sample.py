@@ -0,0 +1,270 @@
+import sqlite3
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from derived_state import get_watermark, max_flight_rowid, needs_refresh, set_watermark
+from query_backend import data_version
+
+DB_PATH = "flights_database.db"
+SAMPLE_FRACTION = 0.05
+
+# The sample keeps the same share of every (origin, month) stratum, at least one
+# flight each, and gives every sampled flight a weight of stratum size / sample
+# size. Means over the sample estimate the flights means; summed weights
+# estimate counts. New flights top their stratum back up to its share, drawn
+# from the new flights, and the stratum is reweighted.
+
+UPSERT_STRATA = """
+    INSERT INTO flights_sample_strata VALUES (?, ?, ?, ?)
+    ON CONFLICT(origin, month) DO UPDATE SET
+        population = excluded.population,
+        sampled = excluded.sampled
+"""
+
+_lock = threading.Lock()
+_current = set()
+
+
+def create_sample_tables(conn):
+    # flights_sample has the columns of flights plus the weight
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS flights_sample AS
+        SELECT f.*, CAST(NULL AS REAL) AS weight FROM flights f WHERE 0
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS flights_sample_strata (
+            origin TEXT, month INTEGER, population INTEGER, sampled INTEGER,
+            PRIMARY KEY (origin, month)
+        )
+        """
+    )
+
+
+def _top_up(rows, strata, fraction, rng):
+    # ids of the new flights to sample and the updated (origin, month,
+    # population, sampled) of every stratum they fall in
+    picked = []
+    updates = []
+    for (origin, month), group in rows.groupby(["origin", "month"]):
+        population, sampled = (
+            strata.loc[(origin, month)] if (origin, month) in strata.index else (0, 0)
+        )
+        population += len(group)
+        target = max(1, int(np.ceil(fraction * population)))
+        size = min(len(group), max(0, target - sampled))
+        picked.extend(rng.choice(group["id"].to_numpy(), size=size, replace=False))
+        updates.append((origin, int(month), int(population), int(sampled + size)))
+    return picked, updates
+
+
+def refresh_flight_sample(db_path=DB_PATH, rebuild=False, fraction=SAMPLE_FRACTION, seed=0):
+    # samples the flights added since the last refresh; rebuild=True starts
+    # over (after edits or deletes, or to change the fraction)
+    conn = sqlite3.connect(db_path, timeout=30.0)
+    with conn:
+        # one transaction from the watermark read to the reweighting, so two
+        # refreshes can't both add the same flights and readers keep the
+        # previous sample until it commits
+        conn.execute("BEGIN IMMEDIATE")
+        start = 0 if rebuild else get_watermark(conn, "flights_sample")
+        if start == 0:
+            # nothing sampled yet, whatever the tables hold (a sample from
+            # before the watermark was kept can't be topped up)
+            conn.execute("DROP TABLE IF EXISTS flights_sample")
+            conn.execute("DROP TABLE IF EXISTS flights_sample_strata")
+        create_sample_tables(conn)
+        end = max_flight_rowid(conn)
+        if end > start:
+            rows = pd.read_sql_query(
+                "SELECT rowid AS id, origin, month FROM flights WHERE rowid > ? AND rowid <= ?",
+                conn,
+                params=(start, end),
+            )
+            strata = pd.read_sql_query(
+                "SELECT origin, month, population, sampled FROM flights_sample_strata", conn
+            ).set_index(["origin", "month"])
+            picked, updates = _top_up(rows, strata, fraction, np.random.default_rng([seed, start]))
+            conn.execute("CREATE TEMP TABLE sample_ids (id INTEGER PRIMARY KEY)")
+            conn.executemany("INSERT INTO sample_ids VALUES (?)", [(int(i),) for i in picked])
+            conn.execute(
+                """
+                INSERT INTO flights_sample
+                SELECT f.*, NULL
+                FROM flights f
+                JOIN sample_ids s ON f.rowid = s.id
+                """
+            )
+            conn.execute("DROP TABLE sample_ids")
+            conn.executemany(UPSERT_STRATA, updates)
+            conn.execute(
+                """
+                UPDATE flights_sample
+                SET weight = (
+                    SELECT CAST(s.population AS REAL) / s.sampled
+                    FROM flights_sample_strata s
+                    WHERE s.origin = flights_sample.origin AND s.month = flights_sample.month
+                )
+                """
+            )
+        set_watermark(conn, "flights_sample", end)
+    conn.close()
+    return end - start if end > start else 0
+
+
+def build_flight_sample(db_path=DB_PATH, fraction=SAMPLE_FRACTION, seed=0):
+    return refresh_flight_sample(db_path, rebuild=True, fraction=fraction, seed=seed)
+
+
+def ensure_flight_sample(db_path=DB_PATH):
+    """Samples new flights before the sample is read, once it has been built;
+    a version check when nothing has changed since the last call."""
+    if (db_path, data_version(db_path)) in _current:
+        return
+    with _lock:
+        if (db_path, data_version(db_path)) in _current:
+            return
+        if needs_refresh(db_path, "flights_sample", "flights_sample_strata"):
+            refresh_flight_sample(db_path)
+        _current.add((db_path, data_version(db_path)))
+
+
+def mean_margin(n, total, total_sq):
+    # half-width of the 95% confidence interval of a mean, from count and sums
+    n = np.asarray(n, dtype=float)
+    mean = np.divide(total, n, out=np.full_like(n, np.nan), where=n > 0)
+    variance = np.divide(
+        np.asarray(total_sq, dtype=float) - n * mean**2,
+        n - 1,
+        out=np.full_like(n, np.nan),
+        where=n > 1,
+    )
+    return 1.96 * np.sqrt(np.clip(variance, 0, None) / n)
+
+
+def count_margin(sampled, sample_size, population):
+    # half-width of the 95% interval of an estimated count, treating the
+    # category's share of the sample as a binomial proportion
+    share = np.asarray(sampled, dtype=float) / sample_size
+    return 1.96 * population * np.sqrt(share * (1 - share) / sample_size)
+
+
+def estimate_air_time_distance(backend):
+    # the air time / distance summary with 95% margins on the means
+    frame = backend.query("sample_summary")
+    for column in ["air_time", "distance"]:
+        frame[f"avg_{column}_margin"] = mean_margin(
+            frame[f"{column}_n"], frame[f"{column}_sum"], frame[f"{column}_sumsq"]
+        )
+        frame[f"avg_{column}"] = frame[f"{column}_sum"] / frame[f"{column}_n"]
+    return frame
+
+
+def estimate_carrier_counts(backend):
+    frame = backend.query("sample_flights_by_carrier")
+    sample_size = frame["sampled"].sum()
+    population = frame["flight_count"].sum()
+    frame["margin"] = count_margin(frame["sampled"], sample_size, population)
+    return frame
+
+
+def error_report(backend):
+    """How far the sampled answers are from the exact ones, and whether each
+    exact answer falls inside its 95% interval."""
+    rows = []
+    summary = estimate_air_time_distance(backend)
+    for column in ["air_time", "distance"]:
+        exact = backend.query(f"{column}_summary").loc[0, f"avg_{column}"]
+        estimate = summary.loc[0, f"avg_{column}"]
+        margin = summary.loc[0, f"avg_{column}_margin"]
+        rows.append((f"avg_{column}", exact, estimate, margin))
+
+    carriers = estimate_carrier_counts(backend).set_index("carrier")
+    exact_carriers = backend.query("flights_by_carrier").set_index("carrier")
+    for carrier, exact in exact_carriers["flight_count"].items():
+        row = carriers.loc[carrier] if carrier in carriers.index else None
+        estimate = row["flight_count"] if row is not None else 0.0
+        margin = row["margin"] if row is not None else np.nan
+        rows.append((f"flights[{carrier}]", exact, estimate, margin))
+
+    # the delay cells, compared per hour of day as on the Delay Analysis page
+    from delay_analysis_page import summarise_delay
+
+    exact_hours = summarise_delay(backend.query("delay_cells"), "hour").set_index("hour")
+    sample_hours = summarise_delay(backend.query("sample_delay_cells"), "hour").set_index("hour")
+    for hour, exact in exact_hours["mean_delay"].items():
+        if hour in sample_hours.index:
+            sample = sample_hours.loc[hour]
+            margin = (sample["ci_high"] - sample["ci_low"]) / 2
+            rows.append((f"mean_arr_delay[hour={hour}]", exact, sample["mean_delay"], margin))
+
+    report = pd.DataFrame(rows, columns=["aggregate", "exact", "estimate", "margin"])
+    report["relative_error"] = (report["estimate"] - report["exact"]).abs() / report[
+        "exact"
+    ].abs()
+    report["covered"] = (report["estimate"] - report["exact"]).abs() <= report["margin"]
+    return report
+
+
+def check_delay_cells(backend, tolerance=0.05, min_sampled=30):
+    """Where the sample's weighted estimates of delay_cells miss the full table.
+
+    The estimated number of flights has to be within tolerance of the exact
+    count, and every hour with at least min_sampled sampled flights has to
+    have its flight count and mean arrival delay within twice their 95%
+    margins. Returns a description of each miss; none means the check passed.
+    """
+    exact = backend.query("delay_cells").groupby("hour")[["n", "delay_sum"]].sum()
+    sample = backend.query("sample_delay_cells").groupby("hour")[
+        ["n", "delay_sum", "delay_sumsq", "weighted_n", "weighted_delay_sum"]
+    ].sum()
+    failures = []
+    total, estimate = exact["n"].sum(), sample["weighted_n"].sum()
+    if abs(estimate - total) > tolerance * total:
+        failures.append(f"flights: estimated {estimate:.0f}, exact {total}")
+
+    count_margins = count_margin(sample["n"], sample["n"].sum(), estimate)
+    delay_margins = mean_margin(sample["n"], sample["delay_sum"], sample["delay_sumsq"])
+    for (hour, row), count_error, delay_error in zip(
+        sample.iterrows(), count_margins, delay_margins
+    ):
+        if row["n"] < min_sampled or hour not in exact.index:
+            continue
+        exact_n = exact.loc[hour, "n"]
+        if abs(row["weighted_n"] - exact_n) > 2 * count_error:
+            failures.append(
+                f"flights[hour={hour}]: estimated {row['weighted_n']:.0f}, exact {exact_n}"
+            )
+        exact_mean = exact.loc[hour, "delay_sum"] / exact_n
+        mean = row["weighted_delay_sum"] / row["weighted_n"]
+        if abs(mean - exact_mean) > 2 * delay_error:
+            failures.append(
+                f"mean_arr_delay[hour={hour}]: estimated {mean:.2f}, exact {exact_mean:.2f}"
+            )
+    return failures
+
+
+if __name__ == "__main__":
+    from query_backend import get_backend
+
+    added = refresh_flight_sample(rebuild="--rebuild" in sys.argv)
+    print(f"Sampled from {added} new flight rows into flights_sample")
+    backend = get_backend(result_cache=False)
+    report = error_report(backend)
+    print(report.to_string(index=False, float_format="{:.3f}".format))
+    coverage = report["covered"].mean()
+    print(
+        f"Median relative error {report['relative_error'].median():.2%}, "
+        f"max {report['relative_error'].max():.2%}; "
+        f"{coverage:.0%} of exact answers inside their 95% interval"
+    )
+    failures = check_delay_cells(backend)
+    for failure in failures:
+        print(f"DELAY CELLS OFF: {failure}")
+    # with 95% intervals a few misses are expected, many are not
+    sys.exit(0 if coverage >= 0.8 and not failures else 1)
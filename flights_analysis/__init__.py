@@ -0,0 +1,57 @@
+"""Reusable analysis functions for the NYC flights database.
+
+Names are resolved on first use, so importing the package reads nothing from
+disk and pulls in no plotting or data libraries; each function's module is
+imported when the function is first looked up::
+
+    import flights_analysis as fa
+
+    fa.configure(db_path="flights_database.db")
+    fa.get_flight_stats(1, 15, "JFK")
+"""
+
+import importlib
+
+# public name -> module that defines it
+_EXPORTS = {
+    "configure": "flights_analysis.config",
+    "db_path": "flights_analysis.config",
+    "get_backend": "flights_analysis.config",
+    "query": "flights_analysis.config",
+    "read_sql": "flights_analysis.config",
+    "clear_cache": "flights_analysis.config",
+    "get_nyc_airports": "flights_analysis.routes",
+    "plot_destinations_on_date": "flights_analysis.routes",
+    "get_flight_stats": "flights_analysis.routes",
+    "get_plane_type_usage": "flights_analysis.routes",
+    "get_airport_coords": "flights_analysis.wind",
+    "calculate_bearing": "flights_analysis.wind",
+    "compute_flight_direction": "flights_analysis.wind",
+    "inner_product": "flights_analysis.wind",
+    "get_weather": "flights_analysis.wind",
+    "compute_inner_products_for_day": "flights_analysis.wind",
+    "haversine": "flights_analysis.geo",
+    "load_matrices": "distance_matrix",
+    "load_weather_grid": "weather_grid",
+    "load_index": "airport_index",
+    "load_airports": "flights_analysis.airports",
+    "plot_flight_path_us": "flights_analysis.airports",
+    "plot_multiple_flights": "flights_analysis.airports",
+    "convert_to_datetime": "flights_analysis.times",
+    "check_flight_order": "flights_analysis.times",
+    "compute_local_arrival_time": "flights_analysis.times",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
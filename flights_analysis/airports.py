@@ -0,0 +1,58 @@
+from functools import lru_cache
+
+import pandas as pd
+import plotly.express as px
+
+from airport_index import AIRPORTS_CSV
+
+
+@lru_cache(maxsize=None)
+def _read_airports(path):
+    return pd.read_csv(path)
+
+
+def load_airports(path=AIRPORTS_CSV):
+    # read once per process; callers get their own copy to add columns to
+    return _read_airports(path).copy()
+
+
+def _coords(airports, faa_code):
+    return airports[airports['faa'] == faa_code][["lat", "lon"]].values[0]
+
+
+def plot_flight_path_us(faa_code, airports=None):
+    airports = load_airports() if airports is None else airports
+    nyc = _coords(airports, "JFK")
+
+    target_airport = airports[airports['faa'] == faa_code]
+    target_coords = target_airport[["lat", "lon"]].values[0]
+
+    is_us_airport = "America" in target_airport["tzone"].values[0]
+
+    fig = px.scatter_geo(airports, lat="lat", lon="lon", hover_name="name",
+                         title=f"Flight Path: JFK to {faa_code}", opacity=0.5)
+
+    fig.add_scattergeo(lat=[nyc[0], target_coords[0]], lon=[nyc[1], target_coords[1]],
+                       mode="lines", line=dict(width=2, color="red"))
+
+    if is_us_airport:
+        fig.update_layout(geo=dict(scope="usa"))
+
+    return fig
+
+
+def plot_multiple_flights(faa_codes, airports=None):
+    airports = load_airports() if airports is None else airports
+    nyc = _coords(airports, "JFK")
+
+    fig = px.scatter_geo(airports, lat="lat", lon="lon", hover_name="name",
+                         title="Multiple Flight Paths from JFK", opacity=0.5)
+
+    for code in faa_codes:
+        target_airport = airports[airports['faa'] == code]
+        if not target_airport.empty:
+            target_coords = target_airport[["lat", "lon"]].values[0]
+            fig.add_scattergeo(lat=[nyc[0], target_coords[0]], lon=[nyc[1], target_coords[1]],
+                               mode="lines", line=dict(width=2, color="blue"))
+
+    return fig
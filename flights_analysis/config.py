@@ -0,0 +1,82 @@
+import os
+import threading
+from collections import OrderedDict
+
+# Where the analysis functions read from. Nothing is opened until the first
+# query; configure() switches every function over at once.
+_settings = {
+    "db_path": os.environ.get("FLIGHTS_DB", "flights_database.db"),
+    "backend": None,
+    "result_cache": True,
+}
+CACHE_SIZE = 128
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def configure(db_path=None, backend=None, result_cache=None):
+    """Points the package at another database file and/or query backend
+    ("sqlite" or "duckdb"; None follows FLIGHTS_BACKEND). result_cache=False
+    stops its queries going through the shared on-disk result cache."""
+    if db_path is not None:
+        _settings["db_path"] = db_path
+    if backend is not None:
+        _settings["backend"] = backend
+    if result_cache is not None:
+        _settings["result_cache"] = result_cache
+    clear_cache()
+
+
+def db_path():
+    return _settings["db_path"]
+
+
+def get_backend(db_path=None):
+    # the process-wide backend for the configured file, or for db_path if given
+    from query_backend import get_backend as backend_for
+
+    return backend_for(
+        _settings["backend"], db_path or _settings["db_path"], _settings["result_cache"]
+    )
+
+
+def query(name, params=(), db_path=None):
+    """Runs a named query, answering repeats from an LRU of recent results.
+
+    Entries are keyed on the database's data version, so a write to the file
+    is never answered from the cache. Callers get their own copy of the frame.
+    """
+    from query_backend import data_version
+
+    path = db_path or _settings["db_path"]
+    key = (path, _settings["backend"], name, tuple(params), data_version(path))
+    with _cache_lock:
+        frame = _cache.get(key)
+        if frame is not None:
+            _cache.move_to_end(key)
+            return frame.copy()
+    frame = get_backend(path).query(name, params)
+    with _cache_lock:
+        _cache[key] = frame
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return frame.copy()
+
+
+def ensure_enriched(db_path=None):
+    # for the functions that read flights_enriched: folds in any flights added
+    # since it was last built (flights_enriched.py)
+    from flights_enriched import ensure_flights_enriched
+
+    ensure_flights_enriched(db_path or _settings["db_path"])
+
+
+def read_sql(sql, params=(), db_path=None):
+    # ad hoc SQL on the shared backend, uncached
+    return get_backend(db_path).execute(sql, params)
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
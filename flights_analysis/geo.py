@@ -0,0 +1,14 @@
+import numpy as np
+
+from airport_index import EARTH_RADIUS_KM
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    # great-circle distance in km; takes scalars or arrays. For known airports,
+    # load_matrices() has every pair precomputed.
+    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2.0)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2.0)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
@@ -0,0 +1,88 @@
+import plotly.express as px
+
+from flights_analysis.config import ensure_enriched, query
+
+# Per-day and per-route summaries for flights leaving NYC. db_path=None reads
+# the database flights_analysis.configure() points at.
+
+
+def get_nyc_airports(db_path=None):
+    return query("nyc_airports", db_path=db_path)
+
+
+def plot_destinations_on_date(month, day, origin_airport, db_path=None):
+    """
+    Creates a map with lines from the given origin_airport in NYC
+    to all destinations for flights on the specified (month, day).
+    Returns None when there are no such flights.
+    """
+    ensure_enriched(db_path)
+    df = query("destinations_on_date", (month, day, origin_airport), db_path=db_path)
+
+    if df.empty:
+        print(f"No flights found on {month}/{day} from {origin_airport}.")
+        return None
+
+    # We can make a scatter_geo figure with lines
+    # Each row is a single flight. You can choose to group by unique destinations, etc.
+    fig = px.scatter_geo(
+        df,
+        lat="dest_lat", lon="dest_lon",
+        hover_name="dest_code",
+        title=f"All destinations from {origin_airport} on {month}/{day}"
+    )
+
+    # Add lines from origin → each destination
+    # One approach is to add each flight as a separate trace:
+    for _, row in df.iterrows():
+        fig.add_scattergeo(
+            lat=[row["origin_lat"], row["dest_lat"]],
+            lon=[row["origin_lon"], row["dest_lon"]],
+            mode='lines',
+            line=dict(width=1, color='blue'),
+            showlegend=False
+        )
+
+    fig.update_layout(
+        geo=dict(
+            scope="world",  # or "usa" if you want to zoom in
+            projection_type="equirectangular",
+            showland=True,
+        )
+    )
+    return fig
+
+
+def get_flight_stats(month, day, origin_airport, db_path=None):
+    df = query("day_destination_counts", (month, day, origin_airport), db_path=db_path)
+
+    total_flights = df['flights_to_dest'].sum()
+    unique_destinations = df.shape[0]
+    top_destination = df.iloc[0]['dest']
+    top_count = df.iloc[0]['flights_to_dest']
+
+    least_destination = df.iloc[-1]['dest']
+    least_count = df.iloc[-1]['flights_to_dest']
+
+    avg_flights = round(total_flights / unique_destinations) if unique_destinations else 0
+    min_flights = df['flights_to_dest'].min()
+    median_flights = df['flights_to_dest'].median()
+
+    return {
+        "total_flights": total_flights,
+        "unique_destinations": unique_destinations,
+        "top_destination": top_destination,
+        "top_destination_count": top_count,
+        "least_destination": least_destination,
+        "least_destination_count": least_count,
+        "average_flights_per_destination": avg_flights,
+        "minimum_flights_to_a_destination": min_flights,
+        "median_flights_to_destination": median_flights
+    }
+
+
+def get_plane_type_usage(origin_airport, dest_airport, db_path=None):
+    ensure_enriched(db_path)
+    df = query("plane_type_usage", (origin_airport, dest_airport), db_path=db_path)
+    usage_dict = dict(zip(df['plane_type'], df['usage_count']))
+    return usage_dict
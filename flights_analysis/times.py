@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from flights_analysis.config import ensure_enriched, read_sql
+
+
+def convert_to_datetime(row, time_col):
+    # an HHMM time on the row's year/month/day; None when missing or invalid
+    try:
+        if pd.isna(row[time_col]) or row[time_col] is None:
+            return None
+        time_value = int(row[time_col])
+        time_str = f"{time_value:04d}"
+        hour, minute = int(time_str[:2]), int(time_str[2:])
+        return pd.Timestamp(year=int(row["year"]), month=int(row["month"]), day=int(row["day"]), hour=hour, minute=minute)
+    except (ValueError, TypeError):
+        return None
+
+
+def check_flight_order(db_path=None):
+    """Flights whose air_time is more than 5 minutes off arr_time - dep_time."""
+    query = """
+    SELECT flight, dep_time, sched_dep_time, arr_time, sched_arr_time, air_time
+    FROM flights
+    WHERE dep_time IS NOT NULL AND arr_time IS NOT NULL AND air_time IS NOT NULL
+    """
+    flights_df = read_sql(query, db_path=db_path)
+
+    for col in ["dep_time", "sched_dep_time", "arr_time", "sched_arr_time"]:
+        flights_df[col] = pd.to_datetime(flights_df[col], format='%H%M', errors='coerce')
+    flights_df["computed_air_time"] = (flights_df["arr_time"] - flights_df["dep_time"]).dt.total_seconds() / 60
+    issues = flights_df[(flights_df["computed_air_time"].notnull()) &
+                        (abs(flights_df["computed_air_time"] - flights_df["air_time"]) > 5)]
+    return issues
+
+
+def compute_local_arrival_time(db_path=None):
+    import pytz
+
+    # both time zones are on each row of flights_enriched; an airport's name is
+    # set exactly when it matched, so the name tests keep the flights the joins
+    # did, including those whose airport has no tzone
+    query = """
+    SELECT flight, origin, dest, sched_arr_time, year, month, day,
+           origin_tzone AS origin_tz, dest_tzone AS dest_tz
+    FROM flights_enriched
+    WHERE sched_arr_time IS NOT NULL
+      AND origin_name IS NOT NULL
+      AND dest_name IS NOT NULL
+    """
+
+    ensure_enriched(db_path)
+    df = read_sql(query, db_path=db_path)
+
+    def convert_to_datetime(row):
+        """Convert HHMM format integer to actual flight date with proper time"""
+        try:
+            if pd.isna(row["sched_arr_time"]) or row["sched_arr_time"] is None:
+                return None
+            time_str = f"{int(row['sched_arr_time']):04d}"  # Convert to HHMM format
+            flight_date = f"{int(row['year'])}-{int(row['month']):02d}-{int(row['day']):02d}"
+            return datetime.strptime(f"{flight_date} {time_str}", "%Y-%m-%d %H%M")
+        except (ValueError, TypeError):
+            return None
+
+    df["sched_arr_time_dt"] = df.apply(convert_to_datetime, axis=1)
+
+    def safe_timezone(tz_string):
+        """Convert to pytz timezone safely, catching errors"""
+        try:
+            return pytz.timezone(tz_string)
+        except Exception as e:
+            print(f"Invalid timezone '{tz_string}': {e}")
+            return None
+
+    df["origin_tz"] = df["origin_tz"].apply(safe_timezone)
+    df["dest_tz"] = df["dest_tz"].apply(safe_timezone)
+
+    def compute_time_difference(row):
+        """Compute time difference in hours between departure and arrival airport"""
+        try:
+            if row["origin_tz"] is None or row["dest_tz"] is None:
+                return None
+            origin_time = datetime(row["year"], row["month"], row["day"], 12, 0, 0, tzinfo=row["origin_tz"])
+            dest_time = origin_time.astimezone(row["dest_tz"])
+            return (dest_time - origin_time).total_seconds() / 3600
+        except Exception as e:
+            print(f"Time difference error: {e}")
+            return None
+
+    df["time_difference_hours"] = df.apply(compute_time_difference, axis=1)
+
+    def adjust_timezone(row):
+        """Adjust arrival time to the destination's local time zone"""
+        if row["sched_arr_time_dt"] is None or row["time_difference_hours"] is None:
+            return None
+        try:
+            local_arrival_time = row["sched_arr_time_dt"] + timedelta(hours=row["time_difference_hours"])
+            return local_arrival_time.strftime("%Y-%m-%d %H:%M:%S")
+        except Exception as e:
+            print(f"Error adjusting time zones: {e}")
+            return None
+
+    df["local_arrival_time"] = df.apply(adjust_timezone, axis=1)
+    return df
@@ -0,0 +1,111 @@
+import math
+
+import numpy as np
+
+from distance_matrix import load_matrices
+from weather_grid import FILL, load_weather_grid
+
+# Inner product between a flight's direction and the wind at its origin when it
+# departs. The functions take an open sqlite3 connection, as batch_runner.py
+# hands each worker its own. Weather comes from the dense hourly grid built
+# from that connection's database (weather_grid.py); fill="none" gives only
+# the hours the weather table has a row for.
+
+
+def get_airport_coords(conn, faa_code):
+    cursor = conn.cursor()
+    cursor.execute("SELECT lat, lon FROM airports WHERE faa = ?", (faa_code,))
+    row = cursor.fetchone()
+    return row if row else None
+
+
+def calculate_bearing(lat1, lon1, lat2, lon2):
+    lat1_rad = math.radians(lat1)
+    lon1_rad = math.radians(lon1)
+    lat2_rad = math.radians(lat2)
+    lon2_rad = math.radians(lon2)
+
+    diff_lon = lon2_rad - lon1_rad
+    x = math.sin(diff_lon) * math.cos(lat2_rad)
+    y = (math.cos(lat1_rad) * math.sin(lat2_rad)
+         - math.sin(lat1_rad) * math.cos(lat2_rad) * math.cos(diff_lon))
+
+    bearing = math.degrees(math.atan2(x, y))
+    return (bearing + 360) % 360
+
+
+def compute_flight_direction(conn, origin_faa, dest_faa):
+    # initial bearing from the precomputed airport matrices (distance_matrix.py)
+    matrices = load_matrices()
+    if origin_faa not in matrices.index or dest_faa not in matrices.index:
+        return None
+    return matrices.bearing(origin_faa, dest_faa)
+
+
+def inner_product(flight_dir_deg, wind_speed, wind_dir_deg):
+    fd_rad = math.radians(flight_dir_deg)
+    wd_rad = math.radians(wind_dir_deg)
+    return wind_speed * math.cos(wd_rad - fd_rad)
+
+
+def _weather_grid(conn, fill):
+    # the file behind the connection, so each worker uses its own database
+    db_path = conn.execute("PRAGMA database_list").fetchone()[2]
+    return load_weather_grid(db_path, fill)
+
+
+def get_weather(conn, origin, year, month, day, hour, fill=FILL):
+    # (wind_speed, wind_dir), or None when the hour is unknown
+    return _weather_grid(conn, fill).get(
+        origin, year, month, day, hour, ("wind_speed", "wind_dir")
+    )
+
+
+def compute_inner_products_for_day(conn, origin, dest, year, month, day, fill=FILL):
+    cursor = conn.cursor()
+    query = """
+        SELECT dep_time, flight, tailnum, arr_time, arr_delay
+        FROM flights
+        WHERE origin = ?
+          AND dest = ?
+          AND year = ?
+          AND month = ?
+          AND day = ?;
+    """
+    cursor.execute(query, (origin, dest, year, month, day))
+    flights_data = cursor.fetchall()
+    if not flights_data:
+        print(f"No flights found for {origin}->{dest} on {year}-{month}-{day}.")
+        return []
+
+    flight_dir = compute_flight_direction(conn, origin, dest)
+    if flight_dir is None:
+        print(f"Could not compute bearing for {origin}->{dest}.")
+        return []
+
+    departed = [row for row in flights_data if row[0]]
+    if not departed:
+        return []
+    dep_hours = np.array([int(dep_time // 100) for dep_time, *_ in departed])
+    # every departure's wind in one lookup
+    weather = _weather_grid(conn, fill).lookup(
+        origin, year, month, day, dep_hours, ("wind_speed", "wind_dir")
+    )
+    products = weather[:, 0] * np.cos(np.radians(weather[:, 1] - flight_dir))
+
+    results = []
+    for (dep_time, flight_num, *_), dep_hour, (wind_speed, wind_dir_deg), ip_val in zip(
+        departed, dep_hours, weather, products
+    ):
+        if np.isnan(ip_val):
+            continue
+        results.append({
+            "flight": flight_num,
+            "dep_time": dep_time,
+            "hour": int(dep_hour),
+            "wind_speed": float(wind_speed),
+            "wind_dir": float(wind_dir_deg),
+            "bearing": flight_dir,
+            "inner_product": float(ip_val)
+        })
+    return results
@@ -0,0 +1,273 @@
+import sqlite3
+import sys
+import threading
+import time
+
+import pandas as pd
+
+from derived_state import get_watermark, max_flight_rowid, set_watermark
+from query_backend import data_version
+
+DB_PATH = "flights_database.db"
+
+# One wide row per flight with everything the analyses used to join for: both
+# airports' names, coordinates and time zones, the weather at the origin in
+# the flight's scheduled departure hour, the plane's details and the airline
+# name. Columns from a dimension row that doesn't exist are NULL, so every
+# flight is kept; an hour the weather table reports twice uses its first row.
+COLUMNS = """
+    flight_id INTEGER PRIMARY KEY,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    flight_date TEXT NOT NULL,
+    dep_time REAL,
+    sched_dep_time INTEGER,
+    dep_delay REAL,
+    arr_time REAL,
+    sched_arr_time INTEGER,
+    arr_delay REAL,
+    carrier TEXT,
+    flight INTEGER,
+    tailnum TEXT,
+    origin TEXT NOT NULL,
+    dest TEXT NOT NULL,
+    air_time REAL,
+    distance REAL,
+    hour INTEGER,
+    minute INTEGER,
+    time_hour TEXT,
+    airline_name TEXT,
+    origin_name TEXT,
+    origin_lat REAL,
+    origin_lon REAL,
+    origin_alt INTEGER,
+    origin_tz REAL,
+    origin_dst TEXT,
+    origin_tzone TEXT,
+    dest_name TEXT,
+    dest_lat REAL,
+    dest_lon REAL,
+    dest_alt INTEGER,
+    dest_tz REAL,
+    dest_dst TEXT,
+    dest_tzone TEXT,
+    temp REAL,
+    dewp REAL,
+    humid REAL,
+    wind_dir REAL,
+    wind_speed REAL,
+    wind_gust REAL,
+    precip REAL,
+    pressure REAL,
+    visib REAL,
+    plane_year INTEGER,
+    plane_type TEXT,
+    manufacturer TEXT,
+    model TEXT,
+    engines INTEGER,
+    seats INTEGER,
+    engine TEXT
+"""
+
+# the filters the analyses use
+INDEXES = {
+    "flights_enriched_day": "origin, month, day",
+    "flights_enriched_route": "origin, dest",
+    "flights_enriched_origin_month": "origin, year, month, dest",
+    "flights_enriched_carrier": "carrier",
+    "flights_enriched_model": "model",
+}
+
+INSERT = """
+    INSERT INTO flights_enriched
+    SELECT f.rowid,
+           f.year, f.month, f.day,
+           printf('%04d-%02d-%02d', f.year, f.month, f.day),
+           f.dep_time, f.sched_dep_time, f.dep_delay, f.arr_time, f.sched_arr_time,
+           f.arr_delay, f.carrier, f.flight, f.tailnum, f.origin, f.dest,
+           f.air_time, f.distance, f.hour, f.minute, f.time_hour,
+           al.name,
+           a1.name, a1.lat, a1.lon, a1.alt, a1.tz, a1.dst, a1.tzone,
+           a2.name, a2.lat, a2.lon, a2.alt, a2.tz, a2.dst, a2.tzone,
+           w.temp, w.dewp, w.humid, w.wind_dir, w.wind_speed, w.wind_gust,
+           w.precip, w.pressure, w.visib,
+           p.year, p.type, p.manufacturer, p.model, p.engines, p.seats, p.engine
+    FROM flights f
+    LEFT JOIN airlines al ON al.carrier = f.carrier
+    LEFT JOIN airports a1 ON a1.faa = f.origin
+    LEFT JOIN airports a2 ON a2.faa = f.dest
+    LEFT JOIN (
+        SELECT origin, year, month, day, hour, MIN(rowid) AS first_rowid
+        FROM weather
+        GROUP BY origin, year, month, day, hour
+    ) wh ON wh.origin = f.origin AND wh.year = f.year AND wh.month = f.month
+        AND wh.day = f.day AND wh.hour = f.hour
+    LEFT JOIN weather w ON w.rowid = wh.first_rowid
+    LEFT JOIN planes p ON p.tailnum = f.tailnum
+    WHERE f.rowid > ? AND f.rowid <= ?
+"""
+
+_lock = threading.Lock()
+_current = set()
+
+
+def create_enriched_table(conn):
+    conn.execute(f"CREATE TABLE IF NOT EXISTS flights_enriched ({COLUMNS})")
+    for name, columns in INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON flights_enriched ({columns})")
+
+
+def refresh_flights_enriched(db_path=DB_PATH, rebuild=False):
+    # adds the flights inserted since the last refresh; rebuild=True starts
+    # over, which picks up edits to the flights or to airports, weather,
+    # planes and airlines
+    conn = sqlite3.connect(db_path, timeout=30.0)
+    with conn:
+        # taken before reading the watermark, so two processes can't both add
+        # the same flights
+        conn.execute("BEGIN IMMEDIATE")
+        create_enriched_table(conn)
+        if rebuild:
+            conn.execute("DELETE FROM flights_enriched")
+            set_watermark(conn, "flights_enriched", 0)
+        start = get_watermark(conn, "flights_enriched")
+        end = max_flight_rowid(conn)
+        if end > start:
+            conn.execute(INSERT, (start, end))
+            set_watermark(conn, "flights_enriched", end)
+    conn.close()
+    return end - start if end > start else 0
+
+
+def ensure_flights_enriched(db_path=DB_PATH):
+    """Brings flights_enriched up to date before it is read; a check of two
+    rowids when nothing has changed since the last call."""
+    if (db_path, data_version(db_path)) in _current:
+        return
+    with _lock:
+        if (db_path, data_version(db_path)) not in _current:
+            refresh_flights_enriched(db_path)
+            _current.add((db_path, data_version(db_path)))
+
+
+# (query on the base tables, the same query on flights_enriched), with the
+# busiest route and day filled in for :origin, :dest, :month and :day
+COMPARISONS = {
+    "destinations on a day": (
+        """
+        SELECT a.lat, a.lon, b.lat, b.lon, f.dest
+        FROM flights f
+        JOIN airports a ON f.origin = a.faa
+        JOIN airports b ON f.dest = b.faa
+        WHERE f.month = :month AND f.day = :day AND f.origin = :origin
+        """,
+        """
+        SELECT origin_lat, origin_lon, dest_lat, dest_lon, dest
+        FROM flights_enriched
+        WHERE month = :month AND day = :day AND origin = :origin
+          AND origin_lat IS NOT NULL AND dest_lat IS NOT NULL
+        """,
+    ),
+    "plane types on a route": (
+        """
+        SELECT p.type, COUNT(*)
+        FROM flights f
+        JOIN planes p ON f.tailnum = p.tailnum
+        WHERE f.origin = :origin AND f.dest = :dest
+        GROUP BY p.type
+        """,
+        """
+        SELECT plane_type, COUNT(*)
+        FROM flights_enriched
+        WHERE origin = :origin AND dest = :dest AND plane_type IS NOT NULL
+        GROUP BY plane_type
+        """,
+    ),
+    "weather of a day's departures": (
+        """
+        SELECT f.flight, f.dep_time, w.wind_speed, w.wind_dir, w.temp, w.visib
+        FROM flights f
+        LEFT JOIN (
+            SELECT origin, year, month, day, hour, MIN(rowid) AS first_rowid
+            FROM weather
+            GROUP BY origin, year, month, day, hour
+        ) wh ON wh.origin = f.origin AND wh.year = f.year AND wh.month = f.month
+            AND wh.day = f.day AND wh.hour = f.hour
+        LEFT JOIN weather w ON w.rowid = wh.first_rowid
+        WHERE f.month = :month AND f.day = :day AND f.origin = :origin
+        """,
+        """
+        SELECT flight, dep_time, wind_speed, wind_dir, temp, visib
+        FROM flights_enriched
+        WHERE month = :month AND day = :day AND origin = :origin
+        """,
+    ),
+    "time zones of every flight": (
+        """
+        SELECT f.flight, f.origin, f.dest, f.sched_arr_time, a1.tzone, a2.tzone
+        FROM flights f
+        JOIN airports a1 ON f.origin = a1.faa
+        JOIN airports a2 ON f.dest = a2.faa
+        WHERE f.sched_arr_time IS NOT NULL
+        """,
+        """
+        SELECT flight, origin, dest, sched_arr_time, origin_tzone, dest_tzone
+        FROM flights_enriched
+        WHERE sched_arr_time IS NOT NULL
+          AND origin_name IS NOT NULL AND dest_name IS NOT NULL
+        """,
+    ),
+    "mean departure delay per airline": (
+        """
+        SELECT f.carrier, AVG(f.dep_delay), al.name
+        FROM flights f
+        JOIN airlines al ON f.carrier = al.carrier
+        GROUP BY f.carrier
+        """,
+        """
+        SELECT carrier, AVG(dep_delay), airline_name
+        FROM flights_enriched
+        WHERE airline_name IS NOT NULL
+        GROUP BY carrier
+        """,
+    ),
+}
+
+
+def _timed(conn, sql, params):
+    start = time.perf_counter()
+    frame = pd.read_sql_query(sql, conn, params=params)
+    return frame, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    rebuild = "--rebuild" in sys.argv
+    start = time.perf_counter()
+    added = refresh_flights_enriched(rebuild=rebuild)
+    print(f"Added {added} flight rows to flights_enriched in {time.perf_counter() - start:.2f}s")
+
+    # each query against its join-free version: same rows, and how long each takes
+    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    origin, dest, month, day = conn.execute(
+        """
+        SELECT origin, dest, month, day FROM flights
+        GROUP BY origin, dest, month, day ORDER BY COUNT(*) DESC LIMIT 1
+        """
+    ).fetchone()
+    params = {"origin": origin, "dest": dest, "month": month, "day": day}
+    mismatches = 0
+    for label, (joined_sql, enriched_sql) in COMPARISONS.items():
+        joined, joined_seconds = _timed(conn, joined_sql, params)
+        enriched, enriched_seconds = _timed(conn, enriched_sql, params)
+        joined.columns = enriched.columns
+        same = joined.sort_values(list(joined.columns), ignore_index=True).equals(
+            enriched.sort_values(list(enriched.columns), ignore_index=True)
+        )
+        mismatches += not same
+        print(
+            f"{label:<40} joins {joined_seconds * 1000:7.1f} ms, "
+            f"flights_enriched {enriched_seconds * 1000:7.1f} ms"
+            + ("" if same else "  RESULTS DIFFER")
+        )
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,479 @@
+import threading
+from functools import lru_cache
+
+import numpy as np
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from delay_sketches import DelaySketchStore, ensure_delay_sketches
+from derived_state import refresh_if_writable
+from flight_cube import load_flight_cube
+from flight_sample import (
+    ensure_flight_sample,
+    estimate_air_time_distance,
+    estimate_carrier_counts,
+)
+from flights_analysis import convert_to_datetime
+from panel_executor import frame_panel, plotly_panel, render_panels
+from query_backend import missing_table
+
+PAGE = "overview"
+
+
+def flight_counts(backend, dim):
+    # flights per origin or carrier, from the cube rather than a GROUP BY
+    counts = load_flight_cube(backend).aggregate((dim,))
+    counts = counts[[dim, "flights"]].rename(columns={"flights": "flight_count"})
+    return counts.sort_values(dim, ignore_index=True)
+
+
+def load_total_flights(backend):
+    return pd.DataFrame({"total": [load_flight_cube(backend).total()]})
+
+
+def build_origin_pie(backend):
+    df_origin = flight_counts(backend, "origin")
+
+    fig_origin = px.pie(
+        df_origin,
+        names="origin",
+        values="flight_count",
+    )
+    fig_origin.update_layout(width=500)
+    return fig_origin
+
+
+def build_departure_bar(backend):
+    df_departure_airport = flight_counts(backend, "origin")
+
+    fig_departure_airport = px.bar(
+        df_departure_airport,
+        x="origin",
+        y="flight_count",
+        labels={"origin": "Departure Airport", "flight_count": "Number of Flights"},
+    )
+    fig_departure_airport.update_layout(width=500)
+    return fig_departure_airport
+
+
+def load_delays(backend):
+    df_delays = backend.query("delays")
+    return df_delays.dropna(subset=["dep_delay", "arr_delay"])
+
+
+def build_delay_summary(df_delays):
+    dep_mean = df_delays["dep_delay"].mean()
+    dep_median = df_delays["dep_delay"].median()
+    dep_min = df_delays["dep_delay"].min()
+    dep_max = df_delays["dep_delay"].max()
+    dep_std = df_delays["dep_delay"].std()
+
+    arr_mean = df_delays["arr_delay"].mean()
+    arr_median = df_delays["arr_delay"].median()
+    arr_min = df_delays["arr_delay"].min()
+    arr_max = df_delays["arr_delay"].max()
+    arr_std = df_delays["arr_delay"].std()
+
+    return pd.DataFrame(
+        {
+            "Metric": ["Mean", "Median", "Min", "Max", "Std Dev"],
+            "Departure Delay": [
+                round(dep_mean, 2),
+                round(dep_median, 2),
+                round(dep_min, 2),
+                round(dep_max, 2),
+                round(dep_std, 2),
+            ],
+            "Arrival Delay": [
+                round(arr_mean, 2),
+                round(arr_median, 2),
+                round(arr_min, 2),
+                round(arr_max, 2),
+                round(arr_std, 2),
+            ],
+        }
+    )
+
+
+def load_delay_sketches(backend):
+    # per-(origin, month) sketches built by delay_sketches.py, with any new
+    # flights folded in first where the database can be written; None until built
+    refresh_if_writable(ensure_delay_sketches, backend.db_path)
+    try:
+        return DelaySketchStore.load(backend)
+    except Exception as e:
+        if not missing_table(e):
+            raise
+        return None
+
+
+def build_sketch_delay_summary(store):
+    # same table as build_delay_summary, merged from the sketches instead of raw rows
+    columns = {}
+    for metric, label in [
+        ("dep_delay", "Departure Delay"),
+        ("arr_delay", "Arrival Delay"),
+    ]:
+        sketch = store.sketch(metric)
+        columns[label] = [
+            round(sketch.mean, 2),
+            round(float(sketch.quantile(0.5)), 2),
+            round(sketch.min, 2),
+            round(sketch.max, 2),
+            round(sketch.std, 2),
+        ]
+    return pd.DataFrame(
+        {"Metric": ["Mean", "Median", "Min", "Max", "Std Dev"], **columns}
+    )
+
+
+DELAY_CATEGORIES = ["On-time", "1-15 min delayed", ">15 min delayed"]
+
+
+def raw_delay_category_counts(df_delays):
+    conditions = [
+        (df_delays["dep_delay"] <= 0),
+        (df_delays["dep_delay"] > 0) & (df_delays["dep_delay"] <= 15),
+        (df_delays["dep_delay"] > 15),
+    ]
+    delay_category = pd.Series(
+        np.select(conditions, DELAY_CATEGORIES, default="Unknown")
+    )
+    return delay_category.value_counts()
+
+
+def sketch_delay_category_counts(store):
+    sketch = store.sketch("dep_delay")
+    return pd.Series(
+        [
+            sketch.count_between(-np.inf, 0),
+            sketch.count_between(0, 15),
+            sketch.count_between(15, np.inf),
+        ],
+        index=DELAY_CATEGORIES,
+    )
+
+
+def build_delay_category_pie(category_counts):
+    delay_cat = category_counts.reset_index()
+    delay_cat.columns = ["Delay Category", "Count"]
+    delay_cat["Percentage"] = (
+        delay_cat["Count"] / delay_cat["Count"].sum() * 100
+    ).round(2)
+
+    fig_delay_cat = px.pie(
+        delay_cat,
+        names="Delay Category",
+        values="Count",
+    )
+
+    fig_delay_cat.update_layout(width=500)
+    return fig_delay_cat
+
+
+def build_carrier_bar(backend):
+    df_carrier = flight_counts(backend, "carrier")
+    return px.bar(
+        df_carrier,
+        x="carrier",
+        y="flight_count",
+        labels={"carrier": "Carrier", "flight_count": "Number of Flights"},
+    )
+
+
+def build_carrier_bar_estimate(backend):
+    # from the stratified sample, with 95% intervals on each count
+    df_carrier = estimate_carrier_counts(backend)
+    fig = px.bar(
+        df_carrier,
+        x="carrier",
+        y="flight_count",
+        error_y="margin",
+        labels={"carrier": "Carrier", "flight_count": "Number of Flights"},
+    )
+    fig.update_layout(title="≈ Estimated from a sample, refining…")
+    return fig
+
+
+def format_estimate(frame, column):
+    # "12.3" for an exact answer; "≈ 12.3 ± 0.4" for a mean from the sample
+    # summary, and "≈ 12.3" for its min and max, which have no interval
+    value = f"{round(frame.loc[0, column], 2)}"
+    if "air_time_n" not in frame.columns:
+        return value
+    if f"{column}_margin" in frame.columns:
+        return f"≈ {value} ± {round(frame.loc[0, f'{column}_margin'], 2)}"
+    return f"≈ {value}"
+
+
+def load_hourly_stats(backend):
+    df_times = backend.query("flight_times")
+
+    df_times["dep_time_dt"] = df_times.apply(
+        lambda r: convert_to_datetime(r, "dep_time"), axis=1
+    )
+    df_times["arr_time_dt"] = df_times.apply(
+        lambda r: convert_to_datetime(r, "arr_time"), axis=1
+    )
+
+    df_times["dep_hour"] = df_times["dep_time_dt"].dt.hour
+    df_times["arr_hour"] = df_times["arr_time_dt"].dt.hour
+    df_times["flight_date"] = df_times.apply(
+        lambda r: pd.Timestamp(
+            year=int(r["year"]), month=int(r["month"]), day=int(r["day"])
+        ),
+        axis=1,
+    )
+
+    df_dep_counts = (
+        df_times.dropna(subset=["dep_hour"])
+        .groupby(["flight_date", "dep_hour"])
+        .size()
+        .reset_index(name="dep_count")
+    )
+    df_arr_counts = (
+        df_times.dropna(subset=["arr_hour"])
+        .groupby(["flight_date", "arr_hour"])
+        .size()
+        .reset_index(name="arr_count")
+    )
+
+    df_dep_counts = df_dep_counts.rename(columns={"dep_hour": "hour"})
+    df_arr_counts = df_arr_counts.rename(columns={"arr_hour": "hour"})
+
+    df_combined = pd.merge(
+        df_dep_counts, df_arr_counts, on=["flight_date", "hour"], how="outer"
+    )
+    df_combined["dep_count"] = df_combined["dep_count"].fillna(0)
+    df_combined["arr_count"] = df_combined["arr_count"].fillna(0)
+    df_combined["total"] = df_combined["dep_count"] + df_combined["arr_count"]
+
+    stats = df_combined.groupby("hour")[["dep_count", "arr_count", "total"]].agg(
+        ["mean", "std"]
+    )
+    stats.columns = ["_".join(col) for col in stats.columns]
+    stats = stats.reset_index()
+
+    stats = stats.rename(
+        columns={
+            "hour": "Hour",
+            "dep_count_mean": "Mean_Departures",
+            "dep_count_std": "Std_Departures",
+            "arr_count_mean": "Mean_Arrivals",
+            "arr_count_std": "Std_Arrivals",
+            "total_mean": "Mean_Total",
+            "total_std": "Std_Total",
+        }
+    )
+
+    stats["Time_Label"] = stats["Hour"].apply(
+        lambda h: f"{int(h):02d}:00 - {int(h):02d}:59"
+    )
+    return stats
+
+
+def build_hourly_figure(backend):
+    stats = load_hourly_stats(backend)
+
+    fig = go.Figure()
+    for name, mean_col, std_col in [
+        ("departure", "Mean_Departures", "Std_Departures"),
+        ("arrival", "Mean_Arrivals", "Std_Arrivals"),
+        ("total", "Mean_Total", "Std_Total"),
+    ]:
+        fig.add_trace(
+            go.Bar(
+                x=stats["Time_Label"],
+                y=stats[mean_col],
+                name=name,
+                error_y=dict(
+                    type="data",
+                    array=stats[std_col],
+                    visible=True,
+                    thickness=1,
+                    width=0,
+                ),
+                width=0.3,
+                marker=dict(line=dict(width=0.5)),
+            )
+        )
+    fig.update_layout(
+        barmode="group",
+        xaxis_title="Hour of Day",
+        yaxis_title="Number of Flights",
+        legend_title="Flight Type",
+        bargap=0.2,
+        bargroupgap=0.0,
+    )
+    return fig
+
+
+def render(backend):
+    st.markdown(
+        f"""
+    <h1 style='text-align: center; color:rgb(19, 19, 31);'>🗽 NYC Flights Dashboard – Overview</h1>
+    <hr>
+    """,
+        unsafe_allow_html=True,
+    )
+
+    # every panel's queries start together on the panel pool and each panel is
+    # drawn as soon as its own result is back; in approximate mode the slow
+    # aggregates first show an estimate from the flight sample
+    approximate = st.session_state.get("approximate", False)
+    if approximate:
+        refresh_if_writable(ensure_flight_sample, backend.db_path)
+    sample_summary = lru_cache(maxsize=1)(lambda: estimate_air_time_distance(backend))
+    carrier_preview = (lambda: build_carrier_bar_estimate(backend)) if approximate else None
+    row1_col1, row1_col2, row1_col3, row1_col4 = st.columns(4)
+    total_slot = row1_col1.empty()
+    air_time_slots = [col.empty() for col in (row1_col2, row1_col3, row1_col4)]
+
+    row2_col1, row2_col2, row2_col3, row2_col4 = st.columns(4)
+    avg_daily_slot = row2_col1.empty()
+    distance_slots = [col.empty() for col in (row2_col2, row2_col3, row2_col4)]
+
+    def draw_total(frame):
+        total_slot.metric("Total Flights", frame.loc[0, "total"])
+
+    def draw_avg_daily(frame):
+        avg_daily_slot.metric("Average Flights per Day", round(frame.loc[0, "avg_daily"]))
+
+    def draw_air_time(frame):
+        avg_slot, min_slot, max_slot = air_time_slots
+        avg_slot.metric(
+            "Average Flight Duration (min)", format_estimate(frame, "avg_air_time")
+        )
+        min_slot.metric("Min Flight Duration (min)", format_estimate(frame, "min_air_time"))
+        max_slot.metric("Max Flight Duration (min)", format_estimate(frame, "max_air_time"))
+
+    def draw_distance(frame):
+        avg_slot, min_slot, max_slot = distance_slots
+        avg_slot.metric("Average Distance (miles)", format_estimate(frame, "avg_distance"))
+        min_slot.metric("Min Distance (miles)", format_estimate(frame, "min_distance"))
+        max_slot.metric("Max Distance (miles)", format_estimate(frame, "max_distance"))
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("##### **Distribution of Flights Across NYC Airports**")
+        origin_slot = st.empty()
+
+    with col2:
+        st.markdown("##### **Number of Flights by Departure Airport**")
+        departure_slot = st.empty()
+
+    # both delay panels come from the stored sketches when they have been built,
+    # otherwise from the raw delay rows; either is read at most once per run even
+    # though the two panels load on different threads
+    load_lock = threading.Lock()
+    load_sketches = lru_cache(maxsize=1)(lambda: load_delay_sketches(backend))
+    load_raw_delays = lru_cache(maxsize=1)(lambda: load_delays(backend))
+
+    def get_sketches():
+        with load_lock:
+            return load_sketches()
+
+    def get_delays():
+        with load_lock:
+            return load_raw_delays()
+
+    def delay_summary_panel():
+        store = get_sketches()
+        if store is None:
+            return build_delay_summary(get_delays())
+        return build_sketch_delay_summary(store)
+
+    def delay_category_panel():
+        store = get_sketches()
+        if store is None:
+            return build_delay_category_pie(raw_delay_category_counts(get_delays()))
+        return build_delay_category_pie(sketch_delay_category_counts(store))
+
+    col_delay_stats, col_delay_breakdown = st.columns(2)
+
+    with col_delay_stats:
+        st.markdown("##### **Delay Statistics**")
+        st.markdown("<br>", unsafe_allow_html=True)
+        st.markdown("<br>", unsafe_allow_html=True)
+        delay_summary_slot = st.empty()
+
+    with col_delay_breakdown:
+        st.markdown("##### **Percentage Breakdown of Departure Delays**")
+        delay_category_slot = st.empty()
+
+    st.markdown("##### **Flight Count by Carrier**")
+    carrier_slot = st.empty()
+
+    st.markdown(
+        "##### **Mean Hourly Numbers of Flight Departures and Arrivals (with Std. Dev.)**"
+    )
+    hourly_slot = st.empty()
+
+    render_panels(
+        PAGE,
+        backend,
+        [
+            frame_panel(
+                "total", total_slot, lambda: load_total_flights(backend), draw_total
+            ),
+            frame_panel(
+                "air_time",
+                air_time_slots[0],
+                lambda: backend.query("air_time_summary"),
+                draw_air_time,
+                preview=sample_summary if approximate else None,
+            ),
+            frame_panel(
+                "avg_daily",
+                avg_daily_slot,
+                lambda: backend.query("avg_daily_flights"),
+                draw_avg_daily,
+            ),
+            frame_panel(
+                "distance",
+                distance_slots[0],
+                lambda: backend.query("distance_summary"),
+                draw_distance,
+                preview=sample_summary if approximate else None,
+            ),
+            plotly_panel(
+                "origin_pie",
+                origin_slot,
+                lambda: build_origin_pie(backend),
+                use_container_width=False,
+            ),
+            plotly_panel(
+                "departure_bar",
+                departure_slot,
+                lambda: build_departure_bar(backend),
+                use_container_width=False,
+            ),
+            frame_panel(
+                "delay_summary",
+                delay_summary_slot,
+                delay_summary_panel,
+                lambda frame: delay_summary_slot.dataframe(frame, width=450),
+            ),
+            plotly_panel(
+                "delay_category_pie",
+                delay_category_slot,
+                delay_category_panel,
+                use_container_width=False,
+            ),
+            plotly_panel(
+                "carrier_bar",
+                carrier_slot,
+                lambda: build_carrier_bar(backend),
+                preview=carrier_preview,
+                use_container_width=True,
+            ),
+            plotly_panel(
+                "hourly_flights",
+                hourly_slot,
+                lambda: build_hourly_figure(backend),
+                use_container_width=True,
+            ),
+        ],
+    )
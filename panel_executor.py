@@ -0,0 +1,137 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+
+import streamlit as st
+
+import figure_cache
+
+PANEL_TIMEOUT = 30.0
+
+
+class Panel:
+    """One independently loaded piece of a page.
+
+    build runs the panel's queries on a worker thread and returns the
+    serialized spec the figure cache stores; draw takes that spec and draws it
+    on the script thread. Status messages go to placeholder. An optional
+    preview returns a quick approximate spec, drawn while build runs.
+    """
+
+    def __init__(
+        self, name, build, draw, placeholder, params=(), timeout=PANEL_TIMEOUT, preview=None
+    ):
+        self.name = name
+        self.build = build
+        self.draw = draw
+        self.placeholder = placeholder
+        self.params = params
+        self.timeout = timeout
+        self.preview = preview
+
+
+@st.cache_resource
+def get_panel_pool():
+    # long-lived threads, so each keeps its read-only backend connection open
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="panel")
+
+
+def _build(backend, panel):
+    with backend.time_limit(panel.timeout):
+        return panel.build()
+
+
+def _store(cache, key, future):
+    if not future.cancelled() and future.exception() is None:
+        cache.put(key, future.result())
+
+
+def _draw_preview(panel):
+    try:
+        panel.draw(panel.preview())
+    except Exception:
+        # e.g. the sample table has not been built; wait for the exact answer
+        panel.placeholder.caption("Loading…")
+
+
+def render_panels(page, backend, panels):
+    """Draws cached panels straight away and the rest as their queries finish.
+
+    A panel with a preview shows it first and is redrawn with the exact answer.
+    That answer is cached when its query finishes, even if this run has moved on.
+    """
+    cache = figure_cache.get_figure_cache()
+    pool = get_panel_pool()
+    started = time.monotonic()
+    pending = {}
+    for panel in panels:
+        key = figure_cache.cache_key(page, panel.name, panel.params)
+        spec = cache.get(key)
+        if spec is not None:
+            panel.draw(spec)
+            continue
+        future = pool.submit(_build, backend, panel)
+        future.add_done_callback(partial(_store, cache, key))
+        pending[future] = (panel, key)
+        panel.placeholder.caption("Loading…")
+
+    # previews run on this thread, so only once every build is under way; one
+    # whose exact answer is already in is drawn straight from that below
+    for future, (panel, key) in pending.items():
+        if panel.preview is not None and not future.done():
+            _draw_preview(panel)
+
+    while pending:
+        deadline = min(started + panel.timeout for panel, _ in pending.values())
+        done, _ = wait(
+            pending,
+            timeout=max(deadline - time.monotonic(), 0),
+            return_when=FIRST_COMPLETED,
+        )
+        now = time.monotonic()
+        for future in done:
+            panel, key = pending.pop(future)
+            try:
+                spec = future.result()
+            except Exception as e:
+                if now - started >= panel.timeout:
+                    panel.placeholder.warning(
+                        f"⏱️ {panel.name} timed out after {panel.timeout:g}s"
+                    )
+                else:
+                    panel.placeholder.error(f"Failed to load {panel.name}: {e}")
+                continue
+            panel.draw(spec)
+        for future, (panel, key) in list(pending.items()):
+            if now - started >= panel.timeout:
+                # a SQLite query is aborted by its time limit; others finish unseen
+                future.cancel()
+                del pending[future]
+                panel.placeholder.warning(
+                    f"⏱️ {panel.name} timed out after {panel.timeout:g}s"
+                )
+
+
+def plotly_panel(name, placeholder, build_figure, preview=None, **kwargs):
+    def draw(spec):
+        with placeholder:
+            figure_cache.show_plotly(spec, **kwargs)
+
+    return Panel(
+        name,
+        lambda: figure_cache.plotly_spec(build_figure),
+        draw,
+        placeholder,
+        preview=preview and (lambda: figure_cache.plotly_spec(preview)),
+    )
+
+
+def frame_panel(name, placeholder, load_frame, draw_frame, preview=None):
+    # draw_frame gets the loaded DataFrame back and draws it
+    return Panel(
+        name,
+        lambda: figure_cache.frame_spec(load_frame),
+        lambda spec: draw_frame(figure_cache.read_frame(spec)),
+        placeholder,
+        preview=preview and (lambda: figure_cache.frame_spec(preview)),
+    )
@@ -1,17 +1,9 @@
 import sqlite3
-import math
 import pandas as pd
 import matplotlib.pyplot as plt
 
-def haversine_distance(lat1, lon1, lat2, lon2, radius=3959):
-
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-  
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    return radius * c
+from distance_matrix import load_matrices
+from query_backend import get_backend
 
 def create_comparison_table(db_path='flights_database.db'):
 
@@ -28,10 +20,8 @@ def create_comparison_table(db_path='flights_database.db'):
     df = pd.read_sql_query(query, conn)
     conn.close()
     
-    df['Computed Distance'] = df.apply(
-        lambda row: haversine_distance(row['orig_lat'], row['orig_lon'], row['dest_lat'], row['dest_lon']),
-        axis=1
-    )
+    # great-circle miles looked up in the precomputed airport distance matrix
+    df['Computed Distance'] = load_matrices().distances(df['origin'], df['dest'], unit="miles")
     
     df['Difference'] = abs(df['distance'] - df['Computed Distance'])
     df['distance'] = df['distance'].round(2)
@@ -40,6 +30,32 @@ def create_comparison_table(db_path='flights_database.db'):
     
     return df
 
+def route_distance_report(db_path='flights_database.db', tolerance=5.0):
+    """Stored vs. great-circle distance (miles) once per (origin, dest) route,
+    for every origin, with the number of flights on each route. A route is an
+    outlier when a stored distance is more than tolerance miles off, or when
+    its flights disagree on the distance."""
+    routes = get_backend(db_path=db_path).query("route_distances")
+    routes['computed_distance'] = load_matrices().distances(
+        routes['origin'], routes['dest'], unit="miles"
+    )
+    routes['difference'] = routes['stored_distance'] - routes['computed_distance']
+    worst = pd.concat(
+        [
+            (routes['min_distance'] - routes['computed_distance']).abs(),
+            (routes['max_distance'] - routes['computed_distance']).abs(),
+        ],
+        axis=1,
+    ).max(axis=1)
+    routes['outlier'] = (worst > tolerance) | (routes['distinct_distances'] > 1)
+    return routes
+
+def distance_outliers(report):
+    outliers = report[report['outlier']]
+    return outliers.reindex(
+        outliers['difference'].abs().sort_values(ascending=False).index
+    )
+
 def plot_scatter_comparison(df):
     plt.figure(figsize=(8, 6))
     
@@ -64,4 +80,10 @@ if __name__ == '__main__':
     #scatter plot using all results 
     plot_scatter_comparison(df_comparison)
 
+    #every route from every origin, checked once per route
+    report = route_distance_report()
+    outliers = distance_outliers(report)
+    print(f"{len(outliers)} of {len(report)} routes have a stored distance off by more than 5 miles or inconsistent:")
+    print(outliers.head(25).to_string(index=False))
+
 
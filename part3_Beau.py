@@ -3,17 +3,13 @@ import sqlite3
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from distance_matrix import load_matrices
+from plane_stats import refresh_plane_model_stats
+from weather_grid import load_weather_grid
+
 connection = sqlite3.connect("flights_database.db")
 cursor = connection.cursor()
 
-def haversine(lat1, lon1, lat2, lon2):
-    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = np.sin(dlat / 2.0)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2.0)**2
-    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
-    return 6371 * c  
-
 # Bullet point 1
 def compare_distances():
     query = """
@@ -31,11 +27,8 @@ def compare_distances():
     miles_to_km = 1.60934
     df["distance_km"] = df["distance"] * miles_to_km
     
-    df["computed_distance_km"] = df.apply(
-        lambda row: haversine(row["origin_lat"], row["origin_lon"],
-                              row["dest_lat"], row["dest_lon"]),
-        axis=1
-    )
+    # geodesic km looked up in the precomputed airport distance matrix
+    df["computed_distance_km"] = load_matrices().distances(df["origin"], df["dest"])
     
     # Scatter plot: DB distance (converted to km) vs computed geodesic distance.
     plt.figure(figsize=(10, 6))
@@ -75,17 +68,20 @@ def plot_distance_vs_arr_delay():
 
 #Bullet point 10
 def update_plane_speed():
-    # (distance in miles; air_time in minutes; converting to mph)
+    # per-tailnum mean speed from plane_model_stats (distance / air_time * 60),
+    # kept with the same 1.15078 factor as before
+    refresh_plane_model_stats()
     query = """
-    SELECT tailnum, AVG((distance * 1.15078 / air_time) * 60) as avg_speed
-    FROM flights
-    WHERE air_time > 0
-    GROUP BY tailnum
+    SELECT key AS tailnum, speed_mean * 1.15078 AS avg_speed
+    FROM plane_model_stats
+    WHERE level = 'tailnum'
     """
     speeds = pd.read_sql_query(query, connection)
     cur = connection.cursor()
-    for idx, row in speeds.iterrows():
-        cur.execute("UPDATE planes SET speed = ? WHERE tailnum = ?", (row["avg_speed"], row["tailnum"]))
+    cur.executemany(
+        "UPDATE planes SET speed = ? WHERE tailnum = ?",
+        speeds[["avg_speed", "tailnum"]].itertuples(index=False, name=None),
+    )
     connection.commit()
 
 def check_plane_speeds():
@@ -96,22 +92,23 @@ def check_plane_speeds():
 #Bullet point 13
 def analyze_inner_product_vs_air_time():
     query = """
-            SELECT flight, air_time, dep_time
+            SELECT origin, dest, year, month, day, dep_time, air_time
             FROM flights
             WHERE air_time IS NOT NULL AND dep_time IS NOT NULL
-            LIMIT 200
             """
     
     df = pd.read_sql_query(query, connection)
-    inner_products = []
-    air_times = []
-    
-    for idx, row in df.iterrows():
-        ip = inner_product_flight_wind(row["flight"]) #function name for bullet point 12?
-        if ip is not None:
-            inner_products.append(ip)
-            air_times.append(row["air_time"])
-    if not inner_products:
+    # bearing and wind for every flight at once: matrix and weather grid lookups
+    bearings = load_matrices().bearings(df["origin"], df["dest"])
+    wind = load_weather_grid().lookup(
+        df["origin"], df["year"], df["month"], df["day"], df["dep_time"] // 100,
+        ("wind_speed", "wind_dir"),
+    )
+    products = wind[:, 0] * np.cos(np.radians(wind[:, 1] - bearings))
+    known = ~np.isnan(products)
+    inner_products = products[known]
+    air_times = df["air_time"].to_numpy()[known]
+    if not len(inner_products):
         return
     
     plt.figure(figsize=(10, 6))
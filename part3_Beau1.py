@@ -3,17 +3,11 @@ import sqlite3
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from flights_analysis import haversine
+
 connection = sqlite3.connect("flights_database.db")
 cursor = connection.cursor()
 
-def haversine(lat1, lon1, lat2, lon2):
-    lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = np.sin(dlat / 2.0)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2.0)**2
-    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
-    return 6371 * c  
-
 # Bullet point 1
 def compare_distances():
     query = """
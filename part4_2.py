@@ -1,8 +1,9 @@
 import sqlite3
-import pandas as pd
+
+from flight_frames import read_flights
 
 database = sqlite3.connect("flights_database.db")
-dataframe = pd.read_sql("SELECT * FROM flights", database)
+dataframe = read_flights(database)
 
 database.close()
 
@@ -1,24 +1,86 @@
 import sqlite3
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+STAT_COLUMNS = ["air_time", "distance", "wind_speed", "temp", "precip"]
+
+
+#Groups the frame by origin once so each airport is a contiguous slice of rows,
+#and keeps describe/aggregate results around for the next call
+class AirportStats:
+
+    def __init__(self, df):
+        order = np.argsort(df["origin"].to_numpy(), kind="stable")
+        self.df = df.iloc[order]
+        airports, starts = np.unique(self.df["origin"].to_numpy(), return_index=True)
+        stops = np.append(starts[1:], len(self.df))
+        self.slices = {
+            airport: slice(start, stop)
+            for airport, start, stop in zip(airports, starts, stops)
+        }
+        self._describe = {}
+        self._aggregates = None
+
+    def rows(self, airports):
+        if isinstance(airports, str):
+            airports = [airports]
+        parts = [self.df.iloc[self.slices[a]] for a in airports if a in self.slices]
+        if not parts:
+            return self.df.iloc[0:0]
+        return pd.concat(parts) if len(parts) > 1 else parts[0]
+
+    def describe(self, airports):
+        #a single airport gives its describe() frame, a list gives {airport: frame}
+        single = isinstance(airports, str)
+        if single:
+            airports = [airports]
+        missing = [a for a in airports if a not in self._describe and a in self.slices]
+        if missing:
+            #one groupby over all missing airports instead of a describe() per airport
+            wide = self.rows(missing).groupby("origin")[STAT_COLUMNS].describe()
+            for airport in missing:
+                self._describe[airport] = wide.loc[airport].unstack(level=0)[
+                    STAT_COLUMNS
+                ]
+        if single:
+            return self._describe.get(airports[0])
+        return {a: self._describe[a] for a in airports if a in self._describe}
+
+    def aggregate(self):
+        if self._aggregates is None:
+            self._aggregates = self.df.groupby("origin").agg(
+                avg_air_time=("air_time", "mean"),
+                avg_distance=("distance", "mean"),
+                avg_temp=("temp", "mean"),
+                avg_wind_speed=("wind_speed", "mean"),
+                avg_precip=("precip", "mean"),
+            )
+        return self._aggregates
+
+
+#the functions below take a DataFrame or an AirportStats; pass the same
+#AirportStats to repeated calls to skip the grouping and reuse cached results
+def as_airport_stats(df):
+    return df if isinstance(df, AirportStats) else AirportStats(df)
+
+
 #returns statistics of a given airport
 def airport_statistics(df, airport):
-    
-    airport_df = df[df["origin"] == airport]
-    if airport_df.empty:
+
+    stats = as_airport_stats(df).describe(airport)
+    if stats is None:
         print(f"⚠️ No data available for airport: {airport}")
         return None
 
-    stats = airport_df[["air_time", "distance", "wind_speed", "temp", "precip"]].describe()
     return stats
 
 
 #plot wind speed against airports simairly to bullet point 6
 def plot_wind_speed(df,airport):
 
-    airport_df = df[df["origin"] == airport]
+    airport_df = as_airport_stats(df).rows(airport)
 
     plt.figure(figsize=(10, 5))
     sns.histplot(airport_df["wind_speed"], bins=15, kde=True)
@@ -29,7 +91,7 @@ def plot_wind_speed(df,airport):
 
 #Compares delyas across different airports
 def compare_airports(df, airports):
-    filtered_df = df[df["origin"].isin(airports)]
+    filtered_df = as_airport_stats(df).rows(airports)
 
     plt.figure(figsize=(12, 6))
     sns.boxplot(x="origin", y="delay", data=filtered_df)
@@ -38,13 +100,19 @@ def compare_airports(df, airports):
     plt.title("Flight Delays Across Airports")
     plt.show()
 
+#Same comparison drawn from the stored delay sketches (delay_sketches.py),
+#so no raw delay rows are read; months is an inclusive (first, last) range
+def compare_airports_sketched(store, airports, months=(1, 12), metric="arr_delay"):
+    sketches = [(a, store.sketch(metric, [a], months)) for a in airports]
+    boxes = [sketch.box_stats(a) for a, sketch in sketches if sketch.n]
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.bxp(boxes, showfliers=False)
+    ax.set_xlabel("Airport")
+    ax.set_ylabel("Flight Delay (minutes)")
+    ax.set_title("Flight Delays Across Airports")
+    plt.show()
+
 #This method groups average data by airport
 def grouped_airport_data(df):
-    grouped = df.groupby("origin").agg(
-        avg_air_time=("air_time", "mean"),
-        avg_distance=("distance", "mean"),
-        avg_temp=("temp", "mean"),
-        avg_wind_speed=("wind_speed", "mean"),
-        avg_precip=("precip", "mean"),
-    )
-    return grouped
\ No newline at end of file
+    return as_airport_stats(df).aggregate()
@@ -0,0 +1,101 @@
+import sqlite3
+
+from derived_state import get_watermark, max_flight_rowid, set_watermark
+
+DB_PATH = "flights_database.db"
+
+# Speed is distance / (air_time / 60) in mph, over flights with a positive
+# air time and distance. Sums are kept rather than averages so a batch of new
+# flights is folded in by adding its sums; mean and variance follow from them.
+SPEED_ROWS = """
+    SELECT tailnum, distance, air_time, distance / (air_time / 60.0) AS speed
+    FROM flights
+    WHERE rowid > ? AND rowid <= ?
+      AND air_time > 0 AND distance > 0
+      AND tailnum IS NOT NULL
+"""
+
+UPSERT = """
+    INSERT INTO plane_model_stats
+        (level, key, flight_count, total_distance, total_air_time, speed_sum, speed_sumsq)
+    {select}
+    ON CONFLICT(level, key) DO UPDATE SET
+        flight_count = flight_count + excluded.flight_count,
+        total_distance = total_distance + excluded.total_distance,
+        total_air_time = total_air_time + excluded.total_air_time,
+        speed_sum = speed_sum + excluded.speed_sum,
+        speed_sumsq = speed_sumsq + excluded.speed_sumsq
+"""
+
+MODEL_DELTAS = f"""
+    SELECT 'model', p.model, COUNT(*), SUM(f.distance), SUM(f.air_time),
+           SUM(f.speed), SUM(f.speed * f.speed)
+    FROM ({SPEED_ROWS}) f
+    JOIN planes p ON f.tailnum = p.tailnum
+    WHERE p.model IS NOT NULL
+    GROUP BY p.model
+"""
+
+TAILNUM_DELTAS = f"""
+    SELECT 'tailnum', f.tailnum, COUNT(*), SUM(f.distance), SUM(f.air_time),
+           SUM(f.speed), SUM(f.speed * f.speed)
+    FROM ({SPEED_ROWS}) f
+    WHERE true
+    GROUP BY f.tailnum
+"""
+
+
+def create_plane_stats_table(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS plane_model_stats (
+            level TEXT NOT NULL,
+            key TEXT NOT NULL,
+            flight_count INTEGER NOT NULL,
+            total_distance REAL NOT NULL,
+            total_air_time REAL NOT NULL,
+            speed_sum REAL NOT NULL,
+            speed_sumsq REAL NOT NULL,
+            speed_mean REAL,
+            speed_var REAL,
+            PRIMARY KEY (level, key)
+        )
+        """
+    )
+
+
+def refresh_plane_model_stats(db_path=DB_PATH, rebuild=False):
+    # folds every flight added since the last refresh into the per-model and
+    # per-tailnum rows; rebuild=True starts over (after edits or deletes)
+    conn = sqlite3.connect(db_path, timeout=30.0)
+    with conn:
+        # taken before reading the watermark, so two processes can't both add
+        # the same flights
+        conn.execute("BEGIN IMMEDIATE")
+        create_plane_stats_table(conn)
+        if rebuild:
+            conn.execute("DELETE FROM plane_model_stats")
+            set_watermark(conn, "plane_model_stats", 0)
+        start = get_watermark(conn, "plane_model_stats")
+        end = max_flight_rowid(conn)
+        if end > start:
+            for deltas in (MODEL_DELTAS, TAILNUM_DELTAS):
+                conn.execute(UPSERT.format(select=deltas), (start, end))
+            conn.execute(
+                """
+                UPDATE plane_model_stats
+                SET speed_mean = speed_sum / flight_count,
+                    speed_var = CASE WHEN flight_count > 1
+                        THEN (speed_sumsq - speed_sum * speed_sum / flight_count)
+                             / (flight_count - 1)
+                        END
+                """
+            )
+            set_watermark(conn, "plane_model_stats", end)
+    conn.close()
+    return end - start if end > start else 0
+
+
+if __name__ == "__main__":
+    added = refresh_plane_model_stats()
+    print(f"Folded {added} new flight rows into plane_model_stats")
@@ -0,0 +1,608 @@
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+import pandas as pd
+
+from result_cache import RESULT_CACHE_PATH, ResultCache, result_key
+
+DB_PATH = "flights_database.db"
+DUCKDB_PATH = "flights_database.duckdb"
+STREAM_CHUNKSIZE = 20_000
+
+# One row per flight with a weather match, binned the way the Delay Analysis
+# page groups them. (x - x % 100) / 100 is the hour of an HHMM time in both
+# engines; SQLite truncates a REAL cast while DuckDB rounds it.
+DELAY_ROWS = """
+        SELECT CAST((f.dep_time - f.dep_time % 100) / 100 AS INTEGER) AS hour,
+               ROUND(w.wind_speed / 2.0) * 2 AS wind_bin,
+               ROUND(w.temp / 5.0) * 5 AS temp_bin,
+               CASE
+                   WHEN w.precip = 0 THEN 0
+                   WHEN w.precip <= 0.05 THEN 1
+                   WHEN w.precip <= 0.1 THEN 2
+                   WHEN w.precip <= 0.25 THEN 3
+                   WHEN w.precip <= 0.5 THEN 4
+                   ELSE 5
+               END AS precip_bucket,
+               f.arr_delay
+        FROM flights f
+        JOIN weather w ON f.origin = w.origin
+            AND f.year = w.year
+            AND f.month = w.month
+            AND f.day = w.day
+            AND CAST((f.sched_dep_time - f.sched_dep_time % 100) / 100 AS INTEGER) = w.hour
+        WHERE f.arr_delay IS NOT NULL
+            AND f.dep_time IS NOT NULL
+            AND w.temp IS NOT NULL
+            AND w.wind_speed IS NOT NULL
+            AND w.precip IS NOT NULL
+"""
+
+# Every aggregate the dashboard and the analysis scripts run, by name. The SQL is
+# written so both engines give the same answer; a query that cannot be shared
+# maps to {"sqlite": ..., "duckdb": ...} instead of a string.
+QUERIES = {
+    "total_flights": "SELECT COUNT(*) as total FROM flights",
+    "avg_daily_flights": """
+        SELECT AVG(daily_count) AS avg_daily
+        FROM (
+            SELECT year, month, day, COUNT(*) AS daily_count
+            FROM flights
+            GROUP BY year, month, day
+        )
+    """,
+    "air_time_summary": """
+        SELECT
+            AVG(air_time) AS avg_air_time,
+            MIN(air_time) AS min_air_time,
+            MAX(air_time) AS max_air_time
+        FROM flights
+    """,
+    "distance_summary": """
+        SELECT
+            AVG(distance) AS avg_distance,
+            MIN(distance) AS min_distance,
+            MAX(distance) AS max_distance
+        FROM flights
+    """,
+    "flights_by_origin": """
+        SELECT origin, COUNT(*) as flight_count
+        FROM flights
+        GROUP BY origin
+        ORDER BY origin
+    """,
+    "flights_by_carrier": """
+        SELECT carrier, COUNT(*) as flight_count
+        FROM flights
+        GROUP BY carrier
+        ORDER BY carrier
+    """,
+    "delays": "SELECT dep_delay, arr_delay FROM flights",
+    # the dimensions and measures flight_bitmaps.py indexes, in rowid order
+    "crossfilter_rows": """
+        SELECT carrier, origin, dest, month, hour, dep_delay, arr_delay
+        FROM flights
+        ORDER BY rowid
+    """,
+    # the cells flight_cube.py is built from
+    "cube_cells": """
+        SELECT origin, dest, carrier, month, hour,
+               COUNT(*) AS flights,
+               COUNT(dep_delay) AS dep_delay_n,
+               COALESCE(SUM(dep_delay), 0) AS dep_delay_sum,
+               COALESCE(SUM(dep_delay * dep_delay), 0) AS dep_delay_sumsq,
+               COUNT(arr_delay) AS arr_delay_n,
+               COALESCE(SUM(arr_delay), 0) AS arr_delay_sum,
+               COALESCE(SUM(arr_delay * arr_delay), 0) AS arr_delay_sumsq,
+               MIN(dep_time) AS dep_time_min,
+               MAX(dep_time) AS dep_time_max
+        FROM flights
+        GROUP BY origin, dest, carrier, month, hour
+        ORDER BY origin, dest, carrier, month, hour
+    """,
+    "flight_times": "SELECT year, month, day, dep_time, arr_time FROM flights",
+    "delay_rows": DELAY_ROWS,
+    "delay_cells": f"""
+        SELECT hour, wind_bin, temp_bin, precip_bucket,
+               COUNT(*) AS n,
+               SUM(arr_delay) AS delay_sum,
+               SUM(arr_delay * arr_delay) AS delay_sumsq
+        FROM ({DELAY_ROWS}) AS r
+        GROUP BY 1, 2, 3, 4
+        ORDER BY 1, 2, 3, 4
+    """,
+    "route_carrier_stats": """
+        SELECT carrier, COUNT(*) as num_flights, AVG(dep_delay) as avg_dep_delay,
+               AVG(arr_delay) as avg_arr_delay, MIN(dep_time) as earliest_dep,
+               MAX(dep_time) as latest_dep
+        FROM flights
+        WHERE origin = (SELECT faa FROM airports WHERE name = ?)
+        AND dest = (SELECT faa FROM airports WHERE name = ?)
+        GROUP BY carrier
+        ORDER BY carrier
+    """,
+    # the same by FAA code, for callers outside the dashboard (query_service.py)
+    "route_carrier_stats_by_faa": """
+        SELECT carrier, COUNT(*) as num_flights, AVG(dep_delay) as avg_dep_delay,
+               AVG(arr_delay) as avg_arr_delay, MIN(dep_time) as earliest_dep,
+               MAX(dep_time) as latest_dep
+        FROM flights
+        WHERE origin = ? AND dest = ?
+        GROUP BY carrier
+        ORDER BY carrier
+    """,
+    "top_destinations": """
+        SELECT dest, COUNT(*) as num_flights
+        FROM flights
+        WHERE origin = (SELECT faa FROM airports WHERE name = ?)
+        GROUP BY dest
+        ORDER BY num_flights DESC, dest
+        LIMIT 5
+    """,
+    "flights_on_day": """
+        SELECT year, month, day, dep_time, sched_dep_time, arr_time, sched_arr_time, air_time, origin, dest
+        FROM flights
+        WHERE year = ? AND month = ? AND day = ?
+    """,
+    "airport_delays": """
+        SELECT origin, AVG(arr_delay) AS avg_delay
+        FROM flights
+        WHERE arr_delay IS NOT NULL
+        GROUP BY origin
+        ORDER BY avg_delay DESC
+    """,
+    # built by plane_stats.py, which keeps it current as flights are added
+    "fastest_plane_models": """
+        SELECT key AS model, speed_mean AS avg_speed
+        FROM plane_model_stats
+        WHERE level = 'model'
+        ORDER BY avg_speed DESC, model
+        LIMIT 20
+    """,
+    "tailnum_speeds": """
+        SELECT key AS tailnum, flight_count, speed_mean AS avg_speed, speed_var
+        FROM plane_model_stats
+        WHERE level = 'tailnum'
+        ORDER BY tailnum
+    """,
+    "top_routes": """
+        SELECT origin, dest, COUNT(*) AS flight_count
+        FROM flights
+        WHERE origin IN ('JFK', 'LGA', 'EWR')
+        GROUP BY origin, dest
+        ORDER BY flight_count DESC, origin, dest
+        LIMIT 50
+    """,
+    "wind_delay": """
+        SELECT w.wind_speed, AVG(f.arr_delay) AS arr_delay
+        FROM flights f
+        JOIN weather w ON f.origin = w.origin AND f.year = w.year AND f.month = w.month AND f.day = w.day
+        WHERE f.arr_delay IS NOT NULL AND w.wind_speed IS NOT NULL
+        GROUP BY w.wind_speed
+        ORDER BY w.wind_speed
+    """,
+    "nyc_airports": """
+        SELECT *
+        FROM airports
+        WHERE faa IN (
+            SELECT DISTINCT origin
+            FROM flights
+        )
+        ORDER BY faa
+    """,
+    # this and the plane type queries read flights_enriched (flights_enriched.py),
+    # which has the airport and plane columns on every flight; the IS NOT NULL
+    # tests drop the flights the inner joins used to
+    "destinations_on_date": """
+        SELECT origin_lat, origin_lon, dest_lat, dest_lon, dest AS dest_code
+        FROM flights_enriched
+        WHERE month = ?
+          AND day   = ?
+          AND origin = ?
+          AND origin_lat IS NOT NULL
+          AND dest_lat IS NOT NULL
+    """,
+    "day_destination_counts": """
+        SELECT dest,
+               COUNT(*) AS flights_to_dest
+        FROM flights
+        WHERE month = ?
+          AND day   = ?
+          AND origin = ?
+        GROUP BY dest
+        ORDER BY flights_to_dest DESC, dest
+    """,
+    "plane_type_usage": """
+        SELECT plane_type,
+               COUNT(*) AS usage_count
+        FROM flights_enriched
+        WHERE origin = ?
+          AND dest   = ?
+          AND plane_type IS NOT NULL
+        GROUP BY plane_type
+        ORDER BY usage_count DESC, plane_type
+    """,
+    "route_distances": """
+        SELECT origin, dest, COUNT(*) AS flights,
+               AVG(distance) AS stored_distance,
+               MIN(distance) AS min_distance,
+               MAX(distance) AS max_distance,
+               COUNT(DISTINCT distance) AS distinct_distances
+        FROM flights
+        GROUP BY origin, dest
+        ORDER BY origin, dest
+    """,
+    # one (origin, month) slice of plane_type_usage for every destination, so
+    # batch_runner.py can add the slices up into whole-year per-route counts
+    "plane_type_usage_in_month": """
+        SELECT dest, plane_type, COUNT(*) AS usage_count
+        FROM flights_enriched
+        WHERE origin = ?
+          AND year   = ?
+          AND month  = ?
+          AND plane_type IS NOT NULL
+        GROUP BY dest, plane_type
+        ORDER BY dest, plane_type
+    """,
+    # built by rollups.py; grain is day, week or month
+    "rollup_range": """
+        SELECT period_start, origin, carrier, flights, cancelled,
+               dep_delay_n, dep_delay_sum, dep_delay_sumsq,
+               arr_delay_n, arr_delay_sum, arr_delay_sumsq,
+               air_time_n, air_time_sum
+        FROM flight_rollups
+        WHERE grain = ? AND period_start BETWEEN ? AND ?
+        ORDER BY period_start, origin, carrier
+    """,
+    # built by airtime_histograms.py
+    "airtime_histogram_range": """
+        SELECT flight_date, origin, counts
+        FROM airtime_histograms
+        WHERE flight_date BETWEEN ? AND ?
+        ORDER BY flight_date, origin
+    """,
+    # built by delay_sketches.py
+    "delay_sketch_bins": """
+        SELECT origin, month, metric, bin, count
+        FROM delay_sketch_bins
+        ORDER BY origin, month, metric, bin
+    """,
+    "delay_sketch_summary": """
+        SELECT origin, month, metric, n, total, total_sq, min_value, max_value
+        FROM delay_sketch_summary
+        ORDER BY origin, month, metric
+    """,
+    # built by flight_sample.py: a stratified sample of flights with weights
+    "sample_summary": """
+        SELECT COUNT(air_time) AS air_time_n,
+               SUM(air_time) AS air_time_sum,
+               SUM(air_time * air_time) AS air_time_sumsq,
+               MIN(air_time) AS min_air_time,
+               MAX(air_time) AS max_air_time,
+               COUNT(distance) AS distance_n,
+               SUM(distance) AS distance_sum,
+               SUM(distance * distance) AS distance_sumsq,
+               MIN(distance) AS min_distance,
+               MAX(distance) AS max_distance
+        FROM flights_sample
+    """,
+    "sample_flights_by_carrier": """
+        SELECT carrier, SUM(weight) AS flight_count, COUNT(*) AS sampled
+        FROM flights_sample
+        GROUP BY carrier
+        ORDER BY carrier
+    """,
+}
+# the same cells over the sample; n counts sampled flights, so the confidence
+# intervals widen to match, and the weighted sums estimate the full table's
+SAMPLE_DELAY_ROWS = DELAY_ROWS.replace(
+    "f.arr_delay\n", "f.arr_delay, f.weight\n"
+).replace("FROM flights f", "FROM flights_sample f")
+QUERIES["sample_delay_cells"] = f"""
+        SELECT hour, wind_bin, temp_bin, precip_bucket,
+               COUNT(*) AS n,
+               SUM(arr_delay) AS delay_sum,
+               SUM(arr_delay * arr_delay) AS delay_sumsq,
+               SUM(weight) AS weighted_n,
+               SUM(weight * arr_delay) AS weighted_delay_sum
+        FROM ({SAMPLE_DELAY_ROWS}) AS r
+        GROUP BY 1, 2, 3, 4
+        ORDER BY 1, 2, 3, 4
+"""
+
+
+def data_version(db_path=DB_PATH):
+    # any write to the database changes its mtime or size
+    try:
+        stat = os.stat(db_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def missing_table(error):
+    # a derived table that hasn't been built yet; pandas wraps the sqlite3
+    # error, so look down the chain, and DuckDB raises its own CatalogException
+    while error is not None:
+        if isinstance(error, sqlite3.OperationalError) and "no such table" in str(error):
+            return True
+        if type(error).__name__ == "CatalogException" and "does not exist" in str(error):
+            return True
+        error = error.__cause__
+    return False
+
+
+def query_sql(name, dialect):
+    sql = QUERIES[name]
+    if isinstance(sql, dict):
+        sql = sql[dialect]
+    return sql
+
+
+def cached_query(backend, sql, params):
+    # through the backend's on-disk result cache when it has one
+    if backend.result_cache is None:
+        return backend.execute(sql, params)
+    key = result_key(backend.name, sql, params, data_version(backend.db_path))
+    return backend.result_cache.get_or_compute(key, lambda: backend.execute(sql, params))
+
+
+def _chunks(cursor, chunksize):
+    # DataFrames of at most chunksize rows, so memory stays at one chunk
+    columns = [column[0] for column in cursor.description]
+    while True:
+        rows = cursor.fetchmany(chunksize)
+        if not rows:
+            return
+        yield pd.DataFrame.from_records(rows, columns=columns)
+
+
+class SQLiteBackend:
+    name = "sqlite"
+
+    def __init__(self, db_path=DB_PATH, result_cache=None):
+        self.db_path = db_path
+        self.result_cache = result_cache
+        self._local = threading.local()
+
+    def connect(self):
+        # read-only, so any number of threads and processes can share the file
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False
+        )
+        # aborts the running statement once this thread's time limit has passed
+        conn.set_progress_handler(self._past_deadline, 10_000)
+        return conn
+
+    def _past_deadline(self):
+        deadline = getattr(self._local, "deadline", None)
+        return deadline is not None and time.monotonic() > deadline
+
+    @contextmanager
+    def time_limit(self, seconds):
+        # queries on this thread past the limit raise sqlite3.OperationalError
+        self._local.deadline = None if seconds is None else time.monotonic() + seconds
+        try:
+            yield
+        finally:
+            self._local.deadline = None
+
+    def connection(self):
+        # sqlite3 connections belong to the thread that opened them
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self.connect()
+        return conn
+
+    def query(self, name, params=()):
+        return cached_query(self, query_sql(name, self.name), params)
+
+    def execute(self, sql, params=()):
+        return pd.read_sql_query(sql, self.connection(), params=tuple(params))
+
+    def stream(self, name, params=(), chunksize=STREAM_CHUNKSIZE):
+        # SQLite hands back rows as the join produces them, so the first chunk
+        # arrives long before the last row is read
+        cursor = self.connection().execute(query_sql(name, self.name), tuple(params))
+        try:
+            yield from _chunks(cursor, chunksize)
+        finally:
+            cursor.close()
+
+
+class DuckDBBackend:
+    """Runs the named queries on a DuckDB copy of the SQLite tables.
+
+    The copy is rebuilt whenever the SQLite file changes, checked before every
+    query, so both backends always answer from the same data.
+    """
+
+    name = "duckdb"
+
+    def __init__(self, db_path=DB_PATH, duckdb_path=DUCKDB_PATH, result_cache=None):
+        self.db_path = db_path
+        self.result_cache = result_cache
+        self.duckdb_path = duckdb_path
+        self._lock = threading.Lock()
+        self._con = None
+        self._version = None
+        # open connections -> queries running on them, and replaced ones that
+        # close once their last query finishes
+        self._users = {}
+        self._retired = set()
+        self._opened = itertools.count()
+        self._refresh()
+
+    def _source_version(self):
+        return repr(data_version(self.db_path))
+
+    @staticmethod
+    def _copy_version(con):
+        import duckdb
+
+        try:
+            row = con.execute("SELECT source_version FROM _copy_info").fetchone()
+        except duckdb.CatalogException:
+            return None
+        return row[0] if row else None
+
+    def _is_current(self):
+        import duckdb
+
+        if not os.path.exists(self.duckdb_path):
+            return False
+        with duckdb.connect(self.duckdb_path, read_only=True) as con:
+            return self._copy_version(con) == self._source_version()
+
+    def _refresh(self):
+        # switches to the current copy, rebuilding it first, once the SQLite
+        # file has changed since the open one was made
+        if self._version == self._source_version():
+            return
+        with self._lock:
+            if self._version == self._source_version():
+                return
+            if not self._is_current():
+                self.build()
+            retired = self._con
+            self._con = self._open_copy()
+            self._version = self._copy_version(self._con)
+            if retired is not None:
+                self._retire(retired)
+
+    def _open_copy(self):
+        # DuckDB hands back the database it already has open for a path, so
+        # each copy is opened through a link of its own; the previous copy
+        # stays open for the queries still running on it
+        import duckdb
+
+        link = f"{self.duckdb_path}.{os.getpid()}.{next(self._opened)}.open"
+        os.link(self.duckdb_path, link)
+        try:
+            return duckdb.connect(link, read_only=True)
+        finally:
+            try:
+                os.remove(link)
+            except OSError:
+                # Windows keeps an open file's name until it is closed
+                pass
+
+    def _retire(self, con):
+        # under _lock: closed now if nothing runs on it, else by its last query
+        if self._users.get(con):
+            self._retired.add(con)
+        else:
+            con.close()
+
+    def build(self):
+        import duckdb
+
+        source = sqlite3.connect(self.db_path)
+        # the source tables plus whatever derived tables have been built so far
+        tables = [
+            row[0]
+            for row in source.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        ]
+        # built under another name and renamed over the copy, so a process
+        # still reading the old copy doesn't block the build or see half of it
+        building = f"{self.duckdb_path}.{os.getpid()}.{threading.get_ident()}.building"
+        if os.path.exists(building):
+            os.remove(building)
+        try:
+            with duckdb.connect(building) as con:
+                for table in tables:
+                    frame = pd.read_sql_query(f"SELECT * FROM {table}", source)
+                    con.register("source_frame", frame)
+                    con.execute(
+                        f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM source_frame"
+                    )
+                    con.unregister("source_frame")
+                con.execute(
+                    "CREATE OR REPLACE TABLE _copy_info AS SELECT ? AS source_version",
+                    [self._source_version()],
+                )
+            os.replace(building, self.duckdb_path)
+        finally:
+            source.close()
+            if os.path.exists(building):
+                os.remove(building)
+
+    @contextmanager
+    def time_limit(self, seconds):
+        # DuckDB queries run to completion; callers simply stop waiting for them
+        yield
+
+    @contextmanager
+    def cursor(self):
+        # DuckDB cursors are independent connections to the same database;
+        # the copy they read is kept open until every one of them is closed
+        self._refresh()
+        with self._lock:
+            con = self._con
+            self._users[con] = self._users.get(con, 0) + 1
+            cursor = con.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+            with self._lock:
+                self._users[con] -= 1
+                if not self._users[con]:
+                    del self._users[con]
+                    if con in self._retired:
+                        self._retired.discard(con)
+                        con.close()
+
+    def query(self, name, params=()):
+        return cached_query(self, query_sql(name, self.name), params)
+
+    def execute(self, sql, params=()):
+        with self.cursor() as cursor:
+            return cursor.execute(sql, list(params)).df()
+
+    def stream(self, name, params=(), chunksize=STREAM_CHUNKSIZE):
+        with self.cursor() as cursor:
+            cursor.execute(query_sql(name, self.name), list(params))
+            yield from _chunks(cursor, chunksize)
+
+
+BACKENDS = {"sqlite": SQLiteBackend, "duckdb": DuckDBBackend}
+
+
+def open_result_cache():
+    # FLIGHTS_RESULT_CACHE names the cache file, or turns it off with "off"
+    path = os.environ.get("FLIGHTS_RESULT_CACHE", RESULT_CACHE_PATH)
+    if path == "off":
+        return None
+    try:
+        return ResultCache(path)
+    except sqlite3.Error:
+        # e.g. a read-only deploy directory: run uncached rather than fail
+        return None
+
+
+def get_backend(name=None, db_path=DB_PATH, result_cache=True):
+    # FLIGHTS_BACKEND=duckdb switches every caller to the columnar engine;
+    # result_cache=False skips the shared on-disk cache (for benchmarks)
+    name = name or os.environ.get("FLIGHTS_BACKEND", "sqlite")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown query backend {name!r}, choose from {list(BACKENDS)}")
+    # one backend per engine, file and cache setting however they are passed:
+    # two DuckDB backends on one copy would clash
+    return _get_backend(name, os.path.abspath(db_path), bool(result_cache))
+
+
+@lru_cache(maxsize=None)
+def _get_backend(name, db_path, result_cache):
+    cache = open_result_cache() if result_cache else None
+    return BACKENDS[name](db_path=db_path, result_cache=cache)
+
+
+get_backend.cache_clear = _get_backend.cache_clear
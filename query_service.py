@@ -0,0 +1,215 @@
+import hashlib
+import json
+import sys
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import flights_analysis
+from query_backend import data_version
+
+HOST = "127.0.0.1"
+PORT = 8765
+WORKERS = 8
+CACHE_ENTRIES = 1024
+
+# The numbers behind the dashboard as JSON, for tools that don't go through
+# Streamlit:
+#
+#   GET /route_carrier_stats?origin=JFK&dest=LAX
+#   GET /flight_stats?month=1&day=15&origin=JFK
+#   GET /plane_type_usage?origin=LGA&dest=CLT
+#
+# Responses carry an ETag; a request whose If-None-Match still matches gets an
+# empty 304. Run with `python query_service.py [port] [--quiet]`.
+
+
+def route_carrier_stats(params):
+    frame = flights_analysis.query(
+        "route_carrier_stats_by_faa", (params["origin"], params["dest"])
+    )
+    # through to_json so missing averages come out as null rather than NaN
+    return json.loads(frame.to_json(orient="records"))
+
+
+def flight_stats(params):
+    return flights_analysis.get_flight_stats(
+        int(params["month"]), int(params["day"]), params["origin"]
+    )
+
+
+def plane_type_usage(params):
+    return flights_analysis.get_plane_type_usage(params["origin"], params["dest"])
+
+
+# path -> (handler, required query parameters)
+ENDPOINTS = {
+    "/route_carrier_stats": (route_carrier_stats, ("origin", "dest")),
+    "/flight_stats": (flight_stats, ("month", "day", "origin")),
+    "/plane_type_usage": (plane_type_usage, ("origin", "dest")),
+}
+
+
+def encode(result):
+    # numpy scalars from the pandas-backed helpers become plain numbers
+    return json.dumps(result, default=lambda value: value.item()).encode()
+
+
+class ResponseCache:
+    """LRU of encoded response bodies and their ETags."""
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body):
+        entry = (body, f'"{hashlib.sha1(body).hexdigest()[:16]}"')
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    # keep-alive, so a client reuses its connection; an idle one only holds
+    # its own connection thread, never a query worker. Without TCP_NODELAY the
+    # separately written body waits on a delayed ACK
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    timeout = 30
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/":
+            self.send_json(HTTPStatus.OK, encode(sorted(ENDPOINTS)))
+            return
+        if url.path == "/stats":
+            cache = self.server.cache
+            self.send_json(HTTPStatus.OK, encode({"hits": cache.hits, "misses": cache.misses}))
+            return
+        if url.path not in ENDPOINTS:
+            self.send_error_json(HTTPStatus.NOT_FOUND, f"unknown endpoint {url.path}")
+            return
+        handler, required = ENDPOINTS[url.path]
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        missing = [name for name in required if name not in params]
+        if missing:
+            self.send_error_json(
+                HTTPStatus.BAD_REQUEST, f"missing parameters: {', '.join(missing)}"
+            )
+            return
+
+        # a write to the database changes its data version, so stale entries
+        # are simply never looked up again
+        key = (
+            url.path,
+            tuple(params[name] for name in required),
+            data_version(flights_analysis.db_path()),
+        )
+        entry = self.server.cache.get(key)
+        if entry is None:
+            try:
+                body = encode(self.server.run_query(handler, params))
+            except ValueError as e:
+                self.send_error_json(HTTPStatus.BAD_REQUEST, str(e))
+                return
+            except LookupError:
+                # e.g. get_flight_stats on a day without flights
+                self.send_error_json(HTTPStatus.NOT_FOUND, "no flights match")
+                return
+            except Exception as e:
+                # anything else is our bug, but the client still gets an answer
+                traceback.print_exc()
+                self.send_error_json(
+                    HTTPStatus.INTERNAL_SERVER_ERROR, f"{type(e).__name__}: {e}"
+                )
+                return
+            entry = self.server.cache.put(key, body)
+        body, etag = entry
+
+        if etag in {tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")}:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_json(HTTPStatus.OK, body, etag)
+
+    def send_json(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, message):
+        self.send_json(status, encode({"error": message}))
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class QueryServer(ThreadingHTTPServer):
+    """Serves each connection on its own thread; queries run on a fixed pool.
+
+    Connections are accepted however many clients keep theirs open, and only
+    the database work is bounded: a request the response cache can't answer
+    runs its query on one of the pool's long-lived threads, each of which
+    keeps the read-only backend connection it opened on its first query, so
+    the pool of threads is the connection pool.
+    """
+
+    # idle keep-alive connections aren't waited for on shutdown
+    block_on_close = False
+
+    def __init__(
+        self, address=(HOST, PORT), workers=WORKERS, cache_entries=CACHE_ENTRIES, verbose=False
+    ):
+        super().__init__(address, QueryHandler)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="query")
+        self.cache = ResponseCache(cache_entries)
+        self.verbose = verbose
+
+    def run_query(self, handler, params):
+        # on a pool thread; the connection's thread waits for the result
+        return self.pool.submit(handler, params).result()
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    port = int(args[0]) if args else PORT
+    server = QueryServer((HOST, port), verbose="--quiet" not in sys.argv)
+    print(f"Serving {', '.join(sorted(ENDPOINTS))} on http://{HOST}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,238 @@
+import atexit
+import hashlib
+import sqlite3
+import sys
+import threading
+import time
+
+import pyarrow as pa
+
+RESULT_CACHE_PATH = "flights_results.cache.db"
+MAX_BYTES = 512 * 1024 * 1024
+# hit/miss counts and last-used times are written back at most this often
+FLUSH_SECONDS = 30.0
+
+# Query results as Arrow IPC bytes in a side SQLite file, so they outlive a
+# restart and are shared by every process on the machine; Arrow rather than
+# pickle, so reading an entry never runs code from the file. WAL mode lets
+# readers carry on while one process writes. A lookup only reads: its counter
+# and recency updates are kept in memory and written with the next put or
+# every FLUSH_SECONDS, so hits never queue for the write lock. A cache that
+# can't be read or written just behaves like a miss.
+
+
+def to_bytes(frame):
+    sink = pa.BufferOutputStream()
+    table = pa.Table.from_pandas(frame)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def from_bytes(blob):
+    with pa.ipc.open_stream(blob) as reader:
+        return reader.read_all().to_pandas()
+
+
+def result_key(engine, sql, params, version):
+    text = repr((engine, sql.strip(), tuple(params), version))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ResultCache:
+    """Size-bounded LRU of query results on disk.
+
+    Entries are keyed on the engine, query text, parameters and the database's
+    data version, so a write to the database simply stops old entries from
+    being found; eviction removes them in due course.
+    """
+
+    def __init__(self, path=RESULT_CACHE_PATH, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        # lookups since the last flush: counter increments and keys hit
+        self._pending_lock = threading.Lock()
+        self._pending = {"hits": 0, "misses": 0}
+        self._touched = {}
+        self._flushed = time.monotonic()
+        atexit.register(self.flush)
+        with self.connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, n INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0)"
+            )
+
+    def connection(self):
+        # one connection per thread, like SQLiteBackend
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        try:
+            row = self.connection().execute(
+                "SELECT value FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            row = None
+        value = None
+        if row is not None:
+            try:
+                value = from_bytes(row[0])
+            except Exception:
+                # not an Arrow stream (an entry from an older version, say);
+                # recompute it
+                value = None
+        self._record(key if value is not None else None)
+        return value
+
+    def put(self, key, value):
+        try:
+            blob = to_bytes(value)
+        except Exception:
+            # e.g. an object column Arrow can't type; just don't cache it
+            return
+        if len(blob) > self.max_bytes:
+            return
+        try:
+            with self.connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                    (key, blob, len(blob), time.time()),
+                )
+                self._flush(conn)
+                self._evict(conn)
+        except sqlite3.Error:
+            pass
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _record(self, hit_key):
+        # a hit (its key) or a miss (None), noted in memory
+        with self._pending_lock:
+            if hit_key is None:
+                self._pending["misses"] += 1
+            else:
+                self._pending["hits"] += 1
+                self._touched[hit_key] = time.time()
+            due = time.monotonic() - self._flushed >= FLUSH_SECONDS
+        if due:
+            self.flush(wait=False)
+
+    def _take_pending(self):
+        with self._pending_lock:
+            pending, touched = self._pending, self._touched
+            self._pending = {"hits": 0, "misses": 0}
+            self._touched = {}
+            self._flushed = time.monotonic()
+        return pending, touched
+
+    def _restore_pending(self, pending, touched):
+        # a flush that failed: keep its updates for the next one
+        with self._pending_lock:
+            for name, n in pending.items():
+                self._pending[name] += n
+            for key, used in touched.items():
+                self._touched[key] = max(used, self._touched.get(key, used))
+
+    def _flush(self, conn):
+        # inside a write transaction the caller already holds
+        pending, touched = self._take_pending()
+        try:
+            conn.executemany(
+                "UPDATE counters SET n = n + ? WHERE name = ?",
+                [(n, name) for name, n in pending.items() if n],
+            )
+            conn.executemany(
+                "UPDATE results SET last_used = MAX(last_used, ?) WHERE key = ?",
+                [(used, key) for key, used in touched.items()],
+            )
+        except sqlite3.Error:
+            self._restore_pending(pending, touched)
+            raise
+
+    def flush(self, wait=True):
+        """Writes the counters and last-used times held in memory. With
+        wait=False it gives up at once if another process is writing."""
+        with self._pending_lock:
+            if not any(self._pending.values()) and not self._touched:
+                return
+        try:
+            conn = self.connection()
+            if not wait:
+                conn.execute("PRAGMA busy_timeout = 0")
+            try:
+                with conn:
+                    self._flush(conn)
+            finally:
+                if not wait:
+                    conn.execute("PRAGMA busy_timeout = 5000")
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, conn):
+        # least recently used first, until the total fits again
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY last_used"):
+            if total - freed <= self.max_bytes:
+                break
+            doomed.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM results WHERE key = ?", doomed)
+
+    def stats(self):
+        self.flush()
+        conn = self.connection()
+        counters = dict(conn.execute("SELECT name, n FROM counters"))
+        entries, size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()
+        return {**counters, "entries": entries, "bytes": size}
+
+    def clear(self):
+        self._take_pending()
+        with self.connection() as conn:
+            conn.execute("DELETE FROM results")
+            conn.execute("UPDATE counters SET n = 0")
+
+
+if __name__ == "__main__":
+    cache = ResultCache()
+    if "--clear" in sys.argv:
+        cache.clear()
+    stats = cache.stats()
+    lookups = stats["hits"] + stats["misses"]
+    print(
+        f"{stats['entries']} results, {stats['bytes'] / 1e6:.1f} MB; "
+        f"{stats['hits']} hits / {stats['misses']} misses"
+        + (f" ({stats['hits'] / lookups:.0%} hit rate)" if lookups else "")
+    )
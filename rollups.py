@@ -0,0 +1,113 @@
+import sqlite3
+import threading
+
+from derived_state import get_watermark, max_flight_rowid, needs_refresh, set_watermark
+from query_backend import data_version
+
+DB_PATH = "flights_database.db"
+
+# Every grain is keyed by the date its period starts on: the day itself, the
+# Monday of its ISO week, or the first of its month.
+FLIGHT_DATE = "printf('%04d-%02d-%02d', year, month, day)"
+PERIOD_STARTS = {
+    "day": FLIGHT_DATE,
+    "week": f"date({FLIGHT_DATE}, '-' || ((CAST(strftime('%w', {FLIGHT_DATE}) AS INTEGER) + 6) % 7) || ' days')",
+    "month": "printf('%04d-%02d-01', year, month)",
+}
+
+# Sums rather than means, so new flights are folded in by adding and any set of
+# periods, airports or carriers can be combined afterwards. A flight with no
+# dep_time was cancelled.
+UPSERT = """
+    INSERT INTO flight_rollups
+    SELECT '{grain}', {period_start}, origin, carrier,
+           COUNT(*),
+           SUM(dep_time IS NULL),
+           COUNT(dep_delay), COALESCE(SUM(dep_delay), 0), COALESCE(SUM(dep_delay * dep_delay), 0),
+           COUNT(arr_delay), COALESCE(SUM(arr_delay), 0), COALESCE(SUM(arr_delay * arr_delay), 0),
+           COUNT(air_time), COALESCE(SUM(air_time), 0)
+    FROM flights
+    WHERE rowid > ? AND rowid <= ?
+    GROUP BY 2, origin, carrier
+    ON CONFLICT(grain, period_start, origin, carrier) DO UPDATE SET
+        flights = flights + excluded.flights,
+        cancelled = cancelled + excluded.cancelled,
+        dep_delay_n = dep_delay_n + excluded.dep_delay_n,
+        dep_delay_sum = dep_delay_sum + excluded.dep_delay_sum,
+        dep_delay_sumsq = dep_delay_sumsq + excluded.dep_delay_sumsq,
+        arr_delay_n = arr_delay_n + excluded.arr_delay_n,
+        arr_delay_sum = arr_delay_sum + excluded.arr_delay_sum,
+        arr_delay_sumsq = arr_delay_sumsq + excluded.arr_delay_sumsq,
+        air_time_n = air_time_n + excluded.air_time_n,
+        air_time_sum = air_time_sum + excluded.air_time_sum
+"""
+
+_lock = threading.Lock()
+_current = set()
+
+
+def create_rollup_table(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS flight_rollups (
+            grain TEXT NOT NULL,
+            period_start TEXT NOT NULL,
+            origin TEXT NOT NULL,
+            carrier TEXT NOT NULL,
+            flights INTEGER NOT NULL,
+            cancelled INTEGER NOT NULL,
+            dep_delay_n INTEGER NOT NULL,
+            dep_delay_sum REAL NOT NULL,
+            dep_delay_sumsq REAL NOT NULL,
+            arr_delay_n INTEGER NOT NULL,
+            arr_delay_sum REAL NOT NULL,
+            arr_delay_sumsq REAL NOT NULL,
+            air_time_n INTEGER NOT NULL,
+            air_time_sum REAL NOT NULL,
+            PRIMARY KEY (grain, period_start, origin, carrier)
+        )
+        """
+    )
+
+
+def refresh_rollups(db_path=DB_PATH, rebuild=False):
+    # folds flights added since the last refresh into every grain; rebuild=True
+    # starts over (after edits or deletes)
+    conn = sqlite3.connect(db_path, timeout=30.0)
+    with conn:
+        # taken before reading the watermark, so two processes can't both add
+        # the same flights
+        conn.execute("BEGIN IMMEDIATE")
+        create_rollup_table(conn)
+        if rebuild:
+            conn.execute("DELETE FROM flight_rollups")
+            set_watermark(conn, "flight_rollups", 0)
+        start = get_watermark(conn, "flight_rollups")
+        end = max_flight_rowid(conn)
+        if end > start:
+            for grain, period_start in PERIOD_STARTS.items():
+                conn.execute(
+                    UPSERT.format(grain=grain, period_start=period_start), (start, end)
+                )
+            set_watermark(conn, "flight_rollups", end)
+    conn.close()
+    return end - start if end > start else 0
+
+
+
+def ensure_rollups(db_path=DB_PATH):
+    """Folds new flights into flight_rollups before it is read, once it has
+    been built; a version check when nothing has changed since the last call."""
+    if (db_path, data_version(db_path)) in _current:
+        return
+    with _lock:
+        if (db_path, data_version(db_path)) in _current:
+            return
+        if needs_refresh(db_path, "flight_rollups", "flight_rollups"):
+            refresh_rollups(db_path)
+        _current.add((db_path, data_version(db_path)))
+
+
+if __name__ == "__main__":
+    added = refresh_rollups()
+    print(f"Folded {added} new flight rows into flight_rollups")
@@ -0,0 +1,169 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+
+import figure_cache
+from flight_cube import load_flight_cube
+
+PAGE = "route"
+
+
+def airport_code(airports_df, name):
+    # the first airport with that name, as the named queries' subquery picks;
+    # a list, empty when there is none, so the cube matches no flights
+    return airports_df.loc[airports_df["name"] == name, "faa"].iloc[:1].tolist()
+
+
+def route_carrier_stats(backend, airports_df, route):
+    # the "route_carrier_stats" query, answered from the cube
+    origin, dest = (airport_code(airports_df, name) for name in route)
+    stats = load_flight_cube(backend).aggregate(("carrier",), origin=origin, dest=dest)
+    stats = stats.rename(
+        columns={
+            "flights": "num_flights",
+            "mean_dep_delay": "avg_dep_delay",
+            "mean_arr_delay": "avg_arr_delay",
+            "dep_time_min": "earliest_dep",
+            "dep_time_max": "latest_dep",
+        }
+    )
+    columns = [
+        "carrier", "num_flights", "avg_dep_delay", "avg_arr_delay", "earliest_dep", "latest_dep",
+    ]
+    return stats[columns].sort_values("carrier", ignore_index=True)
+
+
+def top_destinations(backend, airports_df, departure_airport, limit=5):
+    origin = airport_code(airports_df, departure_airport)
+    counts = load_flight_cube(backend).aggregate(("dest",), origin=origin)
+    counts = counts[["dest", "flights"]].rename(columns={"flights": "num_flights"})
+    counts = counts.sort_values(["num_flights", "dest"], ascending=[False, True])
+    return counts.head(limit).reset_index(drop=True)
+
+
+def render(backend):
+    airports_df = pd.read_csv("airports.csv")
+
+    st.sidebar.header("Flight Selection ✈️")
+    departure_airport = st.sidebar.selectbox(
+        "Select Departure Airport", airports_df["name"].unique()
+    )
+    arrival_airport = st.sidebar.selectbox(
+        "Select Arrival Airport", airports_df["name"].unique()
+    )
+
+    if departure_airport == arrival_airport:
+        st.warning("⚠️ Please select a different destination airport.")
+    else:
+        route = (departure_airport, arrival_airport)
+        df_flight_stats = figure_cache.cached_frame(
+            PAGE,
+            "flight_stats",
+            route,
+            lambda: route_carrier_stats(backend, airports_df, route),
+        )
+
+        st.markdown(
+            f"""
+    <h1 style='text-align: center; color: #4CAF50;'>Flight Statistics Dashboard</h1>
+    <h3 style='text-align: center;'>From {departure_airport}  to {arrival_airport} </h3>
+    <hr>
+    """,
+            unsafe_allow_html=True,
+        )
+
+        if df_flight_stats.empty:
+            st.warning("No flight data available for the selected route.")
+        else:
+            total_flights = df_flight_stats["num_flights"].sum()
+            avg_dep_delay = df_flight_stats["avg_dep_delay"].mean()
+            avg_arr_delay = df_flight_stats["avg_arr_delay"].mean()
+            earliest_dep = df_flight_stats["earliest_dep"].min()
+            latest_dep = df_flight_stats["latest_dep"].max()
+
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Total Flights", total_flights, "📊")
+            col2.metric("Avg Departure Delay (min)", f"{avg_dep_delay:.2f}", "⏳")
+            col3.metric("Avg Arrival Delay (min)", f"{avg_arr_delay:.2f}", "🚦")
+
+            figure_cache.plotly_chart(
+                PAGE,
+                "carrier_bar",
+                route,
+                lambda: px.bar(
+                    df_flight_stats,
+                    x="carrier",
+                    y="num_flights",
+                    color="carrier",
+                    title="Number of Flights per Airline",
+                    labels={"carrier": "Airline", "num_flights": "Number of Flights"},
+                ),
+                use_container_width=True,
+            )
+
+            figure_cache.plotly_chart(
+                PAGE,
+                "carrier_pie",
+                route,
+                lambda: px.pie(
+                    df_flight_stats,
+                    names="carrier",
+                    values="num_flights",
+                    title="Flight Distribution by Airline",
+                ),
+                use_container_width=True,
+            )
+
+            with st.expander("📋 View Flight Data Table"):
+                st.dataframe(
+                    df_flight_stats.style.format(
+                        {"avg_dep_delay": "{:.2f}", "avg_arr_delay": "{:.2f}"}
+                    )
+                )
+
+            st.markdown("### 🌍 Departure & Arrival Airport Locations")
+            airports_filtered = airports_df[
+                airports_df["name"].isin([departure_airport, arrival_airport])
+            ]
+            figure_cache.plotly_chart(
+                PAGE,
+                "airport_map",
+                route,
+                lambda: px.scatter_map(
+                    airports_filtered,
+                    lat="lat",
+                    lon="lon",
+                    text="name",
+                    zoom=3,
+                    title="Airport Locations",
+                ),
+                use_container_width=True,
+            )
+
+            df_top_destinations = figure_cache.cached_frame(
+                PAGE,
+                "top_destinations",
+                (departure_airport,),
+                lambda: top_destinations(backend, airports_df, departure_airport),
+            )
+
+            if not df_top_destinations.empty:
+                st.markdown("### 🌟 Top 5 Destinations from Departure Airport")
+                st.dataframe(df_top_destinations)
+
+    st.markdown(
+        """
+ <style>
+    .stMetric label {
+        font-size: 18px;
+        font-weight: bold;
+        color: #4CAF50;
+    }
+    .stDataFrame {
+        border: 2px solid;
+        border-radius: 10px;
+    }
+ </style>
+ """,
+        unsafe_allow_html=True,
+    )
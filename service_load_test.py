@@ -0,0 +1,125 @@
+import http.client
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlencode
+
+from query_backend import SQLiteBackend
+
+CLIENTS = 8
+DURATION = 5.0
+
+# Starts query_service.py in its own process (so the clients don't share its
+# GIL) and reports requests per second for three passes:
+#   cold         every distinct URL once, each one computed by the service
+#   cached       the same URLs again, answered from the response cache
+#   revalidated  the same URLs with If-None-Match, answered with an empty 304
+# Run with `python service_load_test.py [clients] [seconds]`.
+
+
+def sample_paths(limit=200):
+    backend = SQLiteBackend()
+    routes = backend.execute(
+        """
+        SELECT origin, dest FROM flights
+        GROUP BY origin, dest ORDER BY COUNT(*) DESC LIMIT ?
+        """,
+        (limit,),
+    )
+    days = backend.execute(
+        """
+        SELECT DISTINCT month, day, origin FROM flights
+        ORDER BY month, day, origin LIMIT ?
+        """,
+        (limit,),
+    )
+    paths = []
+    for origin, dest in routes.itertuples(index=False):
+        query = urlencode({"origin": origin, "dest": dest})
+        paths.append(f"/route_carrier_stats?{query}")
+        paths.append(f"/plane_type_usage?{query}")
+    for month, day, origin in days.itertuples(index=False):
+        query = urlencode({"month": int(month), "day": int(day), "origin": origin})
+        paths.append(f"/flight_stats?{query}")
+    return paths
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_service(port):
+    process = subprocess.Popen(
+        [sys.executable, "query_service.py", str(port), "--quiet"],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    process.stdout.readline()  # the "Serving ..." line once it is listening
+    return process
+
+
+def run_clients(port, paths, clients, duration=None, etags=None):
+    """Each client walks its share of paths on one keep-alive connection,
+    once (duration=None) or round and round until duration has passed."""
+    counts = {}
+    lock = threading.Lock()
+    deadline = None if duration is None else time.perf_counter() + duration
+
+    def client(share):
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        seen = {}
+        while True:
+            for path in share:
+                headers = {}
+                if etags is not None and path in etags:
+                    headers["If-None-Match"] = etags[path]
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                seen[response.status] = seen.get(response.status, 0) + 1
+                if etags is not None and response.getheader("ETag"):
+                    etags.setdefault(path, response.getheader("ETag"))
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+            if deadline is None or time.perf_counter() >= deadline:
+                break
+        conn.close()
+        with lock:
+            for status, n in seen.items():
+                counts[status] = counts.get(status, 0) + n
+
+    threads = [
+        threading.Thread(target=client, args=(paths[i::clients],)) for i in range(clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return sum(counts.values()) / elapsed, counts
+
+
+if __name__ == "__main__":
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else CLIENTS
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else DURATION
+    paths = sample_paths()
+    port = free_port()
+    service = start_service(port)
+    try:
+        etags = {}
+        for label, kwargs in [
+            ("cold", {"etags": etags}),
+            ("cached", {"duration": duration}),
+            ("revalidated", {"duration": duration, "etags": etags}),
+        ]:
+            rps, counts = run_clients(port, paths, clients, **kwargs)
+            statuses = ", ".join(f"{n} x {status}" for status, n in sorted(counts.items()))
+            print(f"{label:<12} {rps:10.1f} req/s  ({statuses})")
+    finally:
+        service.terminate()
+        service.wait()
@@ -0,0 +1,135 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# page modules dashboardnyc.py loads on demand
+PAGE_MODULES = {
+    "Overview": "overview_page",
+    "Flight Route Statistics": "route_statistics_page",
+    "Delay Analysis": "delay_analysis_page",
+    "Time-based Statistics": "time_based_page",
+    "Cross-filter": "cross_filter_page",
+}
+
+# the module header dashboardnyc.py had before the pages were split out
+EAGER_IMPORTS = """
+import numpy as np
+import streamlit as st
+import pandas as pd
+import sqlite3
+import plotly.express as px
+import plotly.graph_objects as go
+import matplotlib.pyplot as plt
+import seaborn as sns
+import altair as alt
+from datetime import datetime
+"""
+
+LAZY_IMPORTS = """
+import importlib
+import streamlit as st
+import query_backend
+importlib.import_module({module!r})
+"""
+
+# importing flights_analysis must not touch the database, read a data file,
+# or load the data and plotting libraries; the audit hook sees every open
+IMPORT_SIDE_EFFECTS = """
+import json, sys
+events = []
+def hook(event, args):
+    if event == "open" and not str(args[0]).endswith((".py", ".pyc", ".so")):
+        events.append(f"open {args[0]}")
+    elif event.startswith(("sqlite3.connect", "socket.")):
+        events.append(event)
+sys.addaudithook(hook)
+import flights_analysis
+dir(flights_analysis)
+heavy = ["numpy", "pandas", "plotly", "matplotlib", "sqlite3", "query_backend"]
+print(json.dumps(events + [f"import {m}" for m in heavy if m in sys.modules]))
+"""
+
+FIRST_PAINT = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({script!r}, default_timeout=120)
+at.run()
+if at.exception:
+    raise SystemExit(str(at.exception[0].message))
+print(time.perf_counter() - start)
+"""
+
+
+def time_in_fresh_process(code, repeat):
+    # every run gets its own interpreter so nothing is already in sys.modules
+    timed = "import time\nstart = time.perf_counter()\n" + code
+    timed += "\nprint(time.perf_counter() - start)\n"
+    return run_fresh(timed, repeat)
+
+
+def run_fresh(code, repeat):
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def import_times(repeat=5):
+    results = {
+        "before (all plotting stacks)": time_in_fresh_process(EAGER_IMPORTS, repeat)
+    }
+    for page, module in PAGE_MODULES.items():
+        code = LAZY_IMPORTS.format(module=module)
+        results[f"after ({page})"] = time_in_fresh_process(code, repeat)
+    return results
+
+
+def import_side_effects():
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SIDE_EFFECTS],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def first_paint_times(repeat=3):
+    # AppTest runs the whole script for the default page, which is as close to
+    # "time to first paint" as we can get without a browser
+    with tempfile.NamedTemporaryFile(
+        "w", suffix=".py", dir=".", delete=False
+    ) as eager_app:
+        eager_app.write(EAGER_IMPORTS)
+        eager_app.write("\nexec(open('dashboardnyc.py').read())\n")
+    try:
+        before = run_fresh(FIRST_PAINT.format(script=eager_app.name), repeat)
+        after = run_fresh(FIRST_PAINT.format(script="dashboardnyc.py"), repeat)
+    finally:
+        os.remove(eager_app.name)
+    return {"before": before, "after": after}
+
+
+if __name__ == "__main__":
+    side_effects = import_side_effects()
+    print("Side effects of `import flights_analysis`:", side_effects or "none")
+    if side_effects:
+        sys.exit(1)
+
+    print("Import time (median of fresh interpreters):")
+    for label, seconds in import_times().items():
+        print(f"  {label:<40} {seconds * 1000:8.1f} ms")
+
+    if os.path.exists("flights_database.db"):
+        print("Time to first paint of the Overview page:")
+        for label, seconds in first_paint_times().items():
+            print(f"  {label:<40} {seconds * 1000:8.1f} ms")
+    else:
+        print("flights_database.db not found, skipping the first paint benchmark")
@@ -0,0 +1,349 @@
+from functools import lru_cache
+
+import streamlit as st
+import pandas as pd
+import altair as alt
+from datetime import datetime, timedelta
+
+import figure_cache
+from airtime_histograms import airtime_histogram, ensure_airtime_histograms, histogram_frame
+from derived_state import refresh_if_writable
+from flights_analysis import convert_to_datetime
+from query_backend import missing_table
+from rollups import ensure_rollups
+
+PAGE = "time"
+GRAINS = {"Day": "day", "ISO week": "week", "Month": "month"}
+
+
+def get_flight_date():
+    return st.date_input(
+        "Select a day in 2023",
+        datetime(2023, 1, 1),
+        min_value=datetime(2023, 1, 1),
+        max_value=datetime(2023, 12, 31),
+    )
+
+
+def fetch_flight_data(backend, selected_date):
+    params = (selected_date.year, selected_date.month, selected_date.day)
+    return backend.query("flights_on_day", params)
+
+
+def process_flight_data(flights_df):
+    for col in ["dep_time", "sched_dep_time", "arr_time", "sched_arr_time"]:
+        flights_df[f"{col}_dt"] = flights_df.apply(
+            lambda row: convert_to_datetime(row, col), axis=1
+        )
+
+    flights_df["dep_delay"] = (
+        flights_df["dep_time_dt"] - flights_df["sched_dep_time_dt"]
+    ).dt.total_seconds() / 60
+    flights_df["hour"] = flights_df["sched_dep_time_dt"].dt.hour
+    return flights_df
+
+
+def build_airport_count_chart(flights_df, col, title, color):
+    count_df = flights_df[col].value_counts().reset_index()
+    count_df.columns = ["Airport", f"Number of {title}"]
+    return (
+        alt.Chart(count_df)
+        .mark_bar(color=color)
+        .encode(
+            x=alt.X("Airport:N", sort="-y"),
+            y=alt.Y(f"Number of {title}:Q"),
+            tooltip=["Airport", f"Number of {title}"],
+        )
+        .properties(width=800, height=400)
+    )
+
+
+def build_delay_chart(flights_df):
+    avg_delay = flights_df.groupby("hour")["dep_delay"].mean().reset_index()
+
+    return alt.Chart(avg_delay).mark_line(color="purple").encode(
+        x=alt.X("hour:O", title="Hour of Day"),
+        y=alt.Y("dep_delay:Q", title="Average Delay (minutes)"),
+        tooltip=["hour", "dep_delay"],
+    ) + alt.Chart(avg_delay).mark_circle(color="purple").encode(
+        x="hour:O",
+        y="dep_delay:Q",
+        tooltip=["hour", "dep_delay"],
+    )
+
+
+def build_airtime_chart(flights_df):
+    airtime_counts = flights_df["air_time"].dropna().value_counts().reset_index()
+    airtime_counts.columns = ["Airtime (minutes)", "Number of Flights"]
+
+    return (
+        alt.Chart(airtime_counts)
+        .mark_bar(color="purple")
+        .encode(
+            x=alt.X(
+                "Airtime (minutes):Q",
+                bin=alt.Bin(maxbins=50),
+                title="Airtime (minutes)",
+            ),
+            y=alt.Y("Number of Flights:Q", title="Count of Flights"),
+            tooltip=["Airtime (minutes)", "Number of Flights"],
+        )
+        .properties(width=800, height=500)
+    )
+
+
+def build_airtime_histogram_chart(histogram):
+    # bins come from airtime_histograms.py, so only the non-empty bins are sent
+    return (
+        alt.Chart(histogram)
+        .mark_bar(color="purple")
+        .encode(
+            x=alt.X("start:Q", title="Airtime (minutes)"),
+            x2="end:Q",
+            y=alt.Y("flights:Q", title="Count of Flights"),
+            tooltip=[
+                alt.Tooltip("start:Q", title="From (min)"),
+                alt.Tooltip("end:Q", title="To (min)"),
+                alt.Tooltip("flights:Q", title="Flights"),
+            ],
+        )
+        .properties(width=800, height=500)
+    )
+
+
+def period_start(date, grain):
+    # rollup periods are keyed by their first day
+    if grain == "week":
+        return date - timedelta(days=date.weekday())
+    if grain == "month":
+        return date.replace(day=1)
+    return date
+
+
+def fetch_rollups(backend, grain, start, end):
+    # every period that overlaps [start, end]
+    params = (grain, period_start(start, grain).isoformat(), end.isoformat())
+    return backend.query("rollup_range", params)
+
+
+def summarise_rollups(rollups, by):
+    sums = rollups.groupby(["period_start", by], as_index=False)[
+        ["flights", "cancelled", "dep_delay_n", "dep_delay_sum", "air_time_n", "air_time_sum"]
+    ].sum()
+    sums["cancelled_pct"] = 100 * sums["cancelled"] / sums["flights"]
+    sums["avg_dep_delay"] = sums["dep_delay_sum"] / sums["dep_delay_n"]
+    sums["avg_air_time"] = sums["air_time_sum"] / sums["air_time_n"]
+    return sums
+
+
+def build_trend_chart(trend, value, title, by):
+    return (
+        alt.Chart(trend)
+        .mark_line(point=True)
+        .encode(
+            x=alt.X("period_start:T", title="Period"),
+            y=alt.Y(f"{value}:Q", title=title),
+            color=alt.Color(f"{by}:N", title=by.capitalize()),
+            tooltip=["period_start", by, alt.Tooltip(f"{value}:Q", format=".2f")],
+        )
+        .properties(height=350)
+    )
+
+
+def render_date_range(backend):
+    st.subheader("Select a date range")
+    dates = st.date_input(
+        "Date range in 2023",
+        (datetime(2023, 1, 1), datetime(2023, 3, 31)),
+        min_value=datetime(2023, 1, 1),
+        max_value=datetime(2023, 12, 31),
+    )
+    if len(dates) != 2:
+        st.write("Pick an end date to see the trends.")
+        return
+    start, end = dates
+    grain_label = st.radio("Group by", list(GRAINS), horizontal=True)
+    grain = GRAINS[grain_label]
+    params = (grain, start.isoformat(), end.isoformat())
+
+    # only the pre-aggregated rollups are read, never the flights themselves;
+    # flights added since they were last refreshed are folded in first
+    refresh_if_writable(ensure_rollups, backend.db_path)
+
+    @lru_cache(maxsize=1)
+    def get_rollups():
+        return fetch_rollups(backend, grain, start, end)
+
+    try:
+        totals = figure_cache.cached_frame(
+            PAGE,
+            "range_totals",
+            params,
+            lambda: get_rollups()[["flights", "cancelled"]].sum().to_frame().T,
+        )
+    except Exception as e:
+        if not missing_table(e):
+            raise
+        st.info("Date-range trends are drawn from the rollup tables: run `python rollups.py` to build them.")
+        return
+
+    if totals.empty or totals.loc[0, "flights"] == 0:
+        st.write("❌ No flights found in the selected range.")
+        return
+
+    col1, col2 = st.columns(2)
+    col1.metric("Flights", int(totals.loc[0, "flights"]))
+    col2.metric("Cancelled", int(totals.loc[0, "cancelled"]))
+    if grain != "day":
+        st.caption(
+            f"Each {grain_label.lower()} counts in full, including days outside the selected range."
+        )
+
+    for name, value, title, by in [
+        ("range_flights", "flights", f"Flights per {grain_label.lower()}", "origin"),
+        ("range_dep_delay", "avg_dep_delay", "Average Departure Delay (minutes)", "origin"),
+        ("range_cancelled", "cancelled_pct", "Cancelled Flights (%)", "origin"),
+        ("range_air_time", "avg_air_time", "Average Airtime (minutes)", "origin"),
+        ("range_carriers", "flights", f"Flights per {grain_label.lower()} by carrier", "carrier"),
+    ]:
+        st.subheader(f"**{title}**")
+        figure_cache.altair_chart(
+            PAGE,
+            name,
+            params,
+            lambda: build_trend_chart(
+                summarise_rollups(get_rollups(), by), value, title, by
+            ),
+            use_container_width=True,
+        )
+
+    st.subheader("**Distribution of Flights by Airtime**")
+    airports = st.multiselect("Airports", ["EWR", "JFK", "LGA"], ["EWR", "JFK", "LGA"])
+    if not airports:
+        return
+    refresh_if_writable(ensure_airtime_histograms, backend.db_path)
+    try:
+        figure_cache.altair_chart(
+            PAGE,
+            "range_airtime_distribution",
+            params[1:] + tuple(sorted(airports)),
+            lambda: build_airtime_histogram_chart(
+                histogram_frame(
+                    airtime_histogram(
+                        backend, start.isoformat(), end.isoformat(), airports
+                    )
+                )
+            ),
+            use_container_width=True,
+        )
+    except Exception as e:
+        if not missing_table(e):
+            raise
+        st.info("The airtime distribution is drawn from stored histograms: run `python airtime_histograms.py` to build them.")
+
+
+def render(backend):
+    st.markdown(
+        f"""
+    <h1 style='text-align: center; color:rgb(19, 19, 31);'> Time-based Statistics</h1>
+    <hr>
+    """,
+        unsafe_allow_html=True,
+    )
+
+    st.write(
+        "This page contains information about the flights occuring on a day of your choice."
+    )
+    if st.radio("View", ["Single day", "Date range"], horizontal=True) == "Date range":
+        render_date_range(backend)
+        return
+
+    st.subheader("Select a flight date")
+    selected_date = get_flight_date()
+    day = (selected_date.isoformat(),)
+
+    # the day's rows are only read when something below misses the figure cache
+    @lru_cache(maxsize=1)
+    def get_flights():
+        flights_df = fetch_flight_data(backend, selected_date)
+        if flights_df.empty:
+            return flights_df
+        return process_flight_data(flights_df)
+
+    total_flights = figure_cache.cached_frame(
+        PAGE, "total", day, lambda: pd.DataFrame({"total": [len(get_flights())]})
+    ).loc[0, "total"]
+
+    if total_flights == 0:
+        st.write("❌ No flights found for the selected date.")
+        return
+
+    st.markdown(
+        f"""
+        <div style="
+            background-color: #f4f4f4;
+            padding: 15px;
+            border-radius: 10px;
+            box-shadow: 2px 2px 10px rgba(0,0,0,0.1);
+            text-align: center;
+            font-size: 20px;
+            font-weight: bold;
+        ">
+            ✈️ Total Flights on {selected_date.strftime('%B %d, %Y')}: <span style="color: purple;">{total_flights}</span>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+    st.write("")
+    st.write("")
+    st.write("")
+    st.write("")
+
+    st.subheader("Amount of departing and incomming flights per airport ")
+
+    col1, col2 = st.columns(2)
+
+    for target, (col, title, color) in zip(
+        [col1, col2],
+        [("origin", "Departures", "purple"), ("dest", "Arrivals", "purple")],
+    ):
+        with target:
+            st.write(f"**Number of {title} from Each Airport**")
+            figure_cache.altair_chart(
+                PAGE,
+                f"{col}_counts",
+                day,
+                lambda: build_airport_count_chart(get_flights(), col, title, color),
+                use_container_width=True,
+            )
+
+    st.subheader("**Average Departure Delay Throughout the Day**")
+    figure_cache.altair_chart(
+        PAGE,
+        "hourly_delay",
+        day,
+        lambda: build_delay_chart(get_flights()),
+        use_container_width=True,
+    )
+
+    # from the stored per-(day, origin) histograms once they are built
+    def airtime_panel():
+        try:
+            counts = airtime_histogram(backend, day[0], day[0])
+        except Exception as e:
+            if not missing_table(e):
+                raise
+            counts = None
+        if counts is None or counts.sum() == 0:
+            return build_airtime_chart(get_flights())
+        return build_airtime_histogram_chart(histogram_frame(counts))
+
+    refresh_if_writable(ensure_airtime_histograms, backend.db_path)
+    st.subheader("**Distribution of Flights by Airtime**")
+    figure_cache.altair_chart(
+        PAGE,
+        "airtime_distribution",
+        day,
+        airtime_panel,
+        use_container_width=True,
+    )
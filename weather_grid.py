@@ -0,0 +1,230 @@
+import sys
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from query_backend import DB_PATH, SQLiteBackend, data_version
+
+FIELDS = ("wind_speed", "wind_dir", "temp", "precip", "visib")
+FILL_METHODS = ("none", "ffill", "nearest", "linear")
+FILL = "linear"
+MAX_GAP = 3  # hours
+
+# The weather table as a dense float32 array indexed [origin, hour, field],
+# where hour counts from midnight on 1 January of the first year in the table.
+# A flight's weather is then array indexing rather than one SQL lookup each,
+# and millions of flights are looked up in one vectorized operation. Hours with
+# no observation are NaN, or filled from their neighbours (see fill_gaps).
+
+
+def hour_numbers(years, months, days, hours):
+    """Hours since 1970-01-01 00:00 for matching arrays of date parts."""
+    years, months, days, hours = (
+        np.asarray(part, dtype=np.int64) for part in (years, months, days, hours)
+    )
+    month_numbers = (years - 1970) * 12 + (months - 1)
+    dates = month_numbers.astype("datetime64[M]").astype("datetime64[D]") + (days - 1)
+    return dates.astype(np.int64) * 24 + hours
+
+
+def fill_gaps(values, method=FILL, max_gap=MAX_GAP):
+    """Fills the NaN runs in a 1-D hourly series.
+
+    "ffill" carries the last observation forward, "nearest" takes the closer
+    neighbour (the earlier one on a tie) and "linear" interpolates between the
+    two; "none" leaves the gaps. "linear" only bridges gaps of at most max_gap
+    hours, and the others only copy an observation at most max_gap hours away
+    (None for no limit), so a missing day doesn't turn into a straight line.
+    """
+    if method not in FILL_METHODS:
+        raise ValueError(f"fill must be one of {', '.join(FILL_METHODS)}, not {method!r}")
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    if method == "none" or valid.all() or not valid.any():
+        return values.copy()
+
+    n = len(values)
+    positions = np.arange(n)
+    previous = np.maximum.accumulate(np.where(valid, positions, -1))
+    following = np.minimum.accumulate(np.where(valid, positions, n)[::-1])[::-1]
+    has_previous, has_following = previous >= 0, following < n
+    before, after = positions - previous, following - positions
+    previous, following = np.clip(previous, 0, n - 1), np.clip(following, 0, n - 1)
+    limit = np.inf if max_gap is None else max_gap
+
+    if method == "ffill":
+        filled = np.where(has_previous & (before <= limit), values[previous], np.nan)
+    elif method == "nearest":
+        use_previous = has_previous & (~has_following | (before <= after))
+        source = np.where(use_previous, previous, following)
+        distance = np.where(use_previous, before, after)
+        filled = np.where(distance <= limit, values[source], np.nan)
+    else:
+        # before + after - 1 is the number of missing hours in the gap
+        weight = before / np.maximum(before + after, 1)
+        filled = values[previous] + (values[following] - values[previous]) * weight
+        filled = np.where(
+            has_previous & has_following & (before + after - 1 <= limit), filled, np.nan
+        )
+    filled[valid] = values[valid]
+    return filled
+
+
+def _fill_direction(degrees, method, max_gap):
+    # directions go round through their unit vector, so 350 and 10 meet at 0
+    # rather than at 180
+    radians = np.radians(degrees)
+    x = fill_gaps(np.sin(radians), method, max_gap)
+    y = fill_gaps(np.cos(radians), method, max_gap)
+    filled = np.degrees(np.arctan2(x, y)) % 360
+    filled[filled >= 360] = 0  # -1e-15 % 360
+    filled[~np.isnan(degrees)] = degrees[~np.isnan(degrees)]
+    return filled
+
+
+class WeatherGrid:
+    """Hourly weather per origin; lookups are array indexing.
+
+    values[i, h, k] is field k at origin i, h hours after start. Hours (or
+    origins) the table has nothing for are NaN.
+    """
+
+    def __init__(self, values, origins, start_hour, fields=FIELDS):
+        self.values = values
+        self.origins = list(origins)
+        self.start_hour = int(start_hour)
+        self.fields = tuple(fields)
+        self._codes = pd.Index(self.origins)
+
+    @property
+    def hours(self):
+        return self.values.shape[1]
+
+    def positions(self, origins, years, months, days, hours):
+        # (origin row, hour column) for each flight; -1 where outside the grid
+        rows = self._codes.get_indexer(pd.Index(np.atleast_1d(np.asarray(origins, dtype=object))))
+        hours = np.asarray(hours).astype(np.int64)
+        columns = hour_numbers(years, months, days, hours) - self.start_hour
+        rows, columns, hours = np.broadcast_arrays(rows, columns, hours)
+        outside = (rows < 0) | (columns < 0) | (columns >= self.hours) | (hours < 0) | (hours > 23)
+        return np.where(outside, -1, rows), np.where(outside, -1, columns)
+
+    def lookup(self, origins, years, months, days, hours, fields=None):
+        """Weather for matching arrays (or scalars) of origin codes and date
+        parts, as an (n, len(fields)) float array; NaN where unknown."""
+        fields = self.fields if fields is None else tuple(fields)
+        columns = [self.fields.index(field) for field in fields]
+        rows, hour_columns = self.positions(origins, years, months, days, hours)
+        missing = (rows < 0) | (hour_columns < 0)
+        values = self.values[np.where(missing, 0, rows), np.where(missing, 0, hour_columns)]
+        values = values[:, columns].astype(float)
+        values[missing] = np.nan
+        return values
+
+    def lookup_frame(self, origins, years, months, days, hours, fields=None):
+        fields = self.fields if fields is None else tuple(fields)
+        return pd.DataFrame(
+            self.lookup(origins, years, months, days, hours, fields), columns=list(fields)
+        )
+
+    def get(self, origin, year, month, day, hour, fields=None):
+        """One hour's fields as a tuple, or None when any of them is unknown."""
+        values = self.lookup(origin, year, month, day, hour, fields)[0]
+        if np.isnan(values).any():
+            return None
+        return tuple(float(value) for value in values)
+
+
+def build_weather_grid(db_path=DB_PATH, fill=FILL, max_gap=MAX_GAP, fields=FIELDS):
+    frame = SQLiteBackend(db_path).execute(
+        f"""
+        SELECT origin, year, month, day, hour, {', '.join(fields)}
+        FROM weather
+        ORDER BY rowid
+        """
+    )
+    # an hour reported twice keeps its first row, as a LIMIT 1 lookup would
+    frame = frame.drop_duplicates(["origin", "year", "month", "day", "hour"])
+    origins = sorted(frame["origin"].unique())
+    numbers = hour_numbers(frame["year"], frame["month"], frame["day"], frame["hour"])
+    start_hour = hour_numbers(frame["year"].min(), 1, 1, 0)
+    n_hours = int(hour_numbers(frame["year"].max() + 1, 1, 1, 0) - start_hour)
+
+    values = np.full((len(origins), n_hours, len(fields)), np.nan, dtype=np.float32)
+    rows = pd.Index(origins).get_indexer(frame["origin"])
+    observed = frame[list(fields)].to_numpy(dtype=float)
+    values[rows, numbers - start_hour] = observed
+
+    if fill != "none":
+        for row in range(len(origins)):
+            series = values[row].astype(float)
+            for k, field in enumerate(fields):
+                fill_field = _fill_direction if field == "wind_dir" else fill_gaps
+                values[row, :, k] = fill_field(series[:, k], fill, max_gap)
+    return WeatherGrid(values, origins, start_hour, fields)
+
+
+def load_weather_grid(db_path=DB_PATH, fill=FILL, max_gap=MAX_GAP):
+    # rebuilt when the database changes; building takes a fraction of a second
+    return _load_weather_grid(db_path, fill, max_gap, data_version(db_path))
+
+
+@lru_cache(maxsize=8)
+def _load_weather_grid(db_path, fill, max_gap, version):
+    return build_weather_grid(db_path, fill, max_gap)
+
+
+if __name__ == "__main__":
+    backend = SQLiteBackend()
+    grid = load_weather_grid(fill="none")
+    observed = ~np.isnan(grid.values[:, :, 0])
+    print(
+        f"{len(grid.origins)} origins x {grid.hours} hours x {len(grid.fields)} fields "
+        f"({grid.values.nbytes / 1e6:.1f} MB), {observed.mean():.1%} of hours observed"
+    )
+    for fill in FILL_METHODS[1:]:
+        filled = ~np.isnan(load_weather_grid(fill=fill).values[:, :, 0])
+        print(f"  fill={fill:<8} {filled.mean():.1%} of hours known (max gap {MAX_GAP}h)")
+
+    # every departure's weather, against the per-flight SQL lookup it replaces
+    flights = backend.execute(
+        """
+        SELECT origin, year, month, day, CAST(dep_time / 100 AS INTEGER) AS hour
+        FROM flights
+        WHERE dep_time IS NOT NULL
+        """
+    )
+    start = time.perf_counter()
+    weather = grid.lookup(
+        flights["origin"], flights["year"], flights["month"], flights["day"], flights["hour"],
+        ("wind_speed", "wind_dir"),
+    )
+    grid_seconds = time.perf_counter() - start
+
+    conn = backend.connection()
+    sample = flights.sample(min(2000, len(flights)), random_state=0)
+    mismatches = 0
+    start = time.perf_counter()
+    for i, (origin, year, month, day, hour) in zip(sample.index, sample.itertuples(index=False)):
+        row = conn.execute(
+            """
+            SELECT wind_speed, wind_dir FROM weather
+            WHERE origin = ? AND year = ? AND month = ? AND day = ? AND hour = ?
+            LIMIT 1
+            """,
+            (origin, int(year), int(month), int(day), int(hour)),
+        ).fetchone()
+        expected = np.array(row if row else (np.nan, np.nan), dtype=float)
+        if not np.allclose(weather[i], expected, equal_nan=True, rtol=1e-6):
+            mismatches += 1
+    sql_seconds = (time.perf_counter() - start) / len(sample) * len(flights)
+
+    print(
+        f"{len(flights):,} departures: {grid_seconds * 1000:.1f} ms from the grid, "
+        f"~{sql_seconds:.1f} s one SQL lookup at a time "
+        f"({sql_seconds / grid_seconds:,.0f}x)"
+    )
+    print(f"Parity with SQL on {len(sample):,} sampled departures: {mismatches} mismatches")
+    sys.exit(1 if mismatches else 0)